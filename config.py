@@ -29,6 +29,60 @@ class Config:
         self.REMINDERS_FILE: str = os.path.join(self.DATA_DIR, 'reminders.json')
         self.STATS_FILE: str = os.path.join(self.DATA_DIR, 'stats.json')
         
+        # Отложенная запись статистики
+        self.STATS_FLUSH_INTERVAL: float = float(os.getenv('STATS_FLUSH_INTERVAL', '5'))  # Период записи (секунды)
+        self.STATS_FLUSH_THRESHOLD: int = int(os.getenv('STATS_FLUSH_THRESHOLD', '50'))  # Запись после N изменений
+        
+        # Хранилище: 'json' (файлы data/*.json) или 'sqlite' (одна база data/storage.db).
+        # Частичные изменения задач (/pause, /resume, /extend, фазы /cycle) пишут только
+        # измененные поля в sqlite, с STORAGE_JOURNAL или STORAGE_SHARDED (там - файл одного
+        # чата); json без них переписывает на каждое такое изменение весь файл коллекции
+        self.STORAGE_BACKEND: str = os.getenv('STORAGE_BACKEND', 'json').lower()
+        self.SQLITE_FILE: str = os.path.join(self.DATA_DIR, 'storage.db')
+        
+        # Формат частых файлов (stats, timers, mentions): orjson, json (компактный) или pretty (с отступами)
+        self.STORAGE_SERIALIZER: str = os.getenv('STORAGE_SERIALIZER', 'orjson').lower()
+        self.EXPORT_DIR: str = 'export'
+        self.BACKUP_DIR: str = 'backups'
+        
+        # Инкрементальные резервные копии: сжатие gzip, lzma или none, число хранимых снимков, период
+        self.BACKUP_COMPRESSION: str = os.getenv('BACKUP_COMPRESSION', 'gzip').lower()
+        self.BACKUP_KEEP: int = int(os.getenv('BACKUP_KEEP', '48'))
+        self.BACKUP_INTERVAL: float = float(os.getenv('BACKUP_INTERVAL', '3600'))  # Секунды, 0 - отключено
+        
+        # Надежность записи: none (без fsync), batch (групповая фиксация) или always (fsync на каждую запись)
+        self.STORAGE_DURABILITY: str = os.getenv('STORAGE_DURABILITY', 'batch').lower()
+        self.GROUP_COMMIT_WINDOW_MS: float = float(os.getenv('GROUP_COMMIT_WINDOW_MS', '5'))  # Окно групповой фиксации
+        
+        # Журналирование задач (дозапись изменений вместо перезаписи файлов)
+        self.STORAGE_JOURNAL: bool = os.getenv('STORAGE_JOURNAL', 'false').lower() in ('1', 'true', 'yes')
+        self.JOURNAL_COMPACT_THRESHOLD: int = int(os.getenv('JOURNAL_COMPACT_THRESHOLD', '200'))  # Записей до сжатия
+        self.JOURNAL_COMPACT_INTERVAL: float = float(os.getenv('JOURNAL_COMPACT_INTERVAL', '30'))  # Проверка (секунды)
+        
+        # Отдельный файл задач на каждый чат (data/shards/chat_<id>.json) с ленивой загрузкой
+        self.STORAGE_SHARDED: bool = os.getenv('STORAGE_SHARDED', 'false').lower() in ('1', 'true', 'yes')
+        
+        # Планировщик задач: максимум одновременно выполняющихся задач (таймеры, будильники, спам)
+        self.SCHEDULER_WORKERS: int = int(os.getenv('SCHEDULER_WORKERS', '1000'))
+        # Максимум одновременно выполняющихся задач одного чата (остальные ждут в очереди чата)
+        self.SCHEDULER_CHAT_WORKERS: int = int(os.getenv('SCHEDULER_CHAT_WORKERS', '10'))
+        # Долгосрочное планирование будильников и напоминаний: в памяти только задачи
+        # ближайшего окна, остальные периодически подгружаются из хранилища
+        self.PERSISTENT_SCHEDULING: bool = os.getenv('PERSISTENT_SCHEDULING', 'false').lower() in ('1', 'true', 'yes')
+        self.SCHEDULE_WINDOW: float = float(os.getenv('SCHEDULE_WINDOW', '3600'))  # Окно (секунды)
+        self.SCHEDULE_SWEEP_INTERVAL: float = float(os.getenv('SCHEDULE_SWEEP_INTERVAL', '300'))  # Период подгрузки
+        self.MAX_SCHEDULE_SECONDS: timedelta = timedelta(days=int(os.getenv('MAX_SCHEDULE_DAYS', '365')))
+        # Регулятор правок сообщений (отсчеты и итоги задач): бюджет на чат и на аккаунт
+        self.EDIT_CHAT_RATE: float = float(os.getenv('EDIT_CHAT_RATE', '1'))  # Правок в секунду в чате
+        self.EDIT_CHAT_BURST: int = int(os.getenv('EDIT_CHAT_BURST', '3'))
+        self.EDIT_GLOBAL_RATE: float = float(os.getenv('EDIT_GLOBAL_RATE', '20'))  # Правок в секунду всего
+        self.EDIT_GLOBAL_BURST: int = int(os.getenv('EDIT_GLOBAL_BURST', '20'))
+        # Очередь отправки сработавших будильников и напоминаний (по кругу между задачами)
+        self.FIRE_SEND_RATE: float = float(os.getenv('FIRE_SEND_RATE', '20'))  # Сообщений в секунду всего
+        self.FIRE_SEND_BURST: int = int(os.getenv('FIRE_SEND_BURST', '20'))
+        # Движок будильников и напоминаний: heap (общий планировщик) или wheel (колесо таймеров)
+        self.REMINDER_SCHEDULER_ENGINE: str = os.getenv('REMINDER_SCHEDULER_ENGINE', 'heap').lower()
+        
         # Пути к ресурсам
         self.ASSETS_DIR: str = 'assets'
         self.QUOTES_FILE: str = os.path.join(self.ASSETS_DIR, 'quotes.json')
@@ -76,6 +130,32 @@ class Config:
             
         if not self.BOT_OWNER_ID:
             raise ValueError("BOT_OWNER_ID должен быть установлен")
+        
+        if self.STORAGE_BACKEND not in ('json', 'sqlite'):
+            raise ValueError("STORAGE_BACKEND должен быть json или sqlite")
+        
+        if self.STORAGE_SERIALIZER not in ('orjson', 'json', 'pretty'):
+            raise ValueError("STORAGE_SERIALIZER должен быть orjson, json или pretty")
+        
+        if self.STORAGE_DURABILITY not in ('none', 'batch', 'always'):
+            raise ValueError("STORAGE_DURABILITY должен быть none, batch или always")
+        
+        if self.BACKUP_COMPRESSION not in ('gzip', 'lzma', 'none'):
+            raise ValueError("BACKUP_COMPRESSION должен быть gzip, lzma или none")
+        
+        if self.STORAGE_SHARDED and self.STORAGE_JOURNAL:
+            raise ValueError("STORAGE_SHARDED и STORAGE_JOURNAL нельзя включать одновременно")
+        
+        if self.PERSISTENT_SCHEDULING and not 0 < self.SCHEDULE_SWEEP_INTERVAL < self.SCHEDULE_WINDOW:
+            raise ValueError("SCHEDULE_SWEEP_INTERVAL должен быть больше 0 и меньше SCHEDULE_WINDOW")
+        
+        if self.EDIT_CHAT_RATE <= 0 or self.EDIT_GLOBAL_RATE <= 0:
+            raise ValueError("EDIT_CHAT_RATE и EDIT_GLOBAL_RATE должны быть больше 0")
+        if self.FIRE_SEND_RATE <= 0:
+            raise ValueError("FIRE_SEND_RATE должен быть больше 0")
+        
+        if self.REMINDER_SCHEDULER_ENGINE not in ('heap', 'wheel'):
+            raise ValueError("REMINDER_SCHEDULER_ENGINE должен быть heap или wheel")
     
     def get_user_setting(self, user_id: int, setting: str, default=None):
         """Получает пользовательскую настройку (заглушка для будущего расширения)"""
@@ -115,7 +115,7 @@ class FunHandler:
     async def handle_quote(self, event):
         """Обработка команды /quote"""
         try:
-            self.bot.storage.increment_command_usage('quote')
+            await self.bot.storage.increment_command_usage('quote')
             
             quote = random.choice(self.quotes)
             await event.edit(quote)
@@ -129,7 +129,7 @@ class FunHandler:
     async def handle_joke(self, event):
         """Обработка команды /joke"""
         try:
-            self.bot.storage.increment_command_usage('joke')
+            await self.bot.storage.increment_command_usage('joke')
             
             joke = random.choice(self.jokes)
             await event.edit(joke)
@@ -143,7 +143,7 @@ class FunHandler:
     async def handle_ascii(self, event):
         """Обработка команды /ascii"""
         try:
-            self.bot.storage.increment_command_usage('ascii')
+            await self.bot.storage.increment_command_usage('ascii')
             
             text = event.pattern_match.group(1).strip().upper()
             
@@ -186,7 +186,7 @@ class FunHandler:
     async def handle_rps(self, event):
         """Обработка команды /rps (камень-ножницы-бумага)"""
         try:
-            self.bot.storage.increment_command_usage('rps')
+            await self.bot.storage.increment_command_usage('rps')
             
             user_choice = event.pattern_match.group(1).strip().lower()
             
@@ -238,7 +238,7 @@ class FunHandler:
     async def handle_coin(self, event):
         """Обработка команды /coin"""
         try:
-            self.bot.storage.increment_command_usage('coin')
+            await self.bot.storage.increment_command_usage('coin')
             
             result = random.choice(['орел', 'решка'])
             emoji = '🦅' if result == 'орел' else '👑'
@@ -254,7 +254,7 @@ class FunHandler:
     async def handle_dice(self, event):
         """Обработка команды /dice"""
         try:
-            self.bot.storage.increment_command_usage('dice')
+            await self.bot.storage.increment_command_usage('dice')
             
             # Парсим максимальное значение
             max_value = 6  # По умолчанию обычный кубик
@@ -290,7 +290,7 @@ class FunHandler:
     async def handle_8ball(self, event):
         """Обработка команды /8ball"""
         try:
-            self.bot.storage.increment_command_usage('8ball')
+            await self.bot.storage.increment_command_usage('8ball')
             
             question = event.pattern_match.group(1).strip()
             
@@ -322,7 +322,7 @@ class FunHandler:
     async def handle_random(self, event):
         """Обработка команды /random"""
         try:
-            self.bot.storage.increment_command_usage('random')
+            await self.bot.storage.increment_command_usage('random')
             
             # Парсим диапазон
             min_val = 1
@@ -365,7 +365,7 @@ class FunHandler:
     async def handle_hash(self, event):
         """Обработка команды /hash"""
         try:
-            self.bot.storage.increment_command_usage('hash')
+            await self.bot.storage.increment_command_usage('hash')
             
             text = event.pattern_match.group(1).strip()
             
@@ -406,7 +406,7 @@ class FunHandler:
     async def handle_calc(self, event):
         """Обработка команды /calc"""
         try:
-            self.bot.storage.increment_command_usage('calc')
+            await self.bot.storage.increment_command_usage('calc')
             
             expression = event.pattern_match.group(1).strip()
             
@@ -475,7 +475,7 @@ class FunHandler:
     async def handle_morning(self, event):
         """Обработка команды /morning [тип]"""
         try:
-            self.bot.storage.increment_command_usage('morning')
+            await self.bot.storage.increment_command_usage('morning')
             
             # Получаем аргумент (может быть None, пустой строкой или содержать значение)
             args = event.pattern_match.group(1)
@@ -530,7 +530,7 @@ class FunHandler:
     async def handle_hash(self, event):
         """Обработка команды /hash"""
         try:
-            self.bot.storage.increment_command_usage('hash')
+            await self.bot.storage.increment_command_usage('hash')
             
             # Простая реализация хеширования
             # В реальном проекте лучше вынести в отдельный модуль
@@ -587,7 +587,7 @@ class FunHandler:
     async def handle_meme(self, event):
         """Обработка команды /meme"""
         try:
-            self.bot.storage.increment_command_usage('meme')
+            await self.bot.storage.increment_command_usage('meme')
             
             memes = [
                 "Кек",
@@ -734,7 +734,7 @@ class FunHandler:
     async def handle_slap(self, event):
         """Обработка команды /slap"""
         try:
-            self.bot.storage.increment_command_usage('slap')
+            await self.bot.storage.increment_command_usage('slap')
             
             # Получаем цель из сообщения
             target = event.pattern_match.group(1)
@@ -794,7 +794,7 @@ class FunHandler:
     async def handle_kiss(self, event):
         """Обработка команды /kiss"""
         try:
-            self.bot.storage.increment_command_usage('kiss')
+            await self.bot.storage.increment_command_usage('kiss')
             
             # Получаем цель из сообщения
             target = event.pattern_match.group(1)
@@ -851,7 +851,7 @@ class FunHandler:
     async def handle_hug(self, event):
         """Обработка команды /hug"""
         try:
-            self.bot.storage.increment_command_usage('hug')
+            await self.bot.storage.increment_command_usage('hug')
             
             # Получаем цель из сообщения
             target = event.pattern_match.group(1)
@@ -935,7 +935,7 @@ class FunHandler:
     async def handle_add_quote(self, event):
         """Обработка команды /addquote"""
         try:
-            self.bot.storage.increment_command_usage('add_quote')
+            await self.bot.storage.increment_command_usage('add_quote')
             
             # Получаем текст цитаты из сообщения
             quote = event.pattern_match.group(1)
@@ -954,7 +954,7 @@ class FunHandler:
     async def handle_add_joke(self, event):
         """Обработка команды /addjoke"""
         try:
-            self.bot.storage.increment_command_usage('add_joke')
+            await self.bot.storage.increment_command_usage('add_joke')
             
             # Получаем текст шутки из сообщения
             joke = event.pattern_match.group(1)
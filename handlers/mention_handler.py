@@ -9,6 +9,7 @@ from typing import Dict, List, Optional
 from telethon import TelegramClient
 from telethon.tl.types import Message
 
+from utils.jobs import Job, JobKind
 from utils.json_storage import JsonStorage
 from utils.time_parser import TimeParser
 from config import config
@@ -18,8 +19,6 @@ logger = logging.getLogger(__name__)
 class MentionHandler:
     def __init__(self, bot):
         self.bot = bot
-        self.active_mentions: Dict[str, asyncio.Task] = {}
-        self.active_spam: Dict[str, asyncio.Task] = {}
     
     async def handle_mention(self, event):
         """Обработка команды /mention"""
@@ -73,15 +72,21 @@ class MentionHandler:
                 'type': 'mention'
             }
             
-            self.bot.storage.save_mention(mention_data)
-            self.bot.storage.increment_mentions_created()
-            self.bot.storage.increment_command_usage('mention')
+            await self.bot.storage.save_mention(mention_data)
+            await self.bot.storage.increment_mentions_created()
+            await self.bot.storage.increment_command_usage('mention')
             
             # Запускаем упоминания
-            task = asyncio.create_task(self._run_mentions(event, username, mention_count, interval, mention_id))
-            self.active_mentions[mention_id] = task
+            job = self.bot.jobs.add(Job(
+                mention_id, JobKind.MENTION, event.chat_id, event.id, self.bot.scheduler.time(),
+                count=mention_count, target=username,
+            ))
+            job.handle = self.bot.scheduler.call_later(
+                0, self._run_mentions, event, username, mention_count, interval, mention_id,
+                job_id=mention_id, lane=event.chat_id,
+            )
             
-            await event.edit(f"{config.MENTION_EMOJI} Начинаю упоминать {username} {mention_count} раз с интервалом {interval}с")
+            await event.edit(f"{config.MENTION_EMOJI} Начинаю упоминать {username} {mention_count} раз с интервалом {interval}с (`{job.short_id}`)")
             
             logger.info(f"Запущены упоминания {username} {mention_count} раз с интервалом {interval}с")
             
@@ -94,7 +99,7 @@ class MentionHandler:
         try:
             for i in range(count):
                 # Проверяем, не отменили ли задачу
-                if mention_id not in self.active_mentions:
+                if mention_id not in self.bot.jobs:
                     break
                 
                 await event.reply(f"{config.MENTION_EMOJI} {username}")
@@ -104,34 +109,22 @@ class MentionHandler:
                     await asyncio.sleep(interval)
             
             # Обновляем исходное сообщение
-            try:
-                await event.edit(f"{config.SUCCESS_EMOJI} Упоминания {username} завершены ({count} раз)")
-            except:
-                pass
+            self.bot.edits.submit(event, f"{config.SUCCESS_EMOJI} Упоминания {username} завершены ({count} раз)")
             
             # Удаляем упоминание из активных
-            if mention_id in self.active_mentions:
-                del self.active_mentions[mention_id]
-            
-            self.bot.storage.remove_mention(mention_id)
+            self.bot.jobs.pop(mention_id)
+            await self.bot.storage.remove_mention(mention_id)
             
             logger.info(f"Упоминания {mention_id} завершены успешно")
             
         except asyncio.CancelledError:
             logger.info(f"Упоминания {mention_id} были отменены")
-            try:
-                await event.edit(f"{config.WARNING_EMOJI} Упоминания отменены")
-            except:
-                pass
-            if mention_id in self.active_mentions:
-                del self.active_mentions[mention_id]
-            self.bot.storage.remove_mention(mention_id)
+            self.bot.edits.submit(event, f"{config.WARNING_EMOJI} Упоминания отменены")
+            self.bot.jobs.pop(mention_id)
+            await self.bot.storage.remove_mention(mention_id)
         except Exception as e:
             logger.error(f"Ошибка в упоминаниях {mention_id}: {e}")
-            try:
-                await event.edit(f"{config.ERROR_EMOJI} Ошибка в упоминаниях!")
-            except:
-                pass
+            self.bot.edits.submit(event, f"{config.ERROR_EMOJI} Ошибка в упоминаниях!")
     
     async def handle_spam(self, event):
         """Обработка команды /spam"""
@@ -173,15 +166,21 @@ class MentionHandler:
                 'type': 'spam'
             }
             
-            self.bot.storage.save_mention(spam_data)
-            self.bot.storage.increment_command_usage('spam')
+            await self.bot.storage.save_mention(spam_data)
+            await self.bot.storage.increment_command_usage('spam')
             
             # Запускаем спам
-            task = asyncio.create_task(self._run_spam(event, target_user, spam_text, spam_count, spam_id))
-            self.active_spam[spam_id] = task
+            job = self.bot.jobs.add(Job(
+                spam_id, JobKind.SPAM, event.chat_id, event.id, self.bot.scheduler.time(),
+                count=spam_count, text=spam_text, target=target_user,
+            ))
+            job.handle = self.bot.scheduler.call_later(
+                0, self._run_spam, event, target_user, spam_text, spam_count, spam_id,
+                job_id=spam_id, lane=event.chat_id,
+            )
             
             target_str = f"пользователю {target_user}" if target_user else "в чат"
-            await event.edit(f"💬 Начинаю спам {target_str}: \"{spam_text}\" ({spam_count} раз)")
+            await event.edit(f"💬 Начинаю спам {target_str}: \"{spam_text}\" ({spam_count} раз, `{job.short_id}`)")
             
             logger.info(f"Запущен спам: {spam_text} {spam_count} раз")
             
@@ -232,7 +231,7 @@ class MentionHandler:
         try:
             for i in range(count):
                 # Проверяем, не отменили ли задачу
-                if spam_id not in self.active_spam:
+                if spam_id not in self.bot.jobs:
                     break
                 
                 # Формируем сообщение
@@ -248,35 +247,23 @@ class MentionHandler:
                     await asyncio.sleep(0.2)  # 200ms между сообщениями
             
             # Обновляем исходное сообщение
-            try:
-                target_str = f"пользователю {target_user}" if target_user else "в чат"
-                await event.edit(f"{config.SUCCESS_EMOJI} Спам {target_str} завершен ({count} сообщений)")
-            except:
-                pass
+            target_str = f"пользователю {target_user}" if target_user else "в чат"
+            self.bot.edits.submit(event, f"{config.SUCCESS_EMOJI} Спам {target_str} завершен ({count} сообщений)")
             
             # Удаляем спам из активных
-            if spam_id in self.active_spam:
-                del self.active_spam[spam_id]
-            
-            self.bot.storage.remove_mention(spam_id)
+            self.bot.jobs.pop(spam_id)
+            await self.bot.storage.remove_mention(spam_id)
             
             logger.info(f"Спам {spam_id} завершен успешно")
             
         except asyncio.CancelledError:
             logger.info(f"Спам {spam_id} был отменен")
-            try:
-                await event.edit(f"{config.WARNING_EMOJI} Спам отменен")
-            except:
-                pass
-            if spam_id in self.active_spam:
-                del self.active_spam[spam_id]
-            self.bot.storage.remove_mention(spam_id)
+            self.bot.edits.submit(event, f"{config.WARNING_EMOJI} Спам отменен")
+            self.bot.jobs.pop(spam_id)
+            await self.bot.storage.remove_mention(spam_id)
         except Exception as e:
             logger.error(f"Ошибка в спаме {spam_id}: {e}")
-            try:
-                await event.edit(f"{config.ERROR_EMOJI} Ошибка в спаме!")
-            except:
-                pass
+            self.bot.edits.submit(event, f"{config.ERROR_EMOJI} Ошибка в спаме!")
     
     async def cancel_mention_by_id(self, mention_id: str) -> bool:
         """Отменяет конкретное упоминание или спам по ID
@@ -287,76 +274,50 @@ class MentionHandler:
         Returns:
             bool: True если упоминание/спам был найден и отменен, иначе False
         """
-        # Проверяем в обычных упоминаниях
-        if mention_id in self.active_mentions:
-            task = self.active_mentions[mention_id]
-            task.cancel()
-            del self.active_mentions[mention_id]
-            self.bot.storage.remove_mention(mention_id)
+        job = self.bot.jobs.get(mention_id)
+        if job is None or job.kind not in (JobKind.MENTION, JobKind.SPAM):
+            return False
+        
+        self.bot.jobs.pop(mention_id)
+        job.cancel()
+        await self.bot.storage.remove_mention(mention_id)
+        if job.kind == JobKind.MENTION:
             logger.info(f"Упоминание {mention_id} было отменено по запросу")
-            return True
-            
-        # Проверяем в спаме
-        if mention_id in self.active_spam:
-            task = self.active_spam[mention_id]
-            task.cancel()
-            del self.active_spam[mention_id]
-            self.bot.storage.remove_mention(mention_id)
+        else:
             logger.info(f"Спам {mention_id} был отменен по запросу")
-            return True
-            
-        return False
+        return True
     
     async def cancel_mentions(self) -> int:
         """Отменяет все активные упоминания"""
         cancelled_count = 0
         
-        # Отменяем упоминания
-        for mention_id, task in list(self.active_mentions.items()):
-            task.cancel()
-            cancelled_count += 1
-        
-        # Отменяем спам
-        for spam_id, task in list(self.active_spam.items()):
-            task.cancel()
+        # Отменяем упоминания и спам
+        for job in self.get_active_mentions():
+            self.bot.jobs.pop(job.id)
+            job.cancel()
             cancelled_count += 1
         
-        self.active_mentions.clear()
-        self.active_spam.clear()
-        self.bot.storage.clear_mentions()
+        await self.bot.storage.clear_mentions()
         
         return cancelled_count
     
-    async def get_active_mentions(self) -> List[dict]:
-        """Возвращает список активных упоминаний и спама"""
-        mentions = []
-        
-        # Активные упоминания
-        for mention_id in self.active_mentions.keys():
-            mention_data = self.bot.storage.get_mention(mention_id)
-            if mention_data:
-                mentions.append(mention_data)
-        
-        # Активный спам
-        for spam_id in self.active_spam.keys():
-            spam_data = self.bot.storage.get_mention(spam_id)
-            if spam_data:
-                mentions.append(spam_data)
-        
-        return mentions
+    def get_active_mentions(self) -> List[Job]:
+        """Возвращает список активных упоминаний, затем спама (без чтения хранилища)"""
+        return self.bot.jobs.of_kind(JobKind.MENTION, JobKind.SPAM)
     
     async def restore_mentions(self):
         """Восстанавливает упоминания после перезапуска бота"""
         try:
-            saved_mentions = self.bot.storage.get_all_mentions()
+            saved_mentions = await self.bot.storage.get_all_mentions()
             
             for mention_data in saved_mentions:
                 # Для упоминаний и спама не восстанавливаем состояние
                 # так как они должны выполняться быстро
                 # Просто удаляем из хранилища
+                # (кроме уже созданных после запуска: они есть в реестре и выполняются)
                 mention_id = mention_data.get('id')
-                if mention_id:
-                    self.bot.storage.remove_mention(mention_id)
+                if mention_id and mention_id not in self.bot.jobs:
+                    await self.bot.storage.remove_mention(mention_id)
                     logger.info(f"Удалено неактивное упоминание/спам {mention_id}")
         
         except Exception as e:
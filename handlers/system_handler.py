@@ -3,16 +3,49 @@
 
 import asyncio
 import logging
+import math
+import os
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from telethon import TelegramClient
 
+from utils.jobs import JobKind
 from utils.json_storage import JsonStorage
 from config import config
 
 logger = logging.getLogger(__name__)
 
+# Подкоманды /cancel и виды задач, которые они отменяют (None - все виды)
+CANCEL_TYPES = {
+    'timer': (JobKind.TIMER, JobKind.COUNTDOWN, JobKind.CYCLE),
+    'wake': (JobKind.ALARM, JobKind.REMINDER),
+    'mention': (JobKind.MENTION, JobKind.SPAM),
+    'all': None,
+    'chat': None,
+}
+
+# Разделы /list: виды задач, заголовок, текст пустого раздела, сколько задач показывать
+LIST_SECTIONS = {
+    'timers': ((JobKind.TIMER, JobKind.COUNTDOWN, JobKind.CYCLE), "⏰ **Активные таймеры", "⏰ Активных таймеров нет", 5),
+    'wake': ((JobKind.ALARM, JobKind.REMINDER), "🔔 **Будильники и напоминания", "🔔 Активных будильников нет", 5),
+    'mention': ((JobKind.MENTION, JobKind.SPAM), "👤 **Активные упоминания/спам", "👤 Активных упоминаний нет", 3),
+}
+
+# Размер страницы /list page и максимум для /list next N
+LIST_PAGE_SIZE = 10
+LIST_NEXT_MAX = 50
+
+JOB_NAMES = {
+    JobKind.TIMER: 'таймер',
+    JobKind.COUNTDOWN: 'отсчет',
+    JobKind.ALARM: 'будильник',
+    JobKind.REMINDER: 'напоминание',
+    JobKind.MENTION: 'упоминания',
+    JobKind.SPAM: 'спам',
+    JobKind.CYCLE: 'цикл',
+}
+
 class SystemHandler:
     def __init__(self, bot, sender_client=None):
         self.bot = bot
@@ -21,119 +54,36 @@ class SystemHandler:
     async def handle_cancel(self, event):
         """Обработка команды /cancel"""
         try:
-            self.bot.storage.increment_command_usage('cancel')
+            await self.bot.storage.increment_command_usage('cancel')
+            await self._wait_restored(event)
             
             cancel_type = event.pattern_match.group(1).strip().lower()
             target_id = event.pattern_match.group(2)
             
-            if target_id:  # Если указан ID для отмены
-                result = None
-                if cancel_type == 'timer':
-                    # Пытаемся найти таймер по номеру из списка
-                    try:
-                        # Получаем список активных таймеров
-                        timers = await self.bot.timer_handler.get_active_timers()
-                        
-                        # Пробуем преобразовать введенный ID в число (индекс в списке)
-                        try:
-                            index = int(target_id) - 1  # Пользователь вводит начиная с 1
-                            if 0 <= index < len(timers):
-                                # Находим таймер по индексу
-                                timer_to_cancel = timers[index]
-                                result = await self.bot.timer_handler.cancel_timer_by_id(timer_to_cancel['id'])
-                            else:
-                                await event.edit(f"{config.ERROR_EMOJI} Неверный номер таймера. Используйте /list timers для просмотра активных таймеров")
-                                return
-                        except ValueError:
-                            # Если введен не числовой ID, ищем по полному ID
-                            found = False
-                            for timer in timers:
-                                if timer.get('id') == target_id:
-                                    result = await self.bot.timer_handler.cancel_timer_by_id(timer['id'])
-                                    found = True
-                                    break
-                            if not found:
-                                await event.edit(f"{config.ERROR_EMOJI} Не найден таймер с ID: {target_id}")
-                                return
-                    except Exception as e:
-                        logger.error(f"Ошибка при отмене таймера: {e}")
-                        await event.edit(f"{config.ERROR_EMOJI} Произошла ошибка при отмене таймера")
-                        return
-                        
-                elif cancel_type == 'wake':
-                    # Обработка отмены будильников/напоминаний по номеру
-                    try:
-                        alarms = await self.bot.wake_handler.get_active_alarms()
-                        reminders = await self.bot.wake_handler.get_active_reminders()
-                        all_wake = alarms + reminders
-                        
-                        try:
-                            index = int(target_id) - 1
-                            if 0 <= index < len(all_wake):
-                                item = all_wake[index]
-                                if index < len(alarms):
-                                    result = await self.bot.wake_handler.cancel_alarm_by_id(item['id'])
-                                else:
-                                    result = await self.bot.wake_handler.cancel_reminder_by_id(item['id'])
-                            else:
-                                await event.edit(f"{config.ERROR_EMOJI} Неверный номер. Используйте /list wake для просмотра активных будильников и напоминаний")
-                                return
-                        except ValueError:
-                            # Если введен не числовой ID, ищем по полному ID
-                            found = False
-                            for item in all_wake:
-                                if item.get('id') == target_id:
-                                    if item in alarms:
-                                        result = await self.bot.wake_handler.cancel_alarm_by_id(item['id'])
-                                    else:
-                                        result = await self.bot.wake_handler.cancel_reminder_by_id(item['id'])
-                                    found = True
-                                    break
-                            if not found:
-                                await event.edit(f"{config.ERROR_EMOJI} Не найден будильник/напоминание с ID: {target_id}")
-                                return
-                    except Exception as e:
-                        logger.error(f"Ошибка при отмене будильника/напоминания: {e}")
-                        await event.edit(f"{config.ERROR_EMOJI} Произошла ошибка при отмене")
-                        return
-                        
-                elif cancel_type == 'mention':
-                    # Обработка отмены упоминаний/спама по номеру
-                    try:
-                        mentions = await self.bot.mention_handler.get_active_mentions()
-                        
-                        try:
-                            index = int(target_id) - 1
-                            if 0 <= index < len(mentions):
-                                mention = mentions[index]
-                                result = await self.bot.mention_handler.cancel_mention_by_id(mention['id'])
-                            else:
-                                await event.edit(f"{config.ERROR_EMOJI} Неверный номер. Используйте /list mention для просмотра активных упоминаний")
-                                return
-                        except ValueError:
-                            # Если введен не числовой ID, ищем по полному ID
-                            found = False
-                            for mention in mentions:
-                                if mention.get('id') == target_id:
-                                    result = await self.bot.mention_handler.cancel_mention_by_id(mention['id'])
-                                    found = True
-                                    break
-                            if not found:
-                                await event.edit(f"{config.ERROR_EMOJI} Не найдено упоминание с ID: {target_id}")
-                                return
-                    except Exception as e:
-                        logger.error(f"Ошибка при отмене упоминания: {e}")
-                        await event.edit(f"{config.ERROR_EMOJI} Произошла ошибка при отмене упоминания")
-                        return
-                        
-                else:
-                    await event.edit(f"{config.ERROR_EMOJI} Отмена по номеру доступна только для: timer, wake, mention")
+            if target_id or cancel_type not in CANCEL_TYPES:
+                # /cancel <id> или /cancel timer <id>: прямой поиск в реестре по id
+                job_key = target_id or cancel_type
+                kinds = CANCEL_TYPES.get(cancel_type) if target_id else None
+                job = await self._resolve(job_key)
+                if job is None or (kinds and job.kind not in kinds):
+                    await event.edit(f"{config.ERROR_EMOJI} Не найдена задача с ID: {job_key}. Используйте /list")
                     return
                 
-                if result:
-                    await event.edit(f"{config.SUCCESS_EMOJI} Успешно отменено: {cancel_type} {target_id}")
+                if await self._cancel_job(job):
+                    await event.edit(f"{config.SUCCESS_EMOJI} Успешно отменено: {JOB_NAMES[job.kind]} {job.short_id}")
                 else:
-                    await event.edit(f"{config.ERROR_EMOJI} Не удалось отменить {cancel_type} с номером: {target_id}")
+                    await event.edit(f"{config.ERROR_EMOJI} Не удалось отменить задачу {job_key}")
+                return
+            
+            if cancel_type == 'chat':
+                # Все задачи текущего чата по индексу чата
+                cancelled_count = 0
+                for job in self.bot.jobs.in_chat(event.chat_id):
+                    if await self._cancel_job(job):
+                        cancelled_count += 1
+                cancelled_count += await self.bot.wake_handler.cancel_far_in_chat(event.chat_id)
+                await event.edit(f"{config.SUCCESS_EMOJI} Отменено задач в этом чате: {cancelled_count}")
+                logger.info(f"Отменено {cancelled_count} задач в чате {event.chat_id}")
                 return
                 
             # Стандартная отмена (всех таймеров/будильников/упоминаний)
@@ -172,9 +122,6 @@ class SystemHandler:
                 """.strip()
                 
                 await event.edit(message)
-            else:
-                await event.edit(f"{config.ERROR_EMOJI} Неизвестный тип: {cancel_type}")
-                return
             
             logger.info(f"Отменено {cancelled_count} задач типа {cancel_type}")
             
@@ -182,105 +129,241 @@ class SystemHandler:
             logger.error(f"Ошибка в handle_cancel: {e}")
             await event.edit(f"{config.ERROR_EMOJI} Ошибка при отмене!")
     
-    async def handle_list(self, event):
-        """Обработка команды /list"""
+    async def _wait_restored(self, event):
+        """Ждет восстановления задач после запуска, чтобы оно не вернуло отмененное или измененное"""
+        if not self.bot.restored.is_set():
+            await event.edit(f"{config.INFO_EMOJI} Задачи еще восстанавливаются после запуска, команда выполнится следом...")
+            await self.bot.restored.wait()
+    
+    async def _resolve(self, job_key: str):
+        """Задача по короткому или полному id: из реестра, иначе дальняя из хранилища"""
+        return self.bot.jobs.resolve(job_key) or await self.bot.wake_handler.load_far(job_key)
+    
+    async def _cancel_job(self, job) -> bool:
+        """Отменяет задачу реестра через обработчик ее вида"""
+        if job.kind in (JobKind.TIMER, JobKind.COUNTDOWN, JobKind.CYCLE):
+            return await self.bot.timer_handler.cancel_timer_by_id(job.id)
+        if job.kind == JobKind.ALARM:
+            return await self.bot.wake_handler.cancel_alarm_by_id(job.id)
+        if job.kind == JobKind.REMINDER:
+            return await self.bot.wake_handler.cancel_reminder_by_id(job.id)
+        return await self.bot.mention_handler.cancel_mention_by_id(job.id)
+    
+    def _job_handler(self, job):
+        """Обработчик, умеющий ставить задачу на паузу и продлевать ее (None - не умеет)"""
+        if job.kind in (JobKind.TIMER, JobKind.CYCLE):
+            return self.bot.timer_handler
+        if job.kind in (JobKind.ALARM, JobKind.REMINDER):
+            return self.bot.wake_handler
+        return None
+    
+    async def _find_controllable(self, event, job_key: str):
+        """Задача для /pause, /resume и /extend или None (ошибка уже показана)"""
+        job = await self._resolve(job_key)
+        if job is None:
+            await event.edit(f"{config.ERROR_EMOJI} Не найдена задача с ID: {job_key}. Используйте /list")
+            return None
+        if self._job_handler(job) is None:
+            await event.edit(f"{config.ERROR_EMOJI} {JOB_NAMES[job.kind].capitalize()} нельзя приостановить или продлить")
+            return None
+        return job
+    
+    async def handle_pause(self, event):
+        """Обработка команды /pause <id>"""
         try:
-            self.bot.storage.increment_command_usage('list')
-            
-            list_type = 'all'
-            match = event.pattern_match.group(1)
-            if match:
-                list_type = match.strip().lower()
-            
-            message_parts = []
-            
-            if list_type in ['timers', 'all']:
-                timers = await self.bot.timer_handler.get_active_timers()
-                if timers:
-                    message_parts.append(f"⏰ **Активные таймеры ({len(timers)}):**")
-                    for i, timer in enumerate(timers[:5], 1):  # Показываем максимум 5
-                        start_time = datetime.fromisoformat(timer['start_time'])
-                        elapsed = (datetime.now() - start_time).total_seconds()
-                        remaining = timer['duration'] - elapsed
-                    
-                        if remaining > 0:
-                            remaining_str = self._format_time(int(remaining))
-                            message_parts.append(f"  {i}. Осталось {remaining_str}")
-                        else:
-                            message_parts.append(f"  {i}. Должен был закончиться")
-                else:
-                    if list_type == 'timers':
-                        message_parts.append("⏰ Активных таймеров нет")
+            await self.bot.storage.increment_command_usage('pause')
+            await self._wait_restored(event)
+            job = await self._find_controllable(event, event.pattern_match.group(1))
+            if job is None:
+                return
+            remaining = await self._job_handler(job).pause_job(job)
+            await event.edit(
+                f"⏸ На паузе: {JOB_NAMES[job.kind]} {job.short_id}, осталось {self._format_time(int(remaining))}"
+            )
+        except ValueError as e:
+            await event.edit(f"{config.ERROR_EMOJI} Не удалось поставить на паузу: {e}")
+        except Exception as e:
+            logger.error(f"Ошибка в handle_pause: {e}")
+            await event.edit(f"{config.ERROR_EMOJI} Ошибка при постановке на паузу!")
+    
+    async def handle_resume(self, event):
+        """Обработка команды /resume <id>"""
+        try:
+            await self.bot.storage.increment_command_usage('resume')
+            await self._wait_restored(event)
+            job = await self._find_controllable(event, event.pattern_match.group(1))
+            if job is None:
+                return
+            remaining = await self._job_handler(job).resume_job(job)
+            await event.edit(
+                f"▶️ Продолжено: {JOB_NAMES[job.kind]} {job.short_id}, осталось {self._format_time(int(remaining))}"
+            )
+        except ValueError as e:
+            await event.edit(f"{config.ERROR_EMOJI} Не удалось продолжить: {e}")
+        except Exception as e:
+            logger.error(f"Ошибка в handle_resume: {e}")
+            await event.edit(f"{config.ERROR_EMOJI} Ошибка при продолжении!")
+    
+    async def handle_extend(self, event):
+        """Обработка команды /extend <id> 5m"""
+        try:
+            await self.bot.storage.increment_command_usage('extend')
+            job_key, time_str = event.pattern_match.group(1), event.pattern_match.group(2)
+            duration_td = self.bot.time_parser.parse_duration(time_str)
+            if duration_td is None or duration_td.total_seconds() <= 0:
+                await event.edit(f"{config.ERROR_EMOJI} Неверный или нулевой формат времени! Используйте: 30s, 5m, 1h")
+                return
             
-            if list_type in ['wake', 'all']:
-                alarms = await self.bot.wake_handler.get_active_alarms()
-                reminders = await self.bot.wake_handler.get_active_reminders()
-                
-                total_wake = len(alarms) + len(reminders)
-                if total_wake > 0:
-                    message_parts.append(f"\n🔔 **Будильники и напоминания ({total_wake}):**")
-                    
-                    # Будильники
-                    for i, alarm in enumerate(alarms[:3], 1):
-                        start_time = datetime.fromisoformat(alarm['start_time'])
-                        elapsed = (datetime.now() - start_time).total_seconds()
-                        remaining = alarm['duration'] - elapsed
-                        
-                        if remaining > 0:
-                            remaining_str = self._format_time(int(remaining))
-                            message_parts.append(f"  {i}. 🔔 Будильник через {remaining_str}")
-                    
-                    # Напоминания
-                    for i, reminder in enumerate(reminders[:3], len(alarms) + 1):
-                        start_time = datetime.fromisoformat(reminder['start_time'])
-                        elapsed = (datetime.now() - start_time).total_seconds()
-                        remaining = reminder['duration'] - elapsed
-                        
-                        if remaining > 0:
-                            remaining_str = self._format_time(int(remaining))
-                            text = reminder.get('text', 'Напоминание')
-                            short_text = text[:30] + "..." if len(text) > 30 else text
-                            message_parts.append(f"  {i}. 💭 {short_text} через {remaining_str}")
-                else:
-                    if list_type == 'wake':
-                        message_parts.append("🔔 Активных будильников нет")
-            
-            if list_type in ['mention', 'all']:
-                mentions = await self.bot.mention_handler.get_active_mentions()
-                if mentions:
-                    message_parts.append(f"\n👤 **Активные упоминания/спам ({len(mentions)}):**")
-                    for i, mention in enumerate(mentions[:3], 1):
-                        if mention['type'] == 'mention':
-                            username = mention.get('username', 'пользователь')
-                            count = mention.get('count', 0)
-                            message_parts.append(f"  {i}. Упоминания {username} ({count} раз)")
-                        else:  # spam
-                            text = mention.get('text', 'текст')
-                            short_text = text[:20] + "..." if len(text) > 20 else text
-                            count = mention.get('count', 0)
-                            message_parts.append(f"  {i}. Спам \"{short_text}\" ({count} раз)")
+            await self._wait_restored(event)
+            job = await self._find_controllable(event, job_key)
+            if job is None:
+                return
+            remaining = await self._job_handler(job).extend_job(job, duration_td.total_seconds())
+            await event.edit(
+                f"{config.SUCCESS_EMOJI} Продлено: {JOB_NAMES[job.kind]} {job.short_id}, "
+                f"осталось {self._format_time(int(remaining))}"
+            )
+        except ValueError as e:
+            await event.edit(f"{config.ERROR_EMOJI} Не удалось продлить: {e}")
+        except Exception as e:
+            logger.error(f"Ошибка в handle_extend: {e}")
+            await event.edit(f"{config.ERROR_EMOJI} Ошибка при продлении!")
+    
+    async def handle_list(self, event):
+        """Обработка команды /list
+        
+        /list [timers|wake|mention|all] - задачи по видам, /list next [N] -
+        ближайшие N задач, /list page N - все задачи постранично. Слово here
+        ограничивает любой вариант текущим чатом. Задачи берутся из индекса
+        реестра по времени срабатывания; дальние будильники, которые после
+        перезапуска есть только в хранилище, лишь подсчитываются.
+        """
+        try:
+            await self.bot.storage.increment_command_usage('list')
+            
+            args = (event.pattern_match.group(1) or '').lower().split()
+            chat_id = None
+            if 'here' in args:
+                args.remove('here')
+                chat_id = event.chat_id
+            list_type = args[0] if args else ('page' if chat_id is not None else 'all')
+            number = args[1] if len(args) > 1 else None
+            now = self.bot.scheduler.time()
+            
+            try:
+                if list_type == 'next':
+                    message = self._list_next(chat_id, int(number) if number else LIST_PAGE_SIZE, now)
+                elif list_type == 'page':
+                    message = self._list_page(chat_id, int(number) if number else 1, now)
+                elif list_type in LIST_SECTIONS or list_type == 'all':
+                    message = self._list_sections(list_type, chat_id, now)
                 else:
-                    if list_type == 'mention':
-                        message_parts.append("👤 Активных упоминаний нет")
+                    raise ValueError(list_type)
+            except ValueError:
+                await event.edit(
+                    f"{config.ERROR_EMOJI} Используйте: /list [timers|wake|mention|all], "
+                    f"/list next [N], /list page N (+ here для текущего чата)"
+                )
+                return
             
-            if not message_parts:
-                message = f"{config.INFO_EMOJI} Активных задач нет"
-            else:
-                message = "\n".join(message_parts)
-                
-                # Добавляем подсказку если список обрезан
-                total_items = len(message_parts) - message_parts.count("")
-                if total_items > 10:  # Приблизительная оценка
-                    message += f"\n\n{config.INFO_EMOJI} Показаны только первые элементы"
+            far_count = await self.bot.wake_handler.count_far(chat_id)
+            if far_count:
+                message += f"\n\n🗓 И еще дальних будильников и напоминаний: {far_count} (в списке появятся ближе к сроку)"
             
             await event.edit(message)
             
-            logger.info(f"Показан список: {list_type}")
+            logger.info(f"Показан список: {list_type}{' (чат)' if chat_id is not None else ''}")
             
         except Exception as e:
             logger.error(f"Ошибка в handle_list: {e}")
             await event.edit(f"{config.ERROR_EMOJI} Ошибка при получении списка!")
     
+    def _list_sections(self, list_type: str, chat_id: Optional[int], now: float) -> str:
+        """Задачи по видам, в каждом разделе - ближайшие по времени срабатывания"""
+        message_parts = []
+        for name, (kinds, title, empty, limit) in LIST_SECTIONS.items():
+            if list_type not in (name, 'all'):
+                continue
+            if chat_id is None:
+                total = self.bot.jobs.count(*kinds)
+                jobs = self.bot.jobs.upcoming(kinds=kinds, limit=limit)
+            else:
+                jobs = self.bot.jobs.upcoming(chat_id=chat_id, kinds=kinds)
+                total = len(jobs)
+                jobs = jobs[:limit]
+            
+            if jobs:
+                lines = [f"{title} ({total}):**"]
+                lines.extend(self._job_line(job, now) for job in jobs)
+                if total > len(jobs):
+                    lines.append(f"  … и еще {total - len(jobs)}, см. /list page")
+                message_parts.append("\n".join(lines))
+            elif list_type == name:
+                message_parts.append(empty)
+        
+        if not message_parts:
+            return f"{config.INFO_EMOJI} Активных задач нет"
+        return "\n\n".join(message_parts)
+    
+    def _list_next(self, chat_id: Optional[int], count: int, now: float) -> str:
+        """Ближайшие count задач"""
+        count = max(1, min(count, LIST_NEXT_MAX))
+        jobs = self.bot.jobs.upcoming(chat_id=chat_id, limit=count)
+        if not jobs:
+            return f"{config.INFO_EMOJI} Активных задач нет"
+        where = " в этом чате" if chat_id is not None else ""
+        lines = [f"⏭ **Ближайшие задачи{where}:**"]
+        lines.extend(self._job_line(job, now) for job in jobs)
+        return "\n".join(lines)
+    
+    def _list_page(self, chat_id: Optional[int], page: int, now: float) -> str:
+        """Страница всех задач в порядке срабатывания"""
+        total = len(self.bot.jobs) if chat_id is None else self.bot.jobs.count_in_chat(chat_id)
+        if not total:
+            return f"{config.INFO_EMOJI} Активных задач нет"
+        pages = math.ceil(total / LIST_PAGE_SIZE)
+        if not 1 <= page <= pages:
+            return f"{config.ERROR_EMOJI} Нет страницы {page}, всего страниц: {pages}"
+        
+        jobs = self.bot.jobs.upcoming(chat_id=chat_id, offset=(page - 1) * LIST_PAGE_SIZE, limit=LIST_PAGE_SIZE)
+        where = " в этом чате" if chat_id is not None else ""
+        lines = [f"📋 **Задачи{where} ({total}), страница {page} из {pages}:**"]
+        lines.extend(self._job_line(job, now) for job in jobs)
+        if page < pages:
+            here = "here " if chat_id is not None else ""
+            lines.append(f"\n{config.INFO_EMOJI} Дальше: `/list {here}page {page + 1}`")
+        return "\n".join(lines)
+    
+    def _job_line(self, job, now: float) -> str:
+        """Строка задачи в /list: короткий id, описание и время до срабатывания"""
+        if job.kind == JobKind.TIMER:
+            what = f"{config.TIMER_EMOJI} Таймер"
+        elif job.kind == JobKind.COUNTDOWN:
+            what = "⏱ Отсчет"
+        elif job.kind == JobKind.CYCLE:
+            what = f"🍅 Цикл {job.text}, фаза {job.phase + 1}/{len(job.phases) * job.count},"
+        elif job.kind == JobKind.ALARM:
+            what = "🔔 Будильник"
+        elif job.kind == JobKind.REMINDER:
+            text = job.text or 'Напоминание'
+            short_text = text[:30] + "..." if len(text) > 30 else text
+            what = f"{'🔁' if job.rule else '💭'} {short_text}"
+        elif job.kind == JobKind.MENTION:
+            return f"  `{job.short_id}` 👤 Упоминания {job.target or 'пользователь'} ({job.count} раз)"
+        else:  # spam
+            text = job.text or 'текст'
+            short_text = text[:20] + "..." if len(text) > 20 else text
+            return f"  `{job.short_id}` 💬 Спам \"{short_text}\" ({job.count} раз)"
+        
+        remaining = job.remaining(now)
+        if job.paused is not None:
+            when = f"⏸ на паузе, осталось {self._format_time(int(remaining))}"
+        elif remaining > 0:
+            when = f"через {self._format_time(int(remaining))}"
+        else:
+            when = "срабатывает"
+        return f"  `{job.short_id}` {what} {when}"
+    
     def _format_time(self, seconds: int) -> str:
         """Форматирует время в читаемый вид"""
         if seconds < 60:
@@ -289,6 +372,10 @@ class SystemHandler:
             minutes = seconds // 60
             secs = seconds % 60
             return f"{minutes}м {secs}с" if secs > 0 else f"{minutes}м"
+        elif seconds >= 86400:
+            days = seconds // 86400
+            hours = (seconds % 86400) // 3600
+            return f"{days}д {hours}ч" if hours > 0 else f"{days}д"
         else:
             hours = seconds // 3600
             minutes = (seconds % 3600) // 60
@@ -300,7 +387,7 @@ class SystemHandler:
     async def handle_ping(self, event):
         """Обработка команды /ping"""
         try:
-            self.bot.storage.increment_command_usage('ping')
+            await self.bot.storage.increment_command_usage('ping')
             
             start_time = time.time()
             
@@ -322,7 +409,7 @@ class SystemHandler:
     async def handle_uptime(self, event, start_time: datetime):
         """Обработка команды /uptime"""
         try:
-            self.bot.storage.increment_command_usage('uptime')
+            await self.bot.storage.increment_command_usage('uptime')
             
             uptime = datetime.now() - start_time
             days = uptime.days
@@ -360,9 +447,9 @@ class SystemHandler:
     async def handle_stats(self, event):
         """Обработка команды /stats"""
         try:
-            self.bot.storage.increment_command_usage('stats')
+            await self.bot.storage.increment_command_usage('stats')
             
-            stats = self.bot.storage.get_stats()
+            stats = await self.bot.storage.get_stats()
             
             # Топ команд
             commands = stats.get('commands_used', {})
@@ -382,6 +469,29 @@ class SystemHandler:
             alarms_created = stats.get('alarms_created', 0)
             mentions_created = stats.get('mentions_created', 0)
             
+            # Экономия записей на диск за счет буфера статистики
+            buffer_metrics = self.bot.storage.stats_buffer.get_metrics()
+            commit_metrics = self.bot.storage.get_commit_metrics()
+            scheduler_metrics = self.bot.scheduler.get_metrics()
+            edit_metrics = self.bot.edits.get_metrics()
+            send_metrics = self.bot.fire_sends.get_metrics()
+            reminder_line = ""
+            if self.bot.reminder_scheduler is not self.bot.scheduler:
+                wheel_metrics = self.bot.reminder_scheduler.get_metrics()
+                reminder_line = (
+                    f"\n• Колесо будильников: ожидают {wheel_metrics['pending']}, "
+                    f"сработало {wheel_metrics['fired']}, отменено {wheel_metrics['cancelled']}"
+                )
+            
+            # Самые загруженные полосы (чаты): очередь и ожидание запуска
+            lane_lines = ""
+            for lane in self.bot.scheduler.get_lane_metrics(3):
+                lane_name = "общая" if lane['lane'] is None else lane['lane']
+                lane_lines += (
+                    f"\n  `{lane_name}`: в очереди {lane['depth']} (макс. {lane['max_depth']}), "
+                    f"выполняются {lane['running']}, ожидание {lane['avg_wait'] * 1000:.0f}/{lane['max_wait'] * 1000:.0f} мс"
+                )
+            
             # Время последней команды
             last_command = stats.get('last_command_time')
             if last_command:
@@ -403,6 +513,27 @@ class SystemHandler:
 {chr(10).join(top_commands_str)}
 
 🕐 **Последняя команда:** {last_command_str}
+
+💾 **Запись статистики:**
+• Изменений: {buffer_metrics['increments']}, записей на диск: {buffer_metrics['flushes']}
+• Сэкономлено: {buffer_metrics['writes_saved']} ({buffer_metrics['writes_saved_per_sec']:.2f}/с)
+• Групповая фиксация: {commit_metrics['writes']} изменений за {commit_metrics['commits']} fsync
+
+⏱ **Планировщик:**
+• Ожидают: {scheduler_metrics['pending']}, выполняются: {scheduler_metrics['running']}
+• Сработало: {scheduler_metrics['fired']}, отменено: {scheduler_metrics['cancelled']}
+• Макс. задержка срабатывания: {scheduler_metrics['max_lag'] * 1000:.0f} мс{reminder_line}
+• Чатов с наступившими задачами: {scheduler_metrics['lanes']}, ждут своей очереди: {scheduler_metrics['queued']}{lane_lines}
+
+✏️ **Правки сообщений:**
+• Отправлено: {edit_metrics['flushed']} из {edit_metrics['submitted']}
+• Заменено новыми: {edit_metrics['coalesced']}, без изменений: {edit_metrics['unchanged']}
+• FloodWait: {edit_metrics['flood_waits']}, ожидают: {edit_metrics['pending']}
+
+📨 **Отправка сработавших задач:**
+• Задач: {send_metrics['admitted']}, сообщений: {send_metrics['sent']}, ошибок: {send_metrics['failed']}
+• Первое сообщение: в среднем через {send_metrics['first_wait_avg']:.2f} с, максимум {send_metrics['first_wait_max']:.2f} с
+• FloodWait: {send_metrics['flood_waits']}, в очереди: {send_metrics['queued']} задач ({send_metrics['pending']} сообщений)
             """.strip()
             
             await event.edit(message)
@@ -416,7 +547,7 @@ class SystemHandler:
     async def handle_help(self, event):
         """Обработка команды /help"""
         try:
-            self.bot.storage.increment_command_usage('help')
+            await self.bot.storage.increment_command_usage('help')
             
             help_text = f"""
 🤖 **Персональный Telegram Бот**
@@ -424,6 +555,7 @@ class SystemHandler:
 ⏰ **Таймеры:**
 • `/timer 30s` - таймер с обратным отсчетом
 • `/timer 5m 100` - таймер + спам 100 сообщений
+• `/cycle 25m/5m x4` - цикл фаз (помодоро) одной задачей
 • `/countdown 60` - простой обратный отсчет
 
 🔔 **Будильники:**
@@ -473,16 +605,25 @@ class SystemHandler:
 • `/cancel wake <id>` - отменить конкретный будильник по ID
 • `/cancel mention` - отменить все упоминания
 • `/cancel mention <id>` - отменить конкретное упоминание по ID
+• `/cancel <id>` - отменить задачу по короткому ID из /list
+• `/cancel chat` - отменить все задачи в этом чате
 • `/cancel all` - отменить всё
+• `/pause <id>` - поставить таймер, будильник или напоминание на паузу
+• `/resume <id>` - продолжить после паузы
+• `/extend <id> 5m` - продлить таймер или отложить будильник/напоминание
 • `/clear 10` - удалить 10 своих сообщений
 • `/clear sender 10` - удалить 10 сообщений от бота-отправщика
 • `/clear sender all` - удалить все сообщения от бота-отправщика
 • `/clear user 10` - удалить 10 сообщений пользователя (ответом на сообщение)
 • `/clear chat` - очистить весь чат (нужны права администратора)
-• `/list all` - список активных задач
+• `/list all` - список активных задач (`timers`, `wake`, `mention` - по видам)
+• `/list next 5` - ближайшие 5 задач по времени срабатывания
+• `/list page 2` - все задачи постранично
+• `/list here` - задачи этого чата (here работает и с next/page)
 • `/ping` - проверка скорости
 • `/uptime` - время работы
 • `/stats` - статистика команд
+• `/export` - читаемая выгрузка данных в JSON
 • `/help` - эта справка
 • `/stop` - остановка бота
 
@@ -630,7 +771,7 @@ class SystemHandler:
     async def handle_clear(self, event):
         """Обработка команды /clear {количество}"""
         try:
-            self.bot.storage.increment_command_usage('clear')
+            await self.bot.storage.increment_command_usage('clear')
             
             match = event.pattern_match.group(1)
             if not match or not match.strip().isdigit():
@@ -676,17 +817,62 @@ class SystemHandler:
             # Не можем редактировать, так как сообщение может быть уже удалено
             await self.bot.client.send_message(event.chat_id, f"{config.ERROR_EMOJI} Ошибка при удалении сообщений!")
 
+    async def handle_export(self, event):
+        """Обработка команды /export (читаемая выгрузка данных)"""
+        try:
+            await self.bot.storage.increment_command_usage('export')
+            
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            export_dir = os.path.join(config.EXPORT_DIR, f"export_{timestamp}")
+            paths = await self.bot.storage.export_pretty(export_dir)
+            
+            await event.edit(f"{config.SUCCESS_EMOJI} Данные выгружены ({len(paths)} файлов) в папку: `{export_dir}`")
+            logger.info(f"Данные выгружены в {export_dir}")
+            
+        except Exception as e:
+            logger.error(f"Ошибка в handle_export: {e}")
+            await event.edit(f"{config.ERROR_EMOJI} Ошибка при выгрузке данных!")
+
     async def handle_backup(self, event):
-        """Обработка команды /backup (скрытая команда)"""
+        """Обработка команды /backup [list | restore <id>] (скрытая команда)"""
         try:
-            backup_dir = await self.bot.storage.create_backup()
+            action = event.pattern_match.group(1)
+            backup = self.bot.backup
+            
+            if action == 'list':
+                snapshots = await backup.list()
+                if not snapshots:
+                    await event.edit("📦 Резервных копий пока нет")
+                    return
+                lines = ["📦 **Резервные копии:**", ""]
+                for manifest in snapshots[-10:]:
+                    size = sum(entry['size'] for entry in manifest['files'].values())
+                    lines.append(f"• `{manifest['id']}` ({size / 1024:.1f} KB)")
+                await event.edit("\n".join(lines))
+                return
+            
+            if action == 'restore':
+                snapshot_id = event.pattern_match.group(2)
+                await self._wait_restored(event)
+                manifest = await self.bot.restore_backup(snapshot_id)
+                await event.edit(
+                    f"{config.SUCCESS_EMOJI} Данные восстановлены из копии `{manifest['id']}`, "
+                    f"задачи из нее запущены ({len(self.bot.jobs)})"
+                )
+                return
             
-            if backup_dir:
-                await event.edit(f"{config.SUCCESS_EMOJI} Резервная копия создана в папке: `{backup_dir}`")
-                logger.info(f"Создана резервная копия: {backup_dir}")
+            manifest = await backup.create()
+            if manifest:
+                await event.edit(
+                    f"{config.SUCCESS_EMOJI} Резервная копия `{manifest['id']}`: "
+                    f"новых объектов {manifest.get('new_objects', 0)} из {len(manifest['files'])}"
+                )
+                logger.info(f"Создана резервная копия: {manifest['id']}")
             else:
                 await event.edit(f"{config.ERROR_EMOJI} Ошибка создания резервной копии!")
                 
+        except FileNotFoundError as e:
+            await event.edit(f"{config.ERROR_EMOJI} {e}")
         except Exception as e:
             logger.error(f"Ошибка в handle_backup: {e}")
-            await event.edit(f"{config.ERROR_EMOJI} Ошибка при создании резервной копии!")
\ No newline at end of file
+            await event.edit(f"{config.ERROR_EMOJI} Ошибка при работе с резервными копиями!")
\ No newline at end of file
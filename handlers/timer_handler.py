@@ -3,21 +3,28 @@
 
 import asyncio
 import logging
+import math
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from telethon import TelegramClient
 from telethon.tl.types import Message
 
-from utils.json_storage import JsonStorage
+from utils.jobs import Job, JobKind
+from utils.json_storage import JsonStorage, job_fire_time
+from utils.message_ref import MessageRef
 from utils.time_parser import TimeParser
 from config import config
 
 logger = logging.getLogger(__name__)
 
+# Ограничения /cycle: фаз в одном круге и кругов
+MAX_CYCLE_PHASES = 10
+MAX_CYCLE_ROUNDS = 24
+
 class TimerHandler:
     def __init__(self, bot):
         self.bot = bot
-        self.active_timers: Dict[str, asyncio.Task] = {}
     
     async def handle_timer(self, event):
         """Обработка команды /timer"""
@@ -57,8 +64,14 @@ class TimerHandler:
             # Создаем уникальный ID для таймера
             timer_id = f"timer_{event.chat_id}_{event.id}_{datetime.now().timestamp()}"
             
+            job = self.bot.jobs.add(Job(
+                timer_id, JobKind.TIMER, event.chat_id, event.id,
+                self.bot.scheduler.time() + seconds, count=spam_count,
+            ))
+            
             # Сохраняем информацию о таймере
             timer_data = {
+                'short_id': job.short_id,
                 'id': timer_id,
                 'chat_id': event.chat_id,
                 'message_id': event.id,
@@ -68,12 +81,13 @@ class TimerHandler:
                 'type': 'timer'
             }
             
-            self.bot.storage.save_timer(timer_data)
+            await self.bot.storage.save_timer(timer_data)
             
             # Запускаем таймер
-            task = asyncio.create_task(self._run_timer(event, seconds, spam_count, timer_id))
-            self.active_timers[timer_id] = task
-            self.bot.storage.increment_timers_created()
+            job.handle = self.bot.scheduler.call_later(
+                0, self._run_timer, event, seconds, spam_count, timer_id, job_id=timer_id, lane=event.chat_id
+            )
+            await self.bot.storage.increment_timers_created()
             
             logger.info(f"Запущен таймер на {seconds} секунд с {spam_count} сообщениями")
             
@@ -81,41 +95,203 @@ class TimerHandler:
             logger.error(f"Ошибка в handle_timer: {e}")
             await event.edit(f"{config.ERROR_EMOJI} Ошибка при создании таймера!")
     
-    async def _run_timer(self, event, total_seconds: int, spam_count: int, timer_id: str):
-        """Запуск таймера с обратным отсчетом"""
+    async def handle_cycle(self, event):
+        """Обработка команды /cycle 25m/5m x4
+        
+        Вся последовательность - одна задача: одна запись в хранилище с
+        номером текущей фазы и одно сообщение, которое редактирует отсчет.
+        Переход к следующей фазе только переставляет дедлайн задачи.
+        """
         try:
-            original_time_str = self.bot.time_parser.seconds_to_string(total_seconds)
+            args = event.pattern_match.group(1).strip().split()
+            usage = f"{config.ERROR_EMOJI} Используйте: /cycle 25m/5m x4"
+            if not args or len(args) > 2:
+                await event.edit(usage)
+                return
             
-            # Обновляем сообщение на начальное
-            await event.edit(f"{config.TIMER_EMOJI} Запускаю таймер на {original_time_str}")
-            await asyncio.sleep(1)
+            phases = []
+            for part in args[0].split('/'):
+                duration_td = self.bot.time_parser.parse_duration(part)
+                if duration_td is None or duration_td.total_seconds() < 1:
+                    await event.edit(f"{config.ERROR_EMOJI} Неверная длительность фазы: {part}. Используйте: 30s, 5m, 1h")
+                    return
+                phases.append(int(duration_td.total_seconds()))
+            if len(phases) > MAX_CYCLE_PHASES:
+                await event.edit(f"{config.ERROR_EMOJI} Максимум фаз в цикле: {MAX_CYCLE_PHASES}")
+                return
             
-            # Обратный отсчет
-            remaining = total_seconds
-            last_update = 0
+            rounds = 1
+            if len(args) > 1:
+                try:
+                    rounds = int(args[1].lower().lstrip('x×'))
+                except ValueError:
+                    await event.edit(usage)
+                    return
+                if not 1 <= rounds <= MAX_CYCLE_ROUNDS:
+                    await event.edit(f"{config.ERROR_EMOJI} Количество кругов: от 1 до {MAX_CYCLE_ROUNDS}")
+                    return
             
-            while remaining > 0:
-                # Определяем интервал обновления (чаще в конце)
-                if remaining <= 10:
-                    update_interval = 1
-                elif remaining <= 60:
-                    update_interval = 5
-                elif remaining <= 300:  # 5 минут
-                    update_interval = 15
-                else:
-                    update_interval = 60
-                
-                # Обновляем сообщение только если прошел нужный интервал
-                if remaining != total_seconds and (last_update == 0 or last_update - remaining >= update_interval):
-                    time_str = self.bot.time_parser.seconds_to_string(remaining)
-                    await event.edit(f"{config.TIMER_EMOJI} Осталось {time_str}...")
-                    last_update = remaining
-                
-                await asyncio.sleep(1)
-                remaining -= 1
+            if sum(phases) * rounds > config.MAX_TIMER_SECONDS.total_seconds():
+                max_hours = int(config.MAX_TIMER_SECONDS.total_seconds() // 3600)
+                await event.edit(f"{config.ERROR_EMOJI} Максимальная длительность цикла: {max_hours} часов")
+                return
+            
+            cycle_id = f"cycle_{event.chat_id}_{event.id}_{datetime.now().timestamp()}"
+            spec = '/'.join(self.bot.time_parser.seconds_to_string(seconds) for seconds in phases)
+            if rounds > 1:
+                spec += f" x{rounds}"
             
-            # Таймер закончился
-            await event.edit(f"{config.SUCCESS_EMOJI} {config.DEFAULT_TIMER_END_TEXT}")
+            job = Job(
+                cycle_id, JobKind.CYCLE, event.chat_id, event.id,
+                self.bot.scheduler.time() + phases[0], count=rounds, text=spec,
+            )
+            job.phases = tuple(phases)
+            self.bot.jobs.add(job)
+            
+            await self.bot.storage.save_timer({
+                'short_id': job.short_id,
+                'id': cycle_id,
+                'chat_id': event.chat_id,
+                'message_id': event.id,
+                'start_time': datetime.now().isoformat(),
+                'duration': phases[0],
+                'fire_at': time.time() + phases[0],
+                'phases': phases,
+                'rounds': rounds,
+                'phase': 0,
+                'text': spec,
+                'type': 'cycle'
+            })
+            
+            job.handle = self.bot.scheduler.call_later(
+                0, self._run_timer, event, phases[0], 1, cycle_id, job_id=cycle_id, lane=event.chat_id
+            )
+            await self.bot.storage.increment_timers_created()
+            
+            logger.info(f"Запущен цикл {spec} ({len(phases) * rounds} фаз)")
+            
+        except Exception as e:
+            logger.error(f"Ошибка в handle_cycle: {e}")
+            await event.edit(f"{config.ERROR_EMOJI} Ошибка при создании цикла!")
+    
+    def _phase_label(self, job: Job) -> str:
+        """Фаза цикла для сообщения отсчета: 'фаза 2/8 (5м)'"""
+        total = len(job.phases) * job.count
+        duration = job.phases[job.phase % len(job.phases)]
+        return f"фаза {job.phase + 1}/{total} ({self.bot.time_parser.seconds_to_string(duration)})"
+    
+    def _countdown_text(self, job: Job, remaining: float) -> str:
+        time_str = self.bot.time_parser.seconds_to_string(remaining)
+        if job.kind == JobKind.CYCLE:
+            return f"🍅 Цикл `{job.short_id}`, {self._phase_label(job)}: осталось {time_str}..."
+        return f"{config.TIMER_EMOJI} Осталось {time_str}..."
+    
+    async def _next_phase(self, event, job: Job) -> None:
+        """Переводит цикл на следующую фазу: новый дедлайн и номер фазы в записи"""
+        job.phase += 1
+        duration = job.phases[job.phase % len(job.phases)]
+        self.bot.jobs.retime(job, self.bot.scheduler.time() + duration)
+        await self.bot.storage.update_fields('timers', job.id, {
+            'phase': job.phase, 'fire_at': time.time() + duration,
+        })
+        # Правка сообщения не присылает уведомление, поэтому о смене фазы - ответом
+        await event.reply(f"🔔 Цикл `{job.short_id}`: {self._phase_label(job)}")
+        self.bot.edits.submit(event, self._countdown_text(job, duration))
+        logger.info(f"Цикл {job.id}: {self._phase_label(job)}")
+    
+    async def _run_timer(self, event, total_seconds: float, spam_count: int, timer_id: str):
+        """Запуск таймера с обратным отсчетом
+        
+        Отсчет привязан к абсолютному монотонному дедлайну: каждое следующее
+        обновление планируется от реально оставшегося времени, поэтому
+        задержки редактирования не накапливаются. Между обновлениями таймер
+        не занимает корутину - в планировщике лежит только следующая точка.
+        Правки идут через общий регулятор (bot.edits): если чат не успевает,
+        промежуточные значения отсчета заменяются более свежими.
+        
+        Дедлайн хранится в записи реестра (job.deadline), а не в аргументах
+        точек отсчета, поэтому /pause, /resume и /extend только меняют его и
+        переставляют текущую точку в планировщике. Его ставит создание
+        задачи, а не первый запуск: ожидание в очереди чата входит в отсчет.
+        """
+        job = self.bot.jobs.get(timer_id)
+        if job is None:
+            return
+        if job.paused is not None:
+            # Поставлен на паузу до первого запуска: отсчет запустит /resume
+            job.handle = None
+            return
+        original_time_str = self.bot.time_parser.seconds_to_string(total_seconds)
+        
+        # Обновляем сообщение на начальное
+        if job.kind == JobKind.CYCLE:
+            self.bot.edits.submit(event, self._countdown_text(job, job.remaining(self.bot.scheduler.time())))
+        else:
+            self.bot.edits.submit(event, f"{config.TIMER_EMOJI} Запускаю таймер `{job.short_id}` на {original_time_str}")
+        self._schedule_tick(event, spam_count, timer_id)
+    
+    @staticmethod
+    def _update_interval(remaining: float) -> int:
+        """Интервал обновления отсчета (чаще в конце)"""
+        if remaining <= 10:
+            return 1
+        elif remaining <= 60:
+            return 5
+        elif remaining <= 300:  # 5 минут
+            return 15
+        return 60
+    
+    def _schedule_tick(self, event, spam_count: int, timer_id: str):
+        """Планирует следующее обновление отсчета или завершение таймера"""
+        job = self.bot.jobs.get(timer_id)
+        if job is None:
+            return
+        deadline = job.deadline
+        remaining = deadline - self.bot.scheduler.time()
+        # Следующая точка - ближайшее кратное интервалу значение остатка
+        interval = self._update_interval(remaining)
+        next_remaining = (math.ceil(remaining) - 1) // interval * interval
+        callback = self._timer_tick if next_remaining > 0 else self._finish_timer
+        
+        job.handle = self.bot.scheduler.call_at(
+            deadline - max(0, next_remaining), callback, event, spam_count, timer_id,
+            job_id=timer_id, on_cancel=lambda: self._timer_cancelled(event, timer_id), lane=job.chat_id,
+        )
+    
+    async def _timer_tick(self, event, spam_count: int, timer_id: str):
+        """Точка обновления отсчета"""
+        job = self.bot.jobs.get(timer_id)
+        if job is None:
+            return
+        if job.paused is not None:
+            # Поставлен на паузу, когда точка уже стояла в очереди на запуск
+            job.handle = None
+            return
+        remaining = job.remaining(self.bot.scheduler.time())
+        if remaining > 0:
+            # Неотправленное обновление регулятор заменит следующим, таймер не ждет
+            self.bot.edits.submit(event, self._countdown_text(job, remaining))
+        
+        self._schedule_tick(event, spam_count, timer_id)
+    
+    async def _finish_timer(self, event, spam_count: int, timer_id: str):
+        """Завершение таймера"""
+        try:
+            job = self.bot.jobs.get(timer_id)
+            if job is not None and job.remaining(self.bot.scheduler.time()) > 0:
+                # Таймер продлили через /extend: продолжаем отсчет
+                await self._timer_tick(event, spam_count, timer_id)
+                return
+            if job is not None and job.kind == JobKind.CYCLE and job.phase + 1 < len(job.phases) * job.count:
+                await self._next_phase(event, job)
+                self._schedule_tick(event, spam_count, timer_id)
+                return
+            
+            if job is not None and job.kind == JobKind.CYCLE:
+                self.bot.edits.submit(event, f"{config.SUCCESS_EMOJI} Цикл `{job.short_id}` завершен: {job.text}")
+                await event.reply(f"{config.SUCCESS_EMOJI} {config.DEFAULT_TIMER_END_TEXT}")
+            else:
+                self.bot.edits.submit(event, f"{config.SUCCESS_EMOJI} {config.DEFAULT_TIMER_END_TEXT}")
             
             # Спамим сообщениями если нужно
             if spam_count > 1:
@@ -124,23 +300,22 @@ class TimerHandler:
                     await asyncio.sleep(0.1)  # Небольшая задержка чтобы не забанили
             
             # Удаляем таймер из активных
-            if timer_id in self.active_timers:
-                del self.active_timers[timer_id]
-            
-            self.bot.storage.remove_timer(timer_id)
+            self.bot.jobs.pop(timer_id)
+            await self.bot.storage.remove_timer(timer_id)
             
             logger.info(f"Таймер {timer_id} завершен успешно")
             
         except asyncio.CancelledError:
-            logger.info(f"Таймер {timer_id} был отменен")
-            try:
-                await event.edit(f"{config.WARNING_EMOJI} Таймер отменен")
-            except (ConnectionError, asyncio.CancelledError):
-                # Не логируем отмену при выключении бота
-                pass
+            await self._timer_cancelled(event, timer_id)
         except Exception as e:
             logger.error(f"Ошибка в таймере {timer_id}: {e}")
-            await event.edit(f"{config.ERROR_EMOJI} Ошибка в таймере!")
+            self.bot.edits.submit(event, f"{config.ERROR_EMOJI} Ошибка в таймере!")
+    
+    async def _timer_cancelled(self, event, timer_id: str):
+        """Завершение отмененного таймера"""
+        logger.info(f"Таймер {timer_id} был отменен")
+        self.bot.jobs.pop(timer_id)
+        self.bot.edits.submit(event, f"{config.WARNING_EMOJI} Таймер отменен")
     
     async def handle_countdown(self, event):
         """Обработка команды /countdown (простой отсчет без редактирования)"""
@@ -156,11 +331,15 @@ class TimerHandler:
             timer_id = f"countdown_{event.chat_id}_{event.id}_{datetime.now().timestamp()}"
 
             # Запускаем отсчет как задачу
-            task = asyncio.create_task(self._run_countdown(event, seconds, timer_id))
-            self.active_timers[timer_id] = task
-            self.bot.storage.increment_timers_created()
+            job = self.bot.jobs.add(Job(
+                timer_id, JobKind.COUNTDOWN, event.chat_id, event.id, self.bot.scheduler.time() + seconds,
+            ))
+            job.handle = self.bot.scheduler.call_later(
+                0, self._run_countdown, event, seconds, timer_id, job_id=timer_id, lane=event.chat_id
+            )
+            await self.bot.storage.increment_timers_created()
 
-            await event.edit(f"{config.TIMER_EMOJI} Запускаю обратный отсчет с {seconds}. Можно отменить через /cancel.")
+            await event.edit(f"{config.TIMER_EMOJI} Запускаю обратный отсчет с {seconds}. Можно отменить через /cancel {job.short_id}.")
 
         except ValueError:
             await event.edit(f"{config.ERROR_EMOJI} Неверное число секунд!")
@@ -188,8 +367,86 @@ class TimerHandler:
         
         finally:
             # Удаляем таймер из активных в любом случае
-            if timer_id in self.active_timers:
-                del self.active_timers[timer_id]
+            self.bot.jobs.pop(timer_id)
+    
+    def _timer_message(self, job: Job) -> MessageRef:
+        return MessageRef(self.bot.client, job.chat_id, job.message_id)
+    
+    async def pause_job(self, job: Job) -> float:
+        """Ставит таймер на паузу
+        
+        Текущая точка отсчета снимается с очереди планировщика, но остается
+        у задачи; в хранилище записывается только остаток.
+        
+        Returns:
+            Остаток в секундах.
+        """
+        if job.paused is not None:
+            raise ValueError("таймер уже на паузе")
+        remaining = job.remaining(self.bot.scheduler.time())
+        if remaining <= 0:
+            raise ValueError("таймер уже завершается")
+        self.bot.jobs.retime(job, job.deadline, paused=remaining)
+        if job.handle is not None:
+            self.bot.scheduler.pause(job.handle)
+        await self.bot.storage.update_fields('timers', job.id, {'paused_remaining': remaining})
+        
+        time_str = self.bot.time_parser.seconds_to_string(remaining)
+        name = "Цикл" if job.kind == JobKind.CYCLE else "Таймер"
+        self.bot.edits.submit(self._timer_message(job), f"⏸ {name} `{job.short_id}` на паузе, осталось {time_str}")
+        logger.info(f"Таймер {job.id} поставлен на паузу ({remaining:.0f} с)")
+        return remaining
+    
+    async def resume_job(self, job: Job) -> float:
+        """Продолжает таймер после паузы
+        
+        Returns:
+            Остаток в секундах.
+        """
+        if job.paused is None:
+            raise ValueError("таймер не на паузе")
+        remaining = job.paused
+        self.bot.jobs.retime(job, self.bot.scheduler.time() + remaining)
+        await self.bot.storage.update_fields('timers', job.id, {
+            'fire_at': time.time() + remaining, 'paused_remaining': None,
+        })
+        
+        # Та же точка отсчета срабатывает сразу и считает остаток от нового дедлайна;
+        # если точки нет (восстановлен на паузе или она уже снята), отсчет запускается заново
+        if job.handle is None or not self.bot.scheduler.reschedule(job.handle, self.bot.scheduler.time()):
+            spam_count = job.count if job.kind == JobKind.TIMER else 1
+            job.handle = self.bot.scheduler.call_later(
+                0, self._run_timer, self._timer_message(job), remaining, spam_count, job.id,
+                job_id=job.id, lane=job.chat_id,
+            )
+        logger.info(f"Таймер {job.id} продолжен ({remaining:.0f} с)")
+        return remaining
+    
+    async def extend_job(self, job: Job, seconds: float) -> float:
+        """Продлевает таймер на seconds секунд (на паузе - увеличивает остаток)
+        
+        Returns:
+            Новый остаток в секундах.
+        """
+        now = self.bot.scheduler.time()
+        if job.paused is None and job.remaining(now) <= 0:
+            raise ValueError("таймер уже завершается")
+        remaining = max(0.0, job.remaining(now)) + seconds
+        if remaining > config.MAX_TIMER_SECONDS.total_seconds():
+            max_hours = int(config.MAX_TIMER_SECONDS.total_seconds() // 3600)
+            raise ValueError(f"максимальное время таймера: {max_hours} часов")
+        
+        if job.paused is not None:
+            self.bot.jobs.retime(job, job.deadline, paused=remaining)
+            await self.bot.storage.update_fields('timers', job.id, {'paused_remaining': remaining})
+        else:
+            self.bot.jobs.retime(job, now + remaining)
+            await self.bot.storage.update_fields('timers', job.id, {'fire_at': time.time() + remaining})
+            if job.handle is not None:
+                # Следующая точка отсчета сразу покажет новый остаток
+                self.bot.scheduler.reschedule(job.handle, now)
+        logger.info(f"Таймер {job.id} продлен на {seconds:.0f} с")
+        return remaining
     
     async def cancel_timer_by_id(self, timer_id: str) -> bool:
         """Отменяет конкретный таймер по ID
@@ -200,11 +457,11 @@ class TimerHandler:
         Returns:
             bool: True если таймер был найден и отменен, иначе False
         """
-        if timer_id in self.active_timers:
-            task = self.active_timers[timer_id]
-            task.cancel()
-            del self.active_timers[timer_id]
-            self.bot.storage.remove_timer(timer_id)
+        job = self.bot.jobs.get(timer_id)
+        if job is not None and job.kind in (JobKind.TIMER, JobKind.COUNTDOWN, JobKind.CYCLE):
+            self.bot.jobs.pop(timer_id)
+            job.cancel()
+            await self.bot.storage.remove_timer(timer_id)
             logger.info(f"Таймер {timer_id} был отменен по запросу")
             return True
         return False
@@ -213,66 +470,89 @@ class TimerHandler:
         """Отменяет все активные таймеры"""
         cancelled_count = 0
         
-        for timer_id, task in list(self.active_timers.items()):
-            task.cancel()
+        for job in self.get_active_timers():
+            self.bot.jobs.pop(job.id)
+            job.cancel()
             cancelled_count += 1
         
-        self.active_timers.clear()
-        self.bot.storage.clear_timers()
+        await self.bot.storage.clear_timers()
         
         return cancelled_count
     
-    async def get_active_timers(self) -> List[dict]:
-        """Возвращает список активных таймеров"""
-        timers = []
-        
-        for timer_id in self.active_timers.keys():
-            timer_data = self.bot.storage.get_timer(timer_id)
-            if timer_data:
-                timers.append(timer_data)
-        
-        return timers
+    def get_active_timers(self) -> List[Job]:
+        """Возвращает список активных таймеров, отсчетов и циклов (без чтения хранилища)"""
+        return self.bot.jobs.of_kind(JobKind.TIMER, JobKind.COUNTDOWN, JobKind.CYCLE)
     
     async def restore_timers(self):
-        """Восстанавливает таймеры после перезапуска бота"""
+        """Восстанавливает таймеры и циклы после перезапуска бота
+        
+        Сообщения таймеров не запрашиваются: отсчет редактирует их по id.
+        Цикл продолжается с той фазы, которая идет сейчас: фазы, закончившиеся
+        за время простоя, пропускаются.
+        """
         try:
-            all_timers = self.bot.storage.get_all_timers()
+            all_timers = await self.bot.storage.get_all_timers()
             
             for timer_data in all_timers:
-                # Проверяем, не истек ли таймер
-                start_time = datetime.fromisoformat(timer_data['start_time'])
-                elapsed = (datetime.now() - start_time).total_seconds()
-                remaining = timer_data['duration'] - elapsed
-                
                 timer_id = timer_data.get('id')
-                if not timer_id:
-                    continue
-
-                if remaining <= 0:
-                    # Таймер уже должен был закончиться
-                    self.bot.storage.remove_timer(timer_id)
+                if not timer_id or timer_id in self.bot.jobs:
+                    # Задача из реестра уже создана командой после запуска
                     continue
                 
-                # Восстанавливаем таймер с оставшимся временем
                 try:
-                    chat_id = timer_data['chat_id']
-                    message_id = timer_data['message_id']
-                    spam_count = timer_data.get('spam_count', 1)
+                    # Проверяем, не истек ли таймер (fire_at есть у продленных и продолженных)
+                    paused = timer_data.get('paused_remaining')
+                    remaining = paused if paused is not None else job_fire_time(timer_data) - time.time()
+                    cycle = timer_data.get('type') == 'cycle'
+                    phase = timer_data.get('phase', 0)
+                    if cycle and paused is None:
+                        phases = timer_data['phases']
+                        total_phases = len(phases) * timer_data.get('rounds', 1)
+                        while remaining <= 0 and phase + 1 < total_phases:
+                            phase += 1
+                            remaining += phases[phase % len(phases)]
+                    
+                    if remaining <= 0:
+                        # Таймер уже должен был закончиться
+                        await self.bot.storage.remove_timer(timer_id)
+                        continue
+                    
+                    message = MessageRef(self.bot.client, timer_data['chat_id'], timer_data['message_id'])
+                    spam_count = 1 if cycle else timer_data.get('spam_count', 1)
                     
-                    # Получаем сообщение
-                    message = await self.bot.client.get_messages(chat_id, ids=message_id)
-                    if message:
-                        # Создаем задачу для оставшегося времени
-                        task = asyncio.create_task(
-                            self._run_timer(message, int(remaining), spam_count, timer_id)
-                        )
-                        self.active_timers[timer_id] = task
-                        
-                        logger.info(f"Восстановлен таймер {timer_id} с {remaining:.0f} секунд")
+                    # Продолжаем отсчет с оставшимся временем
+                    job = Job(
+                        timer_id, JobKind.CYCLE if cycle else JobKind.TIMER, message.chat_id, message.id,
+                        self.bot.scheduler.time() + remaining,
+                        count=timer_data.get('rounds', 1) if cycle else spam_count,
+                        text=timer_data.get('text'),
+                        short_id=timer_data.get('short_id'),
+                    )
+                    if cycle:
+                        job.phases = tuple(timer_data['phases'])
+                        job.phase = phase
+                    self.bot.jobs.add(job)
+                    if job.short_id != timer_data.get('short_id') or phase != timer_data.get('phase', 0):
+                        # Старая запись без короткого id, id уже занят новой задачей или цикл сменил фазу
+                        timer_data['short_id'] = job.short_id
+                        if cycle:
+                            timer_data['phase'] = phase
+                            timer_data['fire_at'] = time.time() + remaining
+                        await self.bot.storage.save_timer(timer_data)
+                    if paused is not None:
+                        # Отсчет запустит /resume
+                        self.bot.jobs.retime(job, job.deadline, paused=paused)
+                        logger.info(f"Восстановлен таймер {timer_id} на паузе ({paused:.0f} секунд)")
+                        continue
+                    job.handle = self.bot.scheduler.call_later(
+                        0, self._run_timer, message, remaining, spam_count, timer_id,
+                        job_id=timer_id, lane=message.chat_id,
+                    )
+                    logger.info(f"Восстановлен таймер {timer_id} с {remaining:.0f} секунд")
                 
                 except Exception as e:
                     logger.error(f"Ошибка восстановления таймера {timer_id}: {e}")
-                    self.bot.storage.remove_timer(timer_id)
+                    await self.bot.storage.remove_timer(timer_id)
         
         except Exception as e:
             logger.error(f"Ошибка при восстановлении таймеров: {e}")
\ No newline at end of file
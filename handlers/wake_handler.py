@@ -3,13 +3,19 @@
 
 import asyncio
 import logging
+import math
 import re
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from telethon import TelegramClient
 from telethon.tl.types import Message
 
-from utils.json_storage import JsonStorage
+from utils.jobs import Job, JobKind
+from utils.json_storage import JsonStorage, job_fire_time
+from utils.message_ref import MessageRef
+from utils.recurrence import Recurrence, parse_recurring
+from utils.scheduler import JobHandle
 from utils.time_parser import TimeParser
 from config import config
 
@@ -19,13 +25,19 @@ class WakeHandler:
     def __init__(self, bot, sender_client):
         self.bot = bot
         self.sender_client = sender_client
-        self.active_alarms: Dict[str, asyncio.Task] = {}
-        self.active_reminders: Dict[str, asyncio.Task] = {}
+        
+        # Долгосрочное планирование: в реестре и планировщике только задачи ближайшего окна.
+        # Дальние (созданные командой или восстановленные) лежат только в хранилище, пока
+        # их не подгрузит sweep() или команда с их id (load_far)
+        self.persistent = config.PERSISTENT_SCHEDULING
+        self.window = config.SCHEDULE_WINDOW if self.persistent else math.inf
+        self.max_duration = config.MAX_SCHEDULE_SECONDS if self.persistent else config.MAX_TIMER_SECONDS
+        self.sweeps = 0
     
     async def handle_wake(self, event):
         """Обработка команды /wake"""
         try:
-            self.bot.storage.increment_command_usage('wake')
+            await self.bot.storage.increment_command_usage('wake')
             args = event.pattern_match.group(1).strip().split()
             if not args:
                 await event.edit(f"{config.ERROR_EMOJI} Используйте: /wake 10m [количество_сообщений]")
@@ -39,9 +51,9 @@ class WakeHandler:
                 await event.edit(f"{config.ERROR_EMOJI} Неверный или нулевой формат времени! Используйте: 30s, 5m, 1h")
                 return
             
-            if duration_td > config.MAX_TIMER_SECONDS:
-                max_hours = int(config.MAX_TIMER_SECONDS.total_seconds() // 3600)
-                await event.edit(f"{config.ERROR_EMOJI} Максимальное время: {max_hours} часов")
+            if duration_td > self.max_duration:
+                max_time = self.bot.time_parser.seconds_to_string(self.max_duration.total_seconds())
+                await event.edit(f"{config.ERROR_EMOJI} Максимальное время: {max_time}")
                 return
 
             seconds = int(duration_td.total_seconds())
@@ -74,19 +86,24 @@ class WakeHandler:
                 'user_id': user_id,
                 'start_time': datetime.now().isoformat(),
                 'duration': seconds,
+                'fire_at': time.time() + seconds,
                 'message_count': message_count,
                 'type': 'wake'
             }
             
-            self.bot.storage.save_alarm(alarm_data)
-            self.bot.storage.increment_alarms_created()
+            job = self._register(JobKind.ALARM, alarm_data)
+            await self.bot.storage.save_alarm(alarm_data)
+            await self.bot.storage.increment_alarms_created()
+            await self._save_short_id_floor()
             
-            # Запускаем будильник
-            task = asyncio.create_task(self._run_wake_alarm(event, seconds, message_count, alarm_id, user_id))
-            self.active_alarms[alarm_id] = task
+            # Планируем будильник (дальний подгрузит sweep)
+            if seconds <= self.window:
+                job.handle = self._schedule_alarm(event, seconds, message_count, alarm_id, user_id)
+            else:
+                self._release_far(job)
             
             time_str_readable = self.bot.time_parser.seconds_to_string(seconds)
-            await event.edit(f"{config.WAKE_EMOJI} Будильник установлен на {time_str_readable} ({message_count} сообщений)")
+            await event.edit(f"{config.WAKE_EMOJI} Будильник `{job.short_id}` установлен на {time_str_readable} ({message_count} сообщений)")
             
             logger.info(f"Установлен будильник на {seconds} секунд с {message_count} сообщениями")
             
@@ -94,57 +111,68 @@ class WakeHandler:
             logger.error(f"Ошибка в handle_wake: {e}")
             await event.edit(f"{config.ERROR_EMOJI} Ошибка при создании будильника!")
     
-    async def _run_wake_alarm(self, event, delay_seconds: int, message_count: int, alarm_id: str, user_id: int):
-        """Запуск будильника"""
+    def _schedule_alarm(self, event, delay_seconds: float, message_count: int, alarm_id: str, user_id: int) -> JobHandle:
+        """Ставит будильник в общий планировщик"""
+        return self.bot.reminder_scheduler.call_later(
+            delay_seconds, self._run_wake_alarm, event, message_count, alarm_id, user_id,
+            job_id=alarm_id, on_cancel=lambda: self._alarm_cancelled(event, alarm_id), lane=event.chat_id,
+        )
+    
+    async def _run_wake_alarm(self, event, message_count: int, alarm_id: str, user_id: int):
+        """Срабатывание будильника
+        
+        Сообщения отправляются через общую очередь (bot.fire_sends): будильники,
+        сработавшие одновременно, отправляют их по кругу по одному.
+        """
         try:
-            # Ждем указанное время
-            await asyncio.sleep(delay_seconds)
+            if alarm_id not in self.bot.jobs:
+                # Отменен, пока sweep переносил его в планировщик
+                return
             
-            # Отправляем сообщения в ЛС пользователю
-            for i in range(message_count):
-                try:
-                    await self.sender_client.send_message(user_id, f"{config.WAKE_EMOJI} {config.DEFAULT_WAKE_TEXT}")
-                    await asyncio.sleep(0.1)  # Небольшая задержка между сообщениями
-                except Exception as e:
-                    logger.error(f"Ошибка отправки сообщения будильника {i+1}: {e}")
+            # Отправляем сообщения в ЛС пользователю (ошибки отдельных сообщений пишет очередь)
+            sent = await self.bot.fire_sends.send(
+                self.sender_client, user_id, f"{config.WAKE_EMOJI} {config.DEFAULT_WAKE_TEXT}", message_count
+            )
             
-            # Обновляем исходное сообщение
-            try:
-                await event.edit(f"{config.SUCCESS_EMOJI} Будильник сработал! Отправлено {message_count} сообщений в ЛС")
-            except:
-                pass  # Сообщение могло быть удалено
+            # Обновляем исходное сообщение (ошибки, например удаленное сообщение, пишет регулятор)
+            self.bot.edits.submit(event, f"{config.SUCCESS_EMOJI} Будильник сработал! Отправлено {sent} сообщений в ЛС")
             
             # Удаляем будильник из активных
-            if alarm_id in self.active_alarms:
-                del self.active_alarms[alarm_id]
-            
-            self.bot.storage.remove_alarm(alarm_id)
+            self.bot.jobs.pop(alarm_id)
+            await self.bot.storage.remove_alarm(alarm_id)
         
             logger.info(f"Будильник {alarm_id} сработал успешно")
             
         except asyncio.CancelledError:
-            logger.info(f"Будильник {alarm_id} был отменен")
-            try:
-                await event.edit(f"{config.WARNING_EMOJI} Будильник отменен")
-            except:
-                pass
-            if alarm_id in self.active_alarms:
-                del self.active_alarms[alarm_id]
-            self.bot.storage.remove_alarm(alarm_id)
+            await self._alarm_cancelled(event, alarm_id)
         except Exception as e:
             logger.error(f"Ошибка в будильнике {alarm_id}: {e}")
-            try:
-                await event.edit(f"{config.ERROR_EMOJI} Ошибка в будильнике!")
-            except:
-                pass
+            self.bot.edits.submit(event, f"{config.ERROR_EMOJI} Ошибка в будильнике!")
+    
+    async def _alarm_cancelled(self, event, alarm_id: str):
+        """Завершение отмененного будильника (до или во время срабатывания)"""
+        logger.info(f"Будильник {alarm_id} был отменен")
+        self.bot.edits.submit(event, f"{config.WARNING_EMOJI} Будильник отменен")
+        self.bot.jobs.pop(alarm_id)
+        await self.bot.storage.remove_alarm(alarm_id)
     
     async def handle_remind(self, event):
         """Обработка команды /remind"""
         try:
-            self.bot.storage.increment_command_usage('remind')
+            await self.bot.storage.increment_command_usage('remind')
             # Используем регулярное выражение для парсинга команды
             full_text = event.pattern_match.group(1).strip()
             
+            # Повторяющееся напоминание: /remind every weekday 09:00 "текст" или /remind cron 0 9 * * 1-5 "текст"
+            try:
+                recurring = parse_recurring(full_text)
+            except ValueError as e:
+                await event.edit(f"{config.ERROR_EMOJI} Неверное правило повторения: {e}")
+                return
+            if recurring:
+                await self._create_recurring(event, *recurring)
+                return
+            
             # Пытаемся найти паттерн: время + текст в кавычках или без них
             # Поддерживаемые форматы:
             # /remind 5m "купить молоко"
@@ -159,11 +187,7 @@ class WakeHandler:
             time_str = parts[0]
             reminder_text = parts[1]
             
-            # Убираем кавычки если есть
-            if reminder_text.startswith('"') and reminder_text.endswith('"'):
-                reminder_text = reminder_text[1:-1]
-            elif reminder_text.startswith("'") and reminder_text.endswith("'"):
-                reminder_text = reminder_text[1:-1]
+            reminder_text = self._strip_quotes(reminder_text)
             
             # Парсим время
             duration_td = self.bot.time_parser.parse_duration(time_str)
@@ -172,9 +196,9 @@ class WakeHandler:
                 await event.edit(f"{config.ERROR_EMOJI} Неверный или нулевой формат времени! Используйте: 30s, 5m, 1h")
                 return
             
-            if duration_td > config.MAX_TIMER_SECONDS:
-                max_hours = int(config.MAX_TIMER_SECONDS.total_seconds() // 3600)
-                await event.edit(f"{config.ERROR_EMOJI} Максимальное время: {max_hours} часов")
+            if duration_td > self.max_duration:
+                max_time = self.bot.time_parser.seconds_to_string(self.max_duration.total_seconds())
+                await event.edit(f"{config.ERROR_EMOJI} Максимальное время: {max_time}")
                 return
 
             seconds = int(duration_td.total_seconds())
@@ -197,19 +221,24 @@ class WakeHandler:
                 'user_id': user_id,
                 'start_time': datetime.now().isoformat(),
                 'duration': seconds,
+                'fire_at': time.time() + seconds,
                 'text': reminder_text,
                 'type': 'reminder'
             }
             
-            self.bot.storage.save_reminder(reminder_data)
-            self.bot.storage.increment_alarms_created()
+            job = self._register(JobKind.REMINDER, reminder_data)
+            await self.bot.storage.save_reminder(reminder_data)
+            await self.bot.storage.increment_alarms_created()
+            await self._save_short_id_floor()
             
-            # Запускаем напоминание
-            task = asyncio.create_task(self._run_reminder(event, seconds, reminder_text, reminder_id, user_id))
-            self.active_reminders[reminder_id] = task
+            # Планируем напоминание (дальнее подгрузит sweep)
+            if seconds <= self.window:
+                job.handle = self._schedule_reminder(event, seconds, reminder_text, reminder_id, user_id)
+            else:
+                self._release_far(job)
             
             time_str_readable = self.bot.time_parser.seconds_to_string(seconds)
-            await event.edit(f"💭 Напоминание установлено на {time_str_readable}: \"{reminder_text}\"")
+            await event.edit(f"💭 Напоминание `{job.short_id}` установлено на {time_str_readable}: \"{reminder_text}\"")
             
             logger.info(f"Установлено напоминание на {seconds} секунд: {reminder_text}")
             
@@ -217,45 +246,245 @@ class WakeHandler:
             logger.error(f"Ошибка в handle_remind: {e}")
             await event.edit(f"{config.ERROR_EMOJI} Ошибка при создании напоминания!")
     
-    async def _run_reminder(self, event, delay_seconds: int, reminder_text: str, reminder_id: str, user_id: int):
-        """Запуск напоминания"""
+    @staticmethod
+    def _strip_quotes(text: str) -> str:
+        """Убирает кавычки вокруг текста, если есть"""
+        if text.startswith('"') and text.endswith('"'):
+            return text[1:-1]
+        elif text.startswith("'") and text.endswith("'"):
+            return text[1:-1]
+        return text
+    
+    async def _create_recurring(self, event, rule: Recurrence, reminder_text: str):
+        """Создает повторяющееся напоминание
+        
+        Правило сохраняется один раз вместе с ближайшим временем
+        срабатывания (fire_at); в планировщик попадает только это
+        срабатывание, следующее вычисляется после него.
+        """
+        reminder_text = self._strip_quotes(reminder_text.strip())
+        if not reminder_text.strip():
+            await event.edit(f"{config.ERROR_EMOJI} Текст напоминания не может быть пустым!")
+            return
+        
+        now = datetime.now()
+        next_fire = rule.next_after(now)
+        reminder_id = f"remind_{event.chat_id}_{event.id}_{now.timestamp()}"
+        user_id = event.sender_id
+        
+        reminder_data = {
+            'id': reminder_id,
+            'chat_id': event.chat_id,
+            'message_id': event.id,
+            'user_id': user_id,
+            'start_time': now.isoformat(),
+            'duration': int((next_fire - now).total_seconds()),
+            'fire_at': next_fire.timestamp(),
+            'rule': rule.expression,
+            'text': reminder_text,
+            'type': 'reminder'
+        }
+        
+        job = self._register(JobKind.REMINDER, reminder_data)
+        await self.bot.storage.save_reminder(reminder_data)
+        await self.bot.storage.increment_alarms_created()
+        await self._save_short_id_floor()
+        
+        delay = next_fire.timestamp() - time.time()
+        if delay <= self.window:
+            job.handle = self._schedule_reminder(
+                event, delay, reminder_text, reminder_id, user_id, rule.expression
+            )
+        else:
+            self._release_far(job)
+        
+        await event.edit(
+            f"🔁 Повторяющееся напоминание `{job.short_id}` \"{reminder_text}\" ({rule.expression}), "
+            f"ближайшее: {next_fire.strftime('%d.%m.%Y %H:%M')}"
+        )
+        logger.info(f"Установлено повторяющееся напоминание {reminder_id} ({rule.expression}): {reminder_text}")
+    
+    async def _advance_recurring(self, event, reminder_text: str, reminder_id: str, user_id: int, rule: str) -> Optional[datetime]:
+        """Переносит повторяющееся напоминание на следующее срабатывание
+        
+        Returns:
+            Время следующего срабатывания или None, если правило уже удалено.
+        """
+        job = self.bot.jobs.get(reminder_id)
+        reminder_data = await self.bot.storage.get_reminder(reminder_id) if job else None
+        if reminder_data is None:
+            # Отменено во время срабатывания
+            return None
+        
+        # Не раньше текущего срабатывания, даже если планировщик разбудил чуть раньше
+        now = datetime.now()
+        previous = datetime.fromtimestamp(job_fire_time(reminder_data) or time.time())
+        next_fire = Recurrence(rule).next_after(max(now, previous))
+        reminder_data['start_time'] = now.isoformat()
+        reminder_data['duration'] = int((next_fire - now).total_seconds())
+        reminder_data['fire_at'] = next_fire.timestamp()
+        reminder_data['short_id'] = job.short_id
+        await self.bot.storage.save_reminder(reminder_data)
+        
+        delay = next_fire.timestamp() - time.time()
+        self.bot.jobs.retime(job, self.bot.reminder_scheduler.time() + delay)
+        if delay <= self.window:
+            job.handle = self._schedule_reminder(
+                event, delay, reminder_text, reminder_id, user_id, rule
+            )
+        else:
+            # Дальнее срабатывание подгрузит sweep
+            job.handle = None
+            self._release_far(job)
+        return next_fire
+    
+    def _schedule_reminder(self, event, delay_seconds: float, reminder_text: str, reminder_id: str, user_id: int,
+                           rule: Optional[str] = None) -> JobHandle:
+        """Ставит напоминание в общий планировщик"""
+        return self.bot.reminder_scheduler.call_later(
+            delay_seconds, self._run_reminder, event, reminder_text, reminder_id, user_id, rule,
+            job_id=reminder_id, on_cancel=lambda: self._reminder_cancelled(event, reminder_id), lane=event.chat_id,
+        )
+    
+    async def _run_reminder(self, event, reminder_text: str, reminder_id: str, user_id: int, rule: Optional[str] = None):
+        """Срабатывание напоминания"""
         try:
-            # Ждем указанное время
-            await asyncio.sleep(delay_seconds)
+            if reminder_id not in self.bot.jobs:
+                # Отменено, пока sweep переносил его в планировщик
+                return
             
             # Отправляем напоминание в ЛС
             reminder_msg = f"{config.DEFAULT_REMINDER_TEXT} {reminder_text}"
-            await self.sender_client.send_message(user_id, reminder_msg)
+            if not await self.bot.fire_sends.send(self.sender_client, user_id, reminder_msg):
+                raise RuntimeError("сообщение не доставлено")
+            
+            if rule:
+                # Повторяющееся: планируем следующее срабатывание вместо удаления
+                next_fire = await self._advance_recurring(event, reminder_text, reminder_id, user_id, rule)
+                if next_fire:
+                    self.bot.edits.submit(
+                        event,
+                        f"🔁 Напоминание отправлено: \"{reminder_text}\", "
+                        f"следующее: {next_fire.strftime('%d.%m.%Y %H:%M')}"
+                    )
+                logger.info(f"Повторяющееся напоминание {reminder_id} отправлено, следующее: {next_fire}")
+                return
             
             # Обновляем исходное сообщение
-            try:
-                await event.edit(f"{config.SUCCESS_EMOJI} Напоминание отправлено: \"{reminder_text}\"")
-            except:
-                pass  # Сообщение могло быть удалено
+            self.bot.edits.submit(event, f"{config.SUCCESS_EMOJI} Напоминание отправлено: \"{reminder_text}\"")
             
             # Удаляем напоминание из активных
-            if reminder_id in self.active_reminders:
-                del self.active_reminders[reminder_id]
-            
-            self.bot.storage.remove_reminder(reminder_id)
+            self.bot.jobs.pop(reminder_id)
+            await self.bot.storage.remove_reminder(reminder_id)
             
             logger.info(f"Напоминание {reminder_id} отправлено успешно")
             
         except asyncio.CancelledError:
-            logger.info(f"Напоминание {reminder_id} было отменено")
-            try:
-                await event.edit(f"{config.WARNING_EMOJI} Напоминание отменено")
-            except:
-                pass
-            if reminder_id in self.active_reminders:
-                del self.active_reminders[reminder_id]
-            self.bot.storage.remove_reminder(reminder_id)
+            await self._reminder_cancelled(event, reminder_id)
         except Exception as e:
             logger.error(f"Ошибка в напоминании {reminder_id}: {e}")
-            try:
-                await event.edit(f"{config.ERROR_EMOJI} Ошибка в напоминании!")
-            except:
-                pass
+            self.bot.edits.submit(event, f"{config.ERROR_EMOJI} Ошибка в напоминании!")
+            if rule:
+                # Пропускаем это срабатывание, но правило продолжает работать
+                try:
+                    await self._advance_recurring(event, reminder_text, reminder_id, user_id, rule)
+                except Exception as e:
+                    logger.error(f"Не удалось перенести повторяющееся напоминание {reminder_id}: {e}")
+    
+    async def _reminder_cancelled(self, event, reminder_id: str):
+        """Завершение отмененного напоминания (до или во время срабатывания)"""
+        logger.info(f"Напоминание {reminder_id} было отменено")
+        self.bot.edits.submit(event, f"{config.WARNING_EMOJI} Напоминание отменено")
+        self.bot.jobs.pop(reminder_id)
+        await self.bot.storage.remove_reminder(reminder_id)
+    
+    @staticmethod
+    def _collection(job: Job) -> str:
+        return 'alarms' if job.kind == JobKind.ALARM else 'reminders'
+    
+    def _schedule_job(self, job: Job, delay_seconds: float) -> JobHandle:
+        """Ставит будильник или напоминание из реестра в планировщик"""
+        message = self._message_ref(job.chat_id, job.message_id)
+        if job.kind == JobKind.ALARM:
+            return self._schedule_alarm(message, delay_seconds, job.count, job.id, job.user_id)
+        return self._schedule_reminder(message, delay_seconds, job.text, job.id, job.user_id, job.rule)
+    
+    async def pause_job(self, job: Job) -> float:
+        """Ставит будильник или напоминание на паузу
+        
+        Запись в планировщике снимается с очереди, но остается у задачи;
+        в хранилище записывается только остаток.
+        
+        Returns:
+            Остаток в секундах.
+        """
+        if job.paused is not None:
+            raise ValueError("задача уже на паузе")
+        if job.handle is not None and not self.bot.reminder_scheduler.pause(job.handle):
+            raise ValueError("задача уже срабатывает")
+        remaining = max(0.0, job.remaining(self.bot.reminder_scheduler.time()))
+        self.bot.jobs.retime(job, job.deadline, paused=remaining)
+        # fire_at - момент паузы: запись попадает в выборку окна и после перезапуска
+        # восстанавливается в реестр, как бы далеко ни было ее время
+        await self.bot.storage.update_fields(self._collection(job), job.id, {
+            'paused_remaining': remaining, 'fire_at': time.time(),
+        })
+        logger.info(f"Задача {job.id} поставлена на паузу ({remaining:.0f} с)")
+        return remaining
+    
+    async def resume_job(self, job: Job) -> float:
+        """Продолжает будильник или напоминание после паузы
+        
+        Returns:
+            Остаток в секундах.
+        """
+        if job.paused is None:
+            # Дальняя задача могла попасть в реестр только ради этой команды
+            self._release_far(job)
+            raise ValueError("задача не на паузе")
+        remaining = job.paused
+        self.bot.jobs.retime(job, self.bot.reminder_scheduler.time() + remaining)
+        await self.bot.storage.update_fields(self._collection(job), job.id, {
+            'fire_at': time.time() + remaining, 'paused_remaining': None,
+        })
+        
+        if job.handle is not None:
+            # Та же запись возвращается в очередь
+            self.bot.reminder_scheduler.reschedule(job.handle, job.deadline)
+        elif remaining <= self.window:
+            # Восстановлена на паузе или была дальней
+            job.handle = self._schedule_job(job, remaining)
+        else:
+            # Еще более дальнюю подгрузит sweep
+            self._release_far(job)
+        logger.info(f"Задача {job.id} продолжена ({remaining:.0f} с)")
+        return remaining
+    
+    async def extend_job(self, job: Job, seconds: float) -> float:
+        """Откладывает будильник или напоминание на seconds секунд
+        
+        У повторяющегося напоминания переносится только ближайшее срабатывание.
+        
+        Returns:
+            Новый остаток в секундах.
+        """
+        now = self.bot.reminder_scheduler.time()
+        remaining = max(0.0, job.remaining(now)) + seconds
+        if remaining > self.max_duration.total_seconds():
+            max_time = self.bot.time_parser.seconds_to_string(self.max_duration.total_seconds())
+            raise ValueError(f"максимальное время: {max_time}")
+        
+        if job.paused is not None:
+            self.bot.jobs.retime(job, job.deadline, paused=remaining)
+            await self.bot.storage.update_fields(self._collection(job), job.id, {'paused_remaining': remaining})
+        else:
+            if job.handle is not None and not self.bot.reminder_scheduler.reschedule(job.handle, now + remaining):
+                raise ValueError("задача уже срабатывает")
+            self.bot.jobs.retime(job, now + remaining)
+            await self.bot.storage.update_fields(self._collection(job), job.id, {'fire_at': time.time() + remaining})
+            self._release_far(job)
+        logger.info(f"Задача {job.id} отложена на {seconds:.0f} с")
+        return remaining
     
     async def cancel_alarm_by_id(self, alarm_id: str) -> bool:
         """Отменяет конкретный будильник по ID
@@ -266,169 +495,302 @@ class WakeHandler:
         Returns:
             bool: True если будильник был найден и отменен, иначе False
         """
-        if alarm_id in self.active_alarms:
-            task = self.active_alarms[alarm_id]
-            task.cancel()
-            del self.active_alarms[alarm_id]
-            self.bot.storage.remove_alarm(alarm_id)
-            logger.info(f"Будильник {alarm_id} был отменен по запросу")
-            return True
-        return False
+        job = self.bot.jobs.get(alarm_id)
+        if job is None or job.kind != JobKind.ALARM:
+            return False
+        
+        self.bot.jobs.pop(alarm_id)
+        if job.handle is None:
+            # Дальний будильник еще не в планировщике: некому вызвать on_cancel
+            await self._alarm_cancelled(self._message_ref(job.chat_id, job.message_id), alarm_id)
+        else:
+            job.cancel()
+            await self.bot.storage.remove_alarm(alarm_id)
+        logger.info(f"Будильник {alarm_id} был отменен по запросу")
+        return True
+    
+    async def cancel_reminder_by_id(self, reminder_id: str) -> bool:
+        """Отменяет конкретное напоминание по ID
+        
+        Args:
+            reminder_id: ID напоминания для отмены
+            
+        Returns:
+            bool: True если напоминание было найдено и отменено, иначе False
+        """
+        job = self.bot.jobs.get(reminder_id)
+        if job is None or job.kind != JobKind.REMINDER:
+            return False
+        
+        self.bot.jobs.pop(reminder_id)
+        if job.handle is None:
+            # Дальнее напоминание еще не в планировщике: некому вызвать on_cancel
+            await self._reminder_cancelled(self._message_ref(job.chat_id, job.message_id), reminder_id)
+        else:
+            job.cancel()
+            await self.bot.storage.remove_reminder(reminder_id)
+        logger.info(f"Напоминание {reminder_id} было отменено по запросу")
+        return True
         
     async def cancel_alarms(self) -> int:
         """Отменяет все активные будильники"""
-        cancelled_count = 0
+        # Дальние, которые есть только в хранилище, удаляет очистка коллекции
+        cancelled_count = len(await self._far_ids('alarms'))
         
-        for alarm_id, task in list(self.active_alarms.items()):
-            task.cancel()
+        # Включая дальние, еще не перенесенные в планировщик
+        for job in self.get_active_alarms():
+            self.bot.jobs.pop(job.id)
+            job.cancel()
             cancelled_count += 1
         
-        self.active_alarms.clear()
-        self.bot.storage.clear_alarms()
+        await self.bot.storage.clear_alarms()
         
         return cancelled_count
     
     async def cancel_reminders(self) -> int:
         """Отменяет все активные напоминания"""
-        cancelled_count = 0
+        # Дальние, которые есть только в хранилище, удаляет очистка коллекции
+        cancelled_count = len(await self._far_ids('reminders'))
         
-        for reminder_id, task in list(self.active_reminders.items()):
-            task.cancel()
+        # Включая дальние, еще не перенесенные в планировщик
+        for job in self.get_active_reminders():
+            self.bot.jobs.pop(job.id)
+            job.cancel()
             cancelled_count += 1
         
-        self.active_reminders.clear()
-        self.bot.storage.clear_reminders()
+        await self.bot.storage.clear_reminders()
         
         return cancelled_count
     
-    async def get_active_alarms(self) -> List[dict]:
-        """Возвращает список активных будильников"""
-        alarms = []
-        
-        for alarm_id in self.active_alarms.keys():
-            alarm_data = self.bot.storage.get_alarm(alarm_id)
-            if alarm_data:
-                alarms.append(alarm_data)
+    def get_active_alarms(self) -> List[Job]:
+        """Возвращает список будильников из реестра (без чтения хранилища)"""
+        return self.bot.jobs.of_kind(JobKind.ALARM)
+    
+    def get_active_reminders(self) -> List[Job]:
+        """Возвращает список напоминаний из реестра (без чтения хранилища)"""
+        return self.bot.jobs.of_kind(JobKind.REMINDER)
+    
+    async def restore_alarms(self):
+        """Восстанавливает будильники после перезапуска бота
         
-        return alarms
+        Исходные сообщения не запрашиваются: при срабатывании они
+        редактируются по (chat_id, message_id). Из хранилища по индексу
+        времени срабатывания читаются только задачи ближайшего окна (и
+        задачи на паузе); в режиме долгосрочного планирования дальние
+        остаются в хранилище, пока их не подгрузит sweep() или команда с
+        их id (load_far).
+        """
+        try:
+            until = time.time() + self.window
+            for key, restore in (('alarms', self._restore_alarm), ('reminders', self._restore_reminder)):
+                for data in await self.bot.storage.get_due_items(key, until):
+                    # Задачи из реестра уже созданы командами после запуска
+                    if data.get('id') and data['id'] not in self.bot.jobs:
+                        await restore(data['id'], data)
+            self.sweeps += 1
+        except Exception as e:
+            logger.error(f"Ошибка при восстановлении будильников: {e}")
     
-    async def get_active_reminders(self) -> List[dict]:
-        """Возвращает список активных напоминаний"""
-        reminders = []
+    async def sweep(self):
+        """Переносит в планировщик задачи, срабатывающие в ближайшем окне
         
-        for reminder_id in self.active_reminders.keys():
-            reminder_data = self.bot.storage.get_reminder(reminder_id)
-            if reminder_data:
-                reminders.append(reminder_data)
+        Задачи выбираются из хранилища по индексу времени срабатывания;
+        ставятся задачи реестра без записи в планировщике и дальние задачи,
+        которых в реестре еще нет.
+        """
+        until = time.time() + self.window
+        for key, restore in (('alarms', self._restore_alarm), ('reminders', self._restore_reminder)):
+            due = await self.bot.storage.get_due_items(key, until)
+            new_ids = [data['id'] for data in due if data.get('id') and data['id'] not in self.bot.jobs]
+            # Задачу вне реестра могли отменить, пока шла выборка: перечитываем ее после удаления
+            fresh = {data['id']: data for data in await self.bot.storage.get_many(key, new_ids)} if new_ids else {}
+            for data in due:
+                job = self.bot.jobs.get(data.get('id'))
+                if job is None:
+                    data = fresh.get(data.get('id'))
+                    if data is None:
+                        continue
+                elif job.handle is not None or job.paused is not None:
+                    continue
+                await restore(data['id'], data, startup=False)
+        self.sweeps += 1
+    
+    async def reserve_short_ids(self):
+        """Не дает реестру снова выдать короткие id дальних задач, оставшихся в хранилище"""
+        if self.persistent:
+            stats = await self.bot.storage.get_stats()
+            self.bot.jobs.reserve_short_ids(stats.get('short_id_floor', 0))
+    
+    async def _save_short_id_floor(self):
+        """Запоминает, до какого номера короткие id уже выданы (см. reserve_short_ids)"""
+        if self.persistent:
+            await self.bot.storage.raise_counter('short_id_floor', self.bot.jobs.short_id_floor)
+    
+    async def _far_ids(self, key: str, chat_id: Optional[int] = None) -> List[str]:
+        """Id задач коллекции, которые есть только в хранилище (дальние после перезапуска)"""
+        if not self.persistent:
+            return []
+        return [item_id for item_id in await self.bot.storage.get_ids(key, chat_id) if item_id not in self.bot.jobs]
+    
+    async def count_far(self, chat_id: Optional[int] = None) -> int:
+        """Сколько будильников и напоминаний (всех или одного чата) есть только в хранилище"""
+        return len(await self._far_ids('alarms', chat_id)) + len(await self._far_ids('reminders', chat_id))
+    
+    async def load_far(self, key: str) -> Optional[Job]:
+        """Будильник или напоминание из хранилища по короткому или полному id
         
-        return reminders
+        Нужен для команд с id дальней задачи, которая ждет своего окна
+        только в хранилище. Короткий id ищется по индексу хранилища, без
+        перебора записей. Найденная задача заносится в реестр без записи в
+        планировщике: ее поставит sweep(), когда подойдет время.
+        """
+        if not self.persistent:
+            return None
+        for kind, collection, get_one in (
+            (JobKind.ALARM, 'alarms', self.bot.storage.get_alarm),
+            (JobKind.REMINDER, 'reminders', self.bot.storage.get_reminder),
+        ):
+            data = await get_one(key) or await self.bot.storage.get_by_short_id(collection, key.lower())
+            if data is None:
+                continue
+            job = self.bot.jobs.get(data['id'])
+            if job is None:
+                stored_short_id = data.get('short_id')
+                job = self._register(kind, data)
+                if job.short_id != stored_short_id:
+                    await self.bot.storage.update_fields(collection, job.id, {'short_id': job.short_id})
+            return job
+        return None
     
-    async def restore_alarms(self):
-        """Восстанавливает будильники после перезапуска бота"""
+    async def cancel_far_in_chat(self, chat_id: int) -> int:
+        """Отменяет будильники и напоминания чата, которые есть только в хранилище"""
+        cancelled_count = 0
+        for key in ('alarms', 'reminders'):
+            for item_id in await self._far_ids(key, chat_id):
+                job = await self.load_far(item_id)
+                if job is None:
+                    continue
+                cancel = self.cancel_alarm_by_id if job.kind == JobKind.ALARM else self.cancel_reminder_by_id
+                if await cancel(job.id):
+                    cancelled_count += 1
+        return cancelled_count
+    
+    async def run_sweeper(self):
+        """Фоновая подгрузка дальних задач по мере приближения их времени"""
         try:
-            # Восстанавливаем будильники
-            saved_alarms = self.bot.storage.get_all_alarms()
-            for alarm_data in saved_alarms:
-                alarm_id = alarm_data.get('id')
-                if alarm_id:
-                    await self._restore_alarm(alarm_id, alarm_data)
-
-            # Восстанавливаем напоминания
-            saved_reminders = self.bot.storage.get_all_reminders()
-            for reminder_data in saved_reminders:
-                reminder_id = reminder_data.get('id')
-                if reminder_id:
-                    await self._restore_reminder(reminder_id, reminder_data)
+            while True:
+                await asyncio.sleep(config.SCHEDULE_SWEEP_INTERVAL)
+                try:
+                    await self.sweep()
+                except Exception as e:
+                    logger.error(f"Ошибка подгрузки будильников: {e}")
+        except asyncio.CancelledError:
+            pass
+    
+    def _message_ref(self, chat_id: int, message_id: int) -> MessageRef:
+        return MessageRef(self.bot.client, chat_id, message_id)
+    
+    def _release_far(self, job: Job) -> None:
+        """Убирает из реестра дальнюю задачу без записи в планировщике
         
-        except Exception as e:
-            logger.error(f"Ошибка при восстановлении будильников: {e}")
+        До своего окна она лежит только в хранилище; ее короткий id реестр
+        повторно не выдаст (счетчик только растет, а после перезапуска его
+        сдвигает reserve_short_ids).
+        """
+        if job.handle is None and job.paused is None and job.remaining(self.bot.reminder_scheduler.time()) > self.window:
+            self.bot.jobs.pop(job.id)
     
-    async def _restore_alarm(self, alarm_id: str, alarm_data: dict):
+    def _register(self, kind: JobKind, data: dict) -> Job:
+        """Заносит будильник или напоминание в реестр по записи хранилища
+        
+        Выданный реестром короткий id записывается в data['short_id'].
+        Задача с paused_remaining заносится на паузе.
+        """
+        paused = data.get('paused_remaining')
+        remaining = paused if paused is not None else job_fire_time(data) - time.time()
+        job = Job(
+            data['id'], kind, data['chat_id'], data['message_id'],
+            self.bot.reminder_scheduler.time() + remaining,
+            user_id=data.get('user_id') or 0,
+            count=data.get('message_count', 1),
+            text=data.get('text'),
+            rule=data.get('rule'),
+            short_id=data.get('short_id'),
+        )
+        job.paused = paused
+        self.bot.jobs.add(job)
+        data['short_id'] = job.short_id
+        return job
+    
+    async def _restore_alarm(self, alarm_id: str, alarm_data: dict, startup: bool = True):
         """Восстанавливает отдельный будильник"""
         try:
-            # Проверяем, не истек ли будильник
-            start_time = datetime.fromisoformat(alarm_data['start_time'])
-            elapsed = (datetime.now() - start_time).total_seconds()
-            remaining = alarm_data['duration'] - elapsed
-            
-            if remaining <= 0:
+            paused = alarm_data.get('paused_remaining') is not None
+            remaining = job_fire_time(alarm_data) - time.time()
+            if remaining <= 0 and startup and not paused:
                 # Будильник уже должен был сработать
-                self.bot.storage.remove_alarm(alarm_id)
+                await self.bot.storage.remove_alarm(alarm_id)
                 return
             
-            # Обновляем будильник с оставшимся временем и сохраняем
-            alarm_data['duration'] = int(remaining)
-            alarm_data['start_time'] = datetime.now().isoformat()
-            self.bot.storage.save_alarm(alarm_data)
-
-            # Восстанавливаем будильник с оставшимся временем
-            chat_id = alarm_data['chat_id']
-            message_id = alarm_data['message_id']
             user_id = alarm_data['user_id']
             message_count = alarm_data.get('message_count', config.DEFAULT_WAKE_MESSAGES)
+            stored_short_id = alarm_data.get('short_id')
+            job = self._register(JobKind.ALARM, alarm_data)
+            if job.short_id != stored_short_id:
+                # Старая запись без короткого id или id уже занят новой задачей
+                await self.bot.storage.save_alarm(alarm_data)
+            if paused or remaining > self.window:
+                # На паузе его поставит /resume, дальний перенесет sweep
+                return
             
-            # Получаем сообщение
-            try:
-                message = await self.bot.client.get_messages(chat_id, ids=message_id)
-                if message:
-                    # Создаем задачу для оставшегося времени
-                    task = asyncio.create_task(
-                        self._run_wake_alarm(message, int(remaining), message_count, alarm_id, user_id)
-                    )
-                    self.active_alarms[alarm_id] = task
-                    
-                    logger.info(f"Восстановлен будильник {alarm_id} с {remaining:.0f} секунд")
-                else:
-                    self.bot.storage.remove_alarm(alarm_id)
-            except Exception as e:
-                logger.error(f"Ошибка получения сообщения для будильника {alarm_id}: {e}")
-                self.bot.storage.remove_alarm(alarm_id)
+            # Планируем будильник на оставшееся время
+            job.handle = self._schedule_alarm(
+                self._message_ref(job.chat_id, job.message_id), remaining, message_count, alarm_id, user_id
+            )
+            logger.info(f"Восстановлен будильник {alarm_id} с {remaining:.0f} секунд")
                 
         except Exception as e:
             logger.error(f"Ошибка восстановления будильника {alarm_id}: {e}")
-            self.bot.storage.remove_alarm(alarm_id)
+            self.bot.jobs.pop(alarm_id)
+            await self.bot.storage.remove_alarm(alarm_id)
     
-    async def _restore_reminder(self, reminder_id: str, reminder_data: dict):
+    async def _restore_reminder(self, reminder_id: str, reminder_data: dict, startup: bool = True):
         """Восстанавливает отдельное напоминание"""
         try:
-            # Проверяем, не истекло ли напоминание
-            start_time = datetime.fromisoformat(reminder_data['start_time'])
-            elapsed = (datetime.now() - start_time).total_seconds()
-            remaining = reminder_data['duration'] - elapsed
-            
-            if remaining <= 0:
-                # Напоминание уже должно было сработать
-                self.bot.storage.remove_reminder(reminder_id)
-                return
-            
-            # Обновляем напоминание с оставшимся временем и сохраняем
-            reminder_data['duration'] = int(remaining)
-            reminder_data['start_time'] = datetime.now().isoformat()
-            self.bot.storage.save_reminder(reminder_data)
-
-            # Восстанавливаем напоминание с оставшимся временем
-            chat_id = reminder_data['chat_id']
-            message_id = reminder_data['message_id']
+            remaining = job_fire_time(reminder_data) - time.time()
             user_id = reminder_data['user_id']
             reminder_text = reminder_data.get('text', 'Напоминание')
+            rule = reminder_data.get('rule')
             
-            # Получаем сообщение
-            try:
-                message = await self.bot.client.get_messages(chat_id, ids=message_id)
-                if message:
-                    # Создаем задачу для оставшегося времени
-                    task = asyncio.create_task(
-                        self._run_reminder(message, int(remaining), reminder_text, reminder_id, user_id)
-                    )
-                    self.active_reminders[reminder_id] = task
-                    
-                    logger.info(f"Восстановлено напоминание {reminder_id} с {remaining:.0f} секунд")
+            message = self._message_ref(reminder_data['chat_id'], reminder_data['message_id'])
+            paused = reminder_data.get('paused_remaining') is not None
+            
+            if remaining <= 0 and startup and not paused:
+                if rule:
+                    # Пропущенные за время простоя повторы не догоняем, переходим к следующему
+                    self._register(JobKind.REMINDER, reminder_data)
+                    await self._advance_recurring(message, reminder_text, reminder_id, user_id, rule)
                 else:
-                    self.bot.storage.remove_reminder(reminder_id)
-            except Exception as e:
-                logger.error(f"Ошибка получения сообщения для напоминания {reminder_id}: {e}")
-                self.bot.storage.remove_reminder(reminder_id)
+                    # Напоминание уже должно было сработать
+                    await self.bot.storage.remove_reminder(reminder_id)
+                return
+            
+            stored_short_id = reminder_data.get('short_id')
+            job = self._register(JobKind.REMINDER, reminder_data)
+            if job.short_id != stored_short_id:
+                # Старая запись без короткого id или id уже занят новой задачей
+                await self.bot.storage.save_reminder(reminder_data)
+            if paused or remaining > self.window:
+                # На паузе его поставит /resume, дальнее перенесет sweep
+                return
+            
+            # Планируем напоминание на оставшееся время
+            job.handle = self._schedule_reminder(
+                message, remaining, reminder_text, reminder_id, user_id, rule
+            )
+            logger.info(f"Восстановлено напоминание {reminder_id} с {remaining:.0f} секунд")
                 
         except Exception as e:
             logger.error(f"Ошибка восстановления напоминания {reminder_id}: {e}")
-            self.bot.storage.remove_reminder(reminder_id)
\ No newline at end of file
+            self.bot.jobs.pop(reminder_id)
+            await self.bot.storage.remove_reminder(reminder_id)
\ No newline at end of file
@@ -20,7 +20,13 @@ from handlers.mention_handler import MentionHandler
 from handlers.fun_handler import FunHandler
 from handlers.system_handler import SystemHandler
 from handlers.interactions import InteractionsHandler
-from utils.json_storage import JsonStorage
+from utils.backup import BackupManager
+from utils.edit_governor import EditGovernor
+from utils.fire_admission import FireAdmission
+from utils.jobs import JobRegistry
+from utils.scheduler import Scheduler
+from utils.timing_wheel import TimingWheelScheduler
+from utils.storage import create_storage
 from utils.time_parser import TimeParser
 
 # Настройка логирования
@@ -37,7 +43,38 @@ logger = logging.getLogger(__name__)
 class PersonalBot:
     def __init__(self):
         self.config = config
-        self.storage = JsonStorage()
+        self.storage = create_storage(config)
+        self.stats_flush_task = None
+        self.compactor_task = None
+        self.backup = BackupManager(
+            self.storage,
+            config.BACKUP_DIR,
+            compression=config.BACKUP_COMPRESSION,
+            keep=config.BACKUP_KEEP,
+            interval=config.BACKUP_INTERVAL,
+        )
+        self.backup_task = None
+        self.restore_task = None
+        # Устанавливается, когда задачи из хранилища восстановлены
+        self.restored = asyncio.Event()
+        self.sweeper_task = None
+        # Реестр активных задач всех обработчиков (хранилище - его копия на диске)
+        self.jobs = JobRegistry()
+        self.scheduler = Scheduler(workers=config.SCHEDULER_WORKERS, lane_workers=config.SCHEDULER_CHAT_WORKERS)
+        self.edits = EditGovernor(
+            chat_rate=config.EDIT_CHAT_RATE,
+            chat_burst=config.EDIT_CHAT_BURST,
+            global_rate=config.EDIT_GLOBAL_RATE,
+            global_burst=config.EDIT_GLOBAL_BURST,
+        )
+        self.fire_sends = FireAdmission(rate=config.FIRE_SEND_RATE, burst=config.FIRE_SEND_BURST)
+        # Будильники и напоминания могут жить в отдельном колесе таймеров
+        if config.REMINDER_SCHEDULER_ENGINE == 'wheel':
+            self.reminder_scheduler = TimingWheelScheduler(
+                workers=config.SCHEDULER_WORKERS, lane_workers=config.SCHEDULER_CHAT_WORKERS,
+            )
+        else:
+            self.reminder_scheduler = self.scheduler
         self.time_parser = TimeParser()
         self.start_time = datetime.now()
 
@@ -65,6 +102,10 @@ class PersonalBot:
         async def timer_command(event):
             await self.timer_handler.handle_timer(event)
 
+        @self.client.on(events.NewMessage(pattern=r'^/cycle\s+(.+)', outgoing=True))
+        async def cycle_command(event):
+            await self.timer_handler.handle_cycle(event)
+
         @self.client.on(events.NewMessage(pattern=r'^/countdown\s+(\d+)', outgoing=True))
         async def countdown_command(event):
             await self.timer_handler.handle_countdown(event)
@@ -226,11 +267,23 @@ class PersonalBot:
         async def clear_chat_command(event):
             await self.system_handler.handle_clear_chat(event)
 
-        @self.client.on(events.NewMessage(pattern=r'^/cancel\s+(timer|wake|mention|all)(?:\s+(\S+))?$', outgoing=True))
+        @self.client.on(events.NewMessage(pattern=r'^/cancel\s+(\S+)(?:\s+(\S+))?$', outgoing=True))
         async def cancel_command(event):
             await self.system_handler.handle_cancel(event)
 
-        @self.client.on(events.NewMessage(pattern=r'^/list(?:\s+(timers|wake|all))?', outgoing=True))
+        @self.client.on(events.NewMessage(pattern=r'^/pause\s+(\S+)$', outgoing=True))
+        async def pause_command(event):
+            await self.system_handler.handle_pause(event)
+
+        @self.client.on(events.NewMessage(pattern=r'^/resume\s+(\S+)$', outgoing=True))
+        async def resume_command(event):
+            await self.system_handler.handle_resume(event)
+
+        @self.client.on(events.NewMessage(pattern=r'^/extend\s+(\S+)\s+(\S+)$', outgoing=True))
+        async def extend_command(event):
+            await self.system_handler.handle_extend(event)
+
+        @self.client.on(events.NewMessage(pattern=r'^/list(?:\s+(.+))?$', outgoing=True))
         async def list_command(event):
             await self.system_handler.handle_list(event)
 
@@ -246,6 +299,14 @@ class PersonalBot:
         async def stats_command(event):
             await self.system_handler.handle_stats(event)
 
+        @self.client.on(events.NewMessage(pattern=r'^/backup(?:\s+(list|restore)(?:\s+(\S+))?)?$', outgoing=True))
+        async def backup_command(event):
+            await self.system_handler.handle_backup(event)
+
+        @self.client.on(events.NewMessage(pattern=r'^/export$', outgoing=True))
+        async def export_command(event):
+            await self.system_handler.handle_export(event)
+
         @self.client.on(events.NewMessage(pattern=r'^/help$', outgoing=True))  
         async def help_command(event):
             await self.system_handler.handle_help(event)
@@ -277,24 +338,118 @@ class PersonalBot:
         self.interactions_handler = InteractionsHandler(self)  # Initialize InteractionsHandler
         logger.info("Обработчики инициализированы.")
 
+        # Короткие id дальних задач из хранилища не должны достаться новым задачам
+        await self.wake_handler.reserve_short_ids()
+
         # Регистрация обработчиков
         self.setup_handlers()
         logger.info("Обработчики зарегистрированы.")
 
-        # Восстанавливаем задачи
-        await self.timer_handler.restore_timers()
-        await self.wake_handler.restore_alarms()
-        await self.mention_handler.restore_mentions()
-        logger.info("Задачи восстановлены.")
+        # Фоновая запись статистики
+        self.stats_flush_task = asyncio.create_task(self.storage.run_stats_flusher())
+        if self.storage.journaled:
+            self.compactor_task = asyncio.create_task(self.storage.run_compactor())
+        if config.BACKUP_INTERVAL > 0:
+            self.backup_task = asyncio.create_task(self.backup.run_scheduler())
+
+        # Общий планировщик задач обработчиков, регулятор их правок и очередь отправки
+        self.edits.start()
+        self.fire_sends.start()
+        self.scheduler.start()
+        self.reminder_scheduler.start()
+
+        # Задачи восстанавливаются в фоне: команды принимаются сразу после подключения,
+        # а команды, меняющие задачи, ждут окончания восстановления (restored)
+        self.restore_task = asyncio.create_task(self.restore_jobs())
+        if config.PERSISTENT_SCHEDULING:
+            # Дальние будильники и напоминания подгружаются по мере приближения
+            self.sweeper_task = asyncio.create_task(self.wake_handler.run_sweeper())
 
         logger.info("Персональный бот успешно запущен и готов к работе.")
         await self.client.run_until_disconnected()
 
+    async def restore_jobs(self):
+        """Восстанавливает задачи из хранилища (без запросов к Telegram)"""
+        started = datetime.now()
+        try:
+            await asyncio.gather(
+                self.timer_handler.restore_timers(),
+                self.wake_handler.restore_alarms(),
+                self.mention_handler.restore_mentions(),
+            )
+        finally:
+            self.restored.set()
+        elapsed = (datetime.now() - started).total_seconds()
+        logger.info(f"Задачи восстановлены за {elapsed:.2f} с.")
+
+    async def restore_backup(self, snapshot_id: str):
+        """Восстанавливает данные из резервной копии и перезапускает задачи
+        
+        Когда снимок прочитан, задачи старых данных снимаются вместе с
+        планировщиками (как при остановке бота) и реестр создается заново;
+        после записи копии ее задачи восстанавливаются так же, как при
+        запуске. Пока это идет, команды, меняющие задачи, ждут restored.
+        
+        Returns:
+            Манифест восстановленного снимка.
+        """
+        dropped = False
+        
+        async def drop_jobs():
+            nonlocal dropped
+            dropped = True
+            if self.sweeper_task:
+                self.sweeper_task.cancel()
+                self.sweeper_task = None
+            await self.scheduler.stop()
+            await self.reminder_scheduler.stop()
+            self.jobs = JobRegistry()
+        
+        self.restored.clear()
+        try:
+            return await self.backup.restore(snapshot_id, before_restore=drop_jobs)
+        finally:
+            if not dropped:
+                # Снимок не прочитан: старые задачи не тронуты
+                self.restored.set()
+            else:
+                self.scheduler.start()
+                self.reminder_scheduler.start()
+                await self.wake_handler.reserve_short_ids()
+                await self.restore_jobs()
+                if config.PERSISTENT_SCHEDULING:
+                    self.sweeper_task = asyncio.create_task(self.wake_handler.run_sweeper())
+
     async def stop(self):
         """Остановка бота"""
         logger.info("Остановка бота...")
-        if hasattr(self, 'timer_handler') and self.timer_handler.active_timers:
+        if len(self.jobs):
             print("\nБот был отключен, но все таймеры сохранены и будут восстановлены при следующем запуске.")
+        if self.stats_flush_task:
+            self.stats_flush_task.cancel()
+        if self.compactor_task:
+            self.compactor_task.cancel()
+        if self.backup_task:
+            self.backup_task.cancel()
+        if self.restore_task:
+            self.restore_task.cancel()
+        if self.sweeper_task:
+            self.sweeper_task.cancel()
+        # Ожидающие задачи остаются в хранилище до следующего запуска
+        await self.scheduler.stop()
+        await self.reminder_scheduler.stop()
+        await self.edits.stop()
+        await self.fire_sends.stop()
+        self.backup.close()
+        try:
+            await self.storage.close()
+            metrics = self.storage.stats_buffer.get_metrics()
+            logger.info(
+                f"Статистика записана: {metrics['flushes']} записей вместо {metrics['increments']}, "
+                f"сэкономлено {metrics['writes_saved_per_sec']:.2f} записей/с"
+            )
+        except Exception as e:
+            logger.error(f"Ошибка записи статистики при остановке: {e}")
         await self.client.disconnect()
 
 async def main():
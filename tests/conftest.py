@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+
+# config.py проверяет обязательные настройки при импорте
+os.environ.setdefault('API_ID', '1')
+os.environ.setdefault('API_HASH', 'test')
+os.environ.setdefault('PHONE_NUMBER', '1')
+os.environ.setdefault('BOT_OWNER_ID', '1')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from utils.async_storage import AsyncStorage
+from utils.backup import BackupManager
+from utils.json_storage import JsonStorage
+from utils.sqlite_storage import SqliteStorage
+
+BACKENDS = {
+    'json': lambda data_dir: JsonStorage(data_dir),
+    'sqlite': lambda data_dir: SqliteStorage(os.path.join(data_dir, 'storage.db')),
+}
+
+def alarm(item_id, chat_id=1):
+    return dict(id=item_id, chat_id=chat_id, message_id=1, user_id=9, fire_at=time.time() + 60)
+
+def run(scenario, backend, tmp_path, **kwargs):
+    async def wrapper():
+        storage = AsyncStorage(BACKENDS[backend](str(tmp_path / 'data')))
+        manager = BackupManager(storage, str(tmp_path / 'backups'), **kwargs)
+        try:
+            await scenario(storage, manager)
+        finally:
+            manager.close()
+            await storage.close()
+    asyncio.run(wrapper())
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend(request):
+    return request.param
+
+def test_create_skips_unchanged_data(tmp_path, backend):
+    async def scenario(storage, manager):
+        await storage.save_alarm(alarm('a1'))
+        first = await manager.create()
+        assert first['new_objects'] > 0
+
+        # Изменений не было: снимок не создается
+        assert (await manager.create())['id'] == first['id']
+        assert (await manager.create(force=True))['id'] == first['id']
+        assert manager.get_metrics()['created'] == 1
+        assert manager.get_metrics()['skipped'] == 2
+    run(scenario, backend, tmp_path)
+
+def test_unchanged_files_are_not_written_again(tmp_path):
+    async def scenario(storage, manager):
+        await storage.save_alarm(alarm('a1'))
+        await storage.save_reminder(alarm('r1'))
+        first = await manager.create()
+        await storage.save_alarm(alarm('a2'))
+        second = await manager.create()
+
+        # Новый объект только для измененного файла будильников
+        assert second['new_objects'] == 1
+        assert second['id'] > first['id']
+        changed = [name for name, entry in second['files'].items() if entry != first['files'].get(name)]
+        assert changed == ['wake_alarms.json']
+    run(scenario, 'json', tmp_path)
+
+@pytest.mark.parametrize('compression', ['gzip', 'lzma', 'none'])
+def test_restore_latest_and_by_id(tmp_path, backend, compression):
+    async def scenario(storage, manager):
+        await storage.save_alarm(alarm('a1'))
+        first = await manager.create()
+        await storage.save_alarm(alarm('a2'))
+        await manager.create()
+        await storage.clear_all_data()
+
+        await manager.restore()
+        assert {item['id'] for item in await storage.get_all_alarms()} == {'a1', 'a2'}
+        restored = await manager.restore(first['id'])
+        assert restored['id'] == first['id']
+        assert [item['id'] for item in await storage.get_all_alarms()] == ['a1']
+    run(scenario, backend, tmp_path, compression=compression)
+
+def test_restore_missing_snapshot_keeps_data(tmp_path, backend):
+    async def scenario(storage, manager):
+        called = []
+
+        async def before_restore():
+            called.append(True)
+        with pytest.raises(FileNotFoundError):
+            await manager.restore(before_restore=before_restore)
+        await storage.save_alarm(alarm('a1'))
+        await manager.create()
+        with pytest.raises(FileNotFoundError):
+            await manager.restore('19700101_000000', before_restore=before_restore)
+        # Снимок не найден - хук не вызывается, данные на месте
+        assert called == []
+        assert (await storage.get_alarm('a1'))['id'] == 'a1'
+    run(scenario, backend, tmp_path)
+
+def test_before_restore_runs_before_data_is_replaced(tmp_path, backend):
+    async def scenario(storage, manager):
+        await storage.save_alarm(alarm('a1'))
+        await manager.create()
+        await storage.save_alarm(alarm('a2'))
+        seen = []
+
+        async def before_restore():
+            seen.append(sorted(item['id'] for item in await storage.get_all_alarms()))
+        await manager.restore(before_restore=before_restore)
+        assert seen == [['a1', 'a2']]
+        assert [item['id'] for item in await storage.get_all_alarms()] == ['a1']
+
+        # После восстановления следующая копия создается снова
+        await storage.save_alarm(alarm('a3'))
+        assert (await manager.create())['new_objects'] == 1
+    run(scenario, backend, tmp_path)
+
+def test_corrupted_object_is_rejected(tmp_path):
+    async def scenario(storage, manager):
+        await storage.save_alarm(alarm('a1'))
+        manifest = await manager.create()
+        entry = manifest['files']['wake_alarms.json']
+        with open(os.path.join(manager.objects_dir, entry['object']), 'wb') as f:
+            f.write(b'[]')
+        with pytest.raises(ValueError):
+            await manager.restore()
+        assert (await storage.get_alarm('a1'))['id'] == 'a1'
+    run(scenario, 'json', tmp_path, compression='none')
+
+def test_prune_keeps_last_snapshots_and_their_objects(tmp_path):
+    async def scenario(storage, manager):
+        ids = []
+        for index in range(4):
+            await storage.save_alarm(alarm(f'a{index}'))
+            ids.append((await manager.create())['id'])
+
+        snapshots = await manager.list()
+        assert [item['id'] for item in snapshots] == ids[-2:]
+        referenced = {entry['object'] for item in snapshots for entry in item['files'].values()}
+        stored = {
+            os.path.join(prefix, filename)
+            for prefix in os.listdir(manager.objects_dir)
+            for filename in os.listdir(os.path.join(manager.objects_dir, prefix))
+        }
+        assert stored == referenced
+        await manager.restore(ids[-2])
+        assert len(await storage.get_all_alarms()) == 3
+    run(scenario, 'json', tmp_path, keep=2)
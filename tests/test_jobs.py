@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from utils.jobs import RESERVED_IDS, Job, JobKind, JobRegistry, to_base36
+
+def job(job_id, chat_id=1, deadline=100.0, kind=JobKind.TIMER, short_id=None):
+    return Job(job_id, kind, chat_id, 1, deadline, short_id=short_id)
+
+def test_to_base36():
+    assert to_base36(0) == '0'
+    assert to_base36(35) == 'z'
+    assert to_base36(36) == '10'
+
+def test_short_ids_are_sequential_and_not_reused():
+    registry = JobRegistry()
+    first = registry.add(job('a'))
+    second = registry.add(job('b'))
+    assert (first.short_id, second.short_id) == ('1', '2')
+    registry.pop('a')
+    # Счетчик только растет: id удаленной задачи не достается новой
+    assert registry.add(job('c')).short_id == '3'
+    assert registry.resolve('1') is None
+
+def test_reserved_words_are_skipped():
+    registry = JobRegistry()
+    registry.reserve_short_ids(int('all', 36))
+    issued = registry.add(job('a')).short_id
+    assert issued not in RESERVED_IDS
+    assert issued == to_base36(int('all', 36) + 1)
+
+def test_restored_short_id_is_kept_and_moves_counter():
+    registry = JobRegistry()
+    restored = registry.add(job('old', short_id='k'))
+    assert restored.short_id == 'k'
+    assert registry.short_id_floor == int('k', 36) + 1
+    assert registry.add(job('new')).short_id == 'l'
+
+def test_taken_short_id_gets_a_new_one():
+    registry = JobRegistry()
+    registry.add(job('a', short_id='5'))
+    clash = registry.add(job('b', short_id='5'))
+    assert clash.short_id != '5'
+    assert registry.resolve('5').id == 'a'
+
+def test_replacing_job_keeps_short_id():
+    registry = JobRegistry()
+    registry.add(job('a'))
+    replaced = registry.add(job('a', chat_id=2))
+    assert replaced.short_id == '1'
+    assert len(registry) == 1
+    assert registry.in_chat(1) == []
+
+def test_reserve_short_ids_only_raises_floor():
+    registry = JobRegistry()
+    registry.reserve_short_ids(10)
+    registry.reserve_short_ids(3)
+    assert registry.short_id_floor == 10
+    assert registry.add(job('a')).short_id == 'a'
+
+def test_resolve_by_short_or_full_id():
+    registry = JobRegistry()
+    registry.add(job('timer_1', short_id='ab'))
+    assert registry.resolve('AB').id == 'timer_1'
+    assert registry.resolve('timer_1').short_id == 'ab'
+    assert registry.resolve('zz') is None
+
+def test_indexes_by_kind_and_chat():
+    registry = JobRegistry()
+    registry.add(job('t', chat_id=1))
+    registry.add(job('a', chat_id=1, kind=JobKind.ALARM))
+    registry.add(job('r', chat_id=2, kind=JobKind.REMINDER))
+    assert [item.id for item in registry.of_kind(JobKind.ALARM, JobKind.REMINDER)] == ['a', 'r']
+    assert registry.count(JobKind.TIMER) == 1
+    assert registry.count_in_chat(1) == 2
+    registry.pop('t')
+    registry.pop('a')
+    assert registry.count_in_chat(1) == 0
+    assert registry.in_chat(1) == []
+
+def test_upcoming_follows_deadlines_and_retime():
+    registry = JobRegistry()
+    for job_id, deadline in (('c', 30.0), ('a', 10.0), ('b', 20.0)):
+        registry.add(job(job_id, deadline=deadline, chat_id=1 if job_id != 'b' else 2))
+    assert [item.id for item in registry.upcoming()] == ['a', 'b', 'c']
+    assert [item.id for item in registry.upcoming(offset=1, limit=1)] == ['b']
+    assert [item.id for item in registry.upcoming(chat_id=1)] == ['a', 'c']
+
+    registry.retime(registry.get('c'), 5.0)
+    assert [item.id for item in registry.upcoming()] == ['c', 'a', 'b']
+    # Задачи на паузе - в конце, по остатку
+    registry.retime(registry.get('c'), 5.0, paused=1.0)
+    registry.retime(registry.get('a'), 10.0, paused=0.5)
+    assert [item.id for item in registry.upcoming()] == ['b', 'a', 'c']
+    assert registry.get('a').remaining(1000.0) == 0.5
+
+def test_upcoming_filters_kinds():
+    registry = JobRegistry()
+    registry.add(job('t', deadline=1.0))
+    registry.add(job('a', deadline=2.0, kind=JobKind.ALARM))
+    registry.add(job('r', deadline=3.0, kind=JobKind.REMINDER))
+    kinds = (JobKind.ALARM, JobKind.REMINDER)
+    assert [item.id for item in registry.upcoming(kinds=kinds)] == ['a', 'r']
+    assert [item.id for item in registry.upcoming(kinds=kinds, offset=1)] == ['r']
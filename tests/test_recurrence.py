@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+
+import pytest
+
+from utils.recurrence import Recurrence, parse_recurring
+
+def test_sunday_spellings_match():
+    expected = Recurrence("0 9 * * 0").weekdays
+    assert expected == {0}
+    assert Recurrence("0 9 * * 7").weekdays == expected
+    assert Recurrence("0 9 * * sun").weekdays == expected
+    assert Recurrence("0 9 * * вс").weekdays == expected
+
+def test_weekday_range_ending_on_seven():
+    assert Recurrence("0 9 * * 5-7").weekdays == {5, 6, 0}
+
+@pytest.mark.parametrize('expression', ["0 9 * * 8", "60 * * * *", "0 24 * * *", "0 0 0 * *", "0 0 * 13 *", "*/0 * * * *"])
+def test_out_of_range_rejected(expression):
+    with pytest.raises(ValueError):
+        Recurrence(expression)
+
+def test_wrong_field_count():
+    with pytest.raises(ValueError):
+        Recurrence("0 9 * *")
+
+def test_next_after_same_day():
+    rule = Recurrence("30 9 * * *")
+    assert rule.next_after(datetime(2024, 3, 1, 8, 0)) == datetime(2024, 3, 1, 9, 30)
+    # Строго после: само время срабатывания не возвращается
+    assert rule.next_after(datetime(2024, 3, 1, 9, 30)) == datetime(2024, 3, 2, 9, 30)
+
+def test_next_after_weekday():
+    # 2024-03-01 - пятница
+    rule = Recurrence("0 9 * * 1")
+    assert rule.next_after(datetime(2024, 3, 1, 12, 0)) == datetime(2024, 3, 4, 9, 0)
+    assert Recurrence("0 9 * * 7").next_after(datetime(2024, 3, 1, 12, 0)) == datetime(2024, 3, 3, 9, 0)
+
+def test_next_after_day_of_month_or_weekday():
+    # Ограничены оба поля: срабатывает по любому из них
+    rule = Recurrence("0 9 13 * 5")
+    assert rule.next_after(datetime(2024, 3, 1, 12, 0)) == datetime(2024, 3, 8, 9, 0)
+    assert rule.next_after(datetime(2024, 3, 12, 12, 0)) == datetime(2024, 3, 13, 9, 0)
+
+def test_next_after_skips_short_months():
+    rule = Recurrence("0 0 31 * *")
+    assert rule.next_after(datetime(2024, 1, 31, 0, 0)) == datetime(2024, 3, 31, 0, 0)
+
+def test_next_after_leap_day():
+    rule = Recurrence("0 12 29 2 *")
+    assert rule.next_after(datetime(2024, 3, 1)) == datetime(2028, 2, 29, 12, 0)
+
+def test_next_after_year_rollover():
+    rule = Recurrence("15 0 1 1 *")
+    assert rule.next_after(datetime(2024, 12, 31, 23, 59)) == datetime(2025, 1, 1, 0, 15)
+
+def test_never_firing_rule():
+    with pytest.raises(ValueError):
+        Recurrence("0 0 30 2 *").next_after(datetime(2024, 1, 1))
+
+def test_step_values():
+    assert Recurrence("*/15 * * * *").minutes == {0, 15, 30, 45}
+    assert Recurrence("10-30/10 * * * *").minutes == {10, 20, 30}
+
+def test_parse_every():
+    rule, text = parse_recurring("every weekday 07:05 подъем")
+    assert rule.expression == "5 7 * * 1-5"
+    assert text == "подъем"
+    rule, _ = parse_recurring("every mon,fri 9:00 отчет")
+    assert rule.weekdays == {1, 5}
+
+def test_parse_cron_and_plain_text():
+    rule, text = parse_recurring("cron 0 9 * * 7 созвон")
+    assert rule.weekdays == {0}
+    assert text == "созвон"
+    assert parse_recurring("просто текст") is None
+    with pytest.raises(ValueError):
+        parse_recurring("every day 25:00 текст")
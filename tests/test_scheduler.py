@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+
+from utils.scheduler import Scheduler
+from utils.timing_wheel import TimingWheelScheduler
+
+def run(scenario, engine=Scheduler, **kwargs):
+    async def wrapper():
+        scheduler = engine(**kwargs)
+        scheduler.start()
+        try:
+            await scenario(scheduler)
+        finally:
+            await scheduler.stop()
+    asyncio.run(wrapper())
+
+def recorder():
+    fired = []
+
+    async def record(name):
+        fired.append(name)
+    return fired, record
+
+def test_fires_in_deadline_order():
+    async def scenario(scheduler):
+        fired, record = recorder()
+        for name, delay in (('c', 0.06), ('a', 0.02), ('b', 0.04), ('now', 0)):
+            scheduler.call_later(delay, record, name)
+        await asyncio.sleep(0.15)
+        assert fired == ['now', 'a', 'b', 'c']
+        assert scheduler.fired == 4
+        assert len(scheduler) == 0
+    run(scenario)
+
+def test_wheel_fires_in_deadline_order():
+    async def scenario(scheduler):
+        fired, record = recorder()
+        scheduler.call_later(2, record, 'late')
+        scheduler.call_later(1, record, 'early')
+        scheduler.call_later(0, record, 'now')
+        await asyncio.sleep(0.1)
+        assert fired == ['now']
+        # Точность колеса - секунда: задача срабатывает на границе секунды после срока
+        await asyncio.sleep(3.1)
+        assert fired == ['now', 'early', 'late']
+    run(scenario, TimingWheelScheduler)
+
+@pytest.mark.parametrize('engine', [Scheduler, TimingWheelScheduler])
+def test_cancel_pending_runs_on_cancel(engine):
+    async def scenario(scheduler):
+        fired, record = recorder()
+        cancelled = []
+
+        async def on_cancel():
+            cancelled.append('x')
+        handle = scheduler.call_later(0.5, record, 'x', job_id='x', on_cancel=on_cancel)
+        assert handle.pending
+        assert scheduler.cancel('x')
+        assert not scheduler.cancel('x')
+        await asyncio.sleep(0.01)
+        assert cancelled == ['x']
+        assert handle.done()
+        await asyncio.sleep(0.6)
+        assert fired == []
+        assert len(scheduler) == 0
+    run(scenario, engine)
+
+def test_cancel_running_interrupts_task():
+    async def scenario(scheduler):
+        events = []
+
+        async def long_job():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                events.append('interrupted')
+                raise
+        handle = scheduler.call_later(0, long_job, job_id='long')
+        await asyncio.sleep(0.02)
+        assert handle.running
+        assert handle.cancel()
+        await asyncio.sleep(0.02)
+        assert events == ['interrupted']
+        assert handle.done()
+    run(scenario)
+
+def test_same_job_id_replaces_pending():
+    async def scenario(scheduler):
+        fired, record = recorder()
+        first = scheduler.call_later(0.02, record, 'first', job_id='job')
+        scheduler.call_later(0.04, record, 'second', job_id='job')
+        assert first.done()
+        await asyncio.sleep(0.1)
+        assert fired == ['second']
+    run(scenario)
+
+@pytest.mark.parametrize('engine', [Scheduler, TimingWheelScheduler])
+def test_pause_and_resume(engine):
+    async def scenario(scheduler):
+        fired, record = recorder()
+        handle = scheduler.call_later(0.05, record, 'x')
+        assert scheduler.pause(handle)
+        assert not scheduler.pause(handle)
+        assert len(scheduler) == 0
+        await asyncio.sleep(0.1)
+        assert fired == []
+
+        assert scheduler.reschedule(handle, scheduler.time())
+        await asyncio.sleep(0.05)
+        assert fired == ['x']
+        assert not scheduler.reschedule(handle, scheduler.time())
+    run(scenario, engine)
+
+def test_reschedule_moves_pending_job():
+    async def scenario(scheduler):
+        fired, record = recorder()
+        moved = scheduler.call_later(0.02, record, 'moved')
+        scheduler.call_later(0.04, record, 'fixed')
+        assert scheduler.reschedule(moved, scheduler.time() + 0.06)
+        await asyncio.sleep(0.12)
+        assert fired == ['fixed', 'moved']
+    run(scenario)
+
+def test_lane_limits_concurrency_per_chat():
+    async def scenario(scheduler):
+        active = {}
+        peak = {}
+
+        async def job(lane):
+            active[lane] = active.get(lane, 0) + 1
+            peak[lane] = max(peak.get(lane, 0), active[lane])
+            await asyncio.sleep(0.02)
+            active[lane] -= 1
+        for index in range(4):
+            scheduler.call_later(0, job, 'busy', lane='busy')
+        scheduler.call_later(0, job, 'other', lane='other')
+        await asyncio.sleep(0.03)
+        # Полоса other не ждет очередь полосы busy
+        assert peak == {'busy': 1, 'other': 1}
+        assert active['other'] == 0
+        await asyncio.sleep(0.1)
+        assert scheduler.fired == 5
+        # Опустевшие полосы удаляются
+        assert scheduler.get_lane_metrics() == []
+    run(scenario, lane_workers=1)
+
+def test_stop_forgets_pending_without_on_cancel():
+    async def scenario():
+        scheduler = Scheduler()
+        scheduler.start()
+        cancelled = []
+
+        async def on_cancel():
+            cancelled.append('x')
+
+        async def noop():
+            pass
+        scheduler.call_later(10, noop, on_cancel=on_cancel)
+        await scheduler.stop()
+        await asyncio.sleep(0.01)
+        assert cancelled == []
+        assert len(scheduler) == 0
+
+        # После stop() планировщик можно запустить снова
+        scheduler.start()
+        fired, record = recorder()
+        scheduler.call_later(0, record, 'again')
+        await asyncio.sleep(0.02)
+        assert fired == ['again']
+        await scheduler.stop()
+    asyncio.run(scenario())
+
+def test_failing_job_does_not_stop_dispatcher():
+    async def scenario(scheduler):
+        fired, record = recorder()
+
+        async def fail():
+            raise RuntimeError('boom')
+        scheduler.call_later(0, fail)
+        scheduler.call_later(0.01, record, 'after')
+        await asyncio.sleep(0.05)
+        assert fired == ['after']
+    run(scenario)
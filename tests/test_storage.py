@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from utils.async_storage import AsyncStorage
+from utils.json_storage import JsonStorage
+from utils.sharded_storage import ShardedJsonStorage
+from utils.sqlite_storage import SqliteStorage, migrate_json_to_sqlite
+
+BACKENDS = {
+    'json': lambda data_dir, durability: JsonStorage(data_dir, serializer='orjson', durability=durability),
+    'journal': lambda data_dir, durability: JsonStorage(data_dir, journal=True, durability=durability),
+    'sharded': lambda data_dir, durability: ShardedJsonStorage(data_dir, durability=durability),
+    'sqlite': lambda data_dir, durability: SqliteStorage(os.path.join(data_dir, 'storage.db'), durability=durability),
+}
+DURABILITY = ('none', 'batch', 'always')
+
+def close(storage):
+    if hasattr(storage, 'close'):
+        storage.close()
+    else:
+        storage.flush()
+
+def alarm(item_id, chat_id=1, fire_in=60.0, **fields):
+    return dict(id=item_id, chat_id=chat_id, message_id=1, user_id=9, fire_at=time.time() + fire_in, **fields)
+
+@pytest.fixture(params=sorted(BACKENDS))
+def backend(request):
+    return request.param
+
+@pytest.mark.parametrize('durability', DURABILITY)
+def test_round_trip(tmp_path, backend, durability):
+    storage = BACKENDS[backend](str(tmp_path), durability)
+    storage.save_alarm(alarm('a1', chat_id=1, short_id='1'))
+    storage.save_alarm(alarm('a2', chat_id=2, short_id='2'))
+    storage.save_reminder(alarm('r1', text='молоко'))
+    storage.save_timer(dict(id='t1', chat_id=1, message_id=5, duration=30))
+    storage.save_mention(dict(id='m1', chat_id=3, message_id=6))
+    assert storage.update_fields('alarms', 'a1', {'paused_remaining': 12.5, 'short_id': None})
+    assert not storage.update_fields('alarms', 'missing', {'fire_at': 1.0})
+    assert storage.remove_alarm('a2')
+    assert not storage.remove_alarm('a2')
+    storage.increment_command_usage('wake')
+    storage.increment_alarms_created()
+    close(storage)
+
+    reopened = BACKENDS[backend](str(tmp_path), durability)
+    stored = reopened.get_alarm('a1')
+    assert stored['paused_remaining'] == 12.5
+    assert 'short_id' not in stored
+    assert reopened.get_alarm('a2') is None
+    assert [item['id'] for item in reopened.get_all_alarms()] == ['a1']
+    assert reopened.get_reminder('r1')['text'] == 'молоко'
+    assert reopened.get_timers(['t1', 'nope'])[0]['duration'] == 30
+    assert reopened.get_mention('m1')['chat_id'] == 3
+    assert reopened.get_ids('alarms', 1) == ['a1']
+    assert reopened.get_ids('alarms', 2) == []
+    assert reopened.get_command_usage('wake') == 1
+    assert reopened.get_stats()['alarms_created'] == 1
+    close(reopened)
+
+def test_save_replaces_item(tmp_path, backend):
+    storage = BACKENDS[backend](str(tmp_path), 'none')
+    storage.save_alarm(alarm('a1', chat_id=1))
+    storage.save_alarm(alarm('a1', chat_id=2, message_count=3))
+    assert len(storage.get_all_alarms()) == 1
+    assert storage.get_alarm('a1')['message_count'] == 3
+    assert storage.get_ids('alarms', 1) == []
+    assert storage.get_ids('alarms', 2) == ['a1']
+    close(storage)
+
+def test_due_items(tmp_path, backend):
+    storage = BACKENDS[backend](str(tmp_path), 'none')
+    now = time.time()
+    storage.save_reminder(alarm('late', fire_in=7200))
+    storage.save_reminder(alarm('soon', chat_id=2, fire_in=10))
+    storage.save_reminder(alarm('past', chat_id=3, fire_in=-10))
+    assert [item['id'] for item in storage.get_due_items('reminders', now + 3600)] == ['past', 'soon']
+
+    # Перенос и удаление видны в следующей выборке
+    storage.update_fields('reminders', 'late', {'fire_at': now + 5})
+    storage.remove_reminder('past')
+    assert [item['id'] for item in storage.get_due_items('reminders', now + 3600)] == ['late', 'soon']
+    close(storage)
+
+    reopened = BACKENDS[backend](str(tmp_path), 'none')
+    assert [item['id'] for item in reopened.get_due_items('reminders', now + 3600)] == ['late', 'soon']
+    assert reopened.get_due_items('reminders', now - 60) == []
+    close(reopened)
+
+def test_short_id_lookup(tmp_path, backend):
+    storage = BACKENDS[backend](str(tmp_path), 'none')
+    storage.save_reminder(alarm('r1', chat_id=1, short_id='a'))
+    storage.save_reminder(alarm('r2', chat_id=2, short_id='b'))
+    assert storage.get_by_short_id('reminders', 'a')['id'] == 'r1'
+    assert storage.get_by_short_id('reminders', 'zz') is None
+    storage.update_fields('reminders', 'r1', {'short_id': 'c'})
+    assert storage.get_by_short_id('reminders', 'a') is None
+    assert storage.get_by_short_id('reminders', 'c')['id'] == 'r1'
+    storage.remove_reminder('r2')
+    assert storage.get_by_short_id('reminders', 'b') is None
+    close(storage)
+
+    reopened = BACKENDS[backend](str(tmp_path), 'none')
+    assert reopened.get_by_short_id('reminders', 'c')['id'] == 'r1'
+    close(reopened)
+
+def test_clear(tmp_path, backend):
+    storage = BACKENDS[backend](str(tmp_path), 'none')
+    storage.save_alarm(alarm('a1'))
+    storage.save_timer(dict(id='t1', chat_id=1))
+    storage.increment_timers_created()
+    storage.clear_alarms()
+    assert storage.get_all_alarms() == []
+    assert storage.get_timer('t1') is not None
+    storage.clear_all_data()
+    assert storage.get_all_timers() == []
+    assert storage.get_stats()['timers_created'] == 1
+    close(storage)
+
+@pytest.mark.parametrize('target', sorted(BACKENDS))
+def test_snapshot_restore_across_backends(tmp_path, backend, target):
+    source = BACKENDS[backend](str(tmp_path / 'source'), 'none')
+    source.save_alarm(alarm('a1', short_id='1'))
+    source.save_reminder(alarm('r1', chat_id=2, text='x'))
+    source.increment_command_usage('remind')
+    files = source.snapshot_files()
+    close(source)
+
+    storage = BACKENDS[target](str(tmp_path / 'target'), 'none')
+    storage.save_alarm(alarm('old'))
+    storage.restore_files(files)
+    assert [item['id'] for item in storage.get_all_alarms()] == ['a1']
+    assert storage.get_by_short_id('alarms', '1')['id'] == 'a1'
+    assert storage.get_reminder('r1')['text'] == 'x'
+    assert storage.get_command_usage('remind') == 1
+    close(storage)
+
+    reopened = BACKENDS[target](str(tmp_path / 'target'), 'none')
+    assert [item['id'] for item in reopened.get_all_alarms()] == ['a1']
+    close(reopened)
+
+def test_journal_compaction(tmp_path):
+    storage = JsonStorage(str(tmp_path), journal=True, journal_compact_threshold=5)
+    for index in range(10):
+        storage.save_timer(dict(id=f't{index}', chat_id=1))
+    storage.remove_timer('t0')
+    storage.compact_all()
+    assert storage.journals['timers'].records == 0
+    close(storage)
+
+    reopened = JsonStorage(str(tmp_path), journal=True)
+    assert len(reopened.get_all_timers()) == 9
+    close(reopened)
+
+def test_flat_files_migrate_to_shards(tmp_path):
+    flat = JsonStorage(str(tmp_path))
+    flat.save_alarm(alarm('a1', chat_id=1))
+    flat.save_alarm(alarm('a2', chat_id=2))
+    close(flat)
+
+    sharded = ShardedJsonStorage(str(tmp_path))
+    assert sharded.get_ids('alarms', 2) == ['a2']
+    assert sharded.get_shard_metrics()['shards'] == 2
+    assert os.path.exists(tmp_path / 'wake_alarms.json.migrated')
+    close(sharded)
+
+def test_json_to_sqlite_migration(tmp_path):
+    flat = JsonStorage(str(tmp_path), journal=True)
+    flat.save_reminder(alarm('r1', text='x'))
+    flat.increment_command_usage('remind')
+    flat.stats_buffer.flush()
+
+    counts = migrate_json_to_sqlite(str(tmp_path), str(tmp_path / 'storage.db'))
+    assert counts['reminders'] == 1
+    storage = SqliteStorage(str(tmp_path / 'storage.db'))
+    assert storage.get_reminder('r1')['text'] == 'x'
+    assert storage.get_command_usage('remind') == 1
+    close(storage)
+
+def test_stats_threshold_flush(tmp_path, backend):
+    storage = BACKENDS[backend](str(tmp_path), 'none')
+    storage.stats_buffer.flush_threshold = 3
+    assert not storage.increment_counter('x')
+    assert not storage.increment_counter('x')
+    assert storage.increment_counter('x')
+
+    # Без flush: счетчик уже записан по порогу
+    reopened = BACKENDS[backend](str(tmp_path), 'none')
+    assert reopened.get_stats()['x'] == 3
+    assert not storage.raise_counter('x', 2)
+    close(reopened)
+    close(storage)
+
+@pytest.mark.parametrize('durability', DURABILITY)
+def test_async_writes_are_durable_when_awaited(tmp_path, backend, durability):
+    async def scenario():
+        storage = AsyncStorage(BACKENDS[backend](str(tmp_path), durability), commit_window=0.001)
+        await asyncio.gather(*(storage.save_alarm(alarm(f'a{index}', chat_id=index % 3)) for index in range(20)))
+        await storage.update_fields('alarms', 'a1', {'paused_remaining': 5})
+        await storage.remove_alarm('a2')
+
+        # Другой экземпляр читает файлы/базу: ожидание записи означает, что она на диске
+        reader = BACKENDS[backend](str(tmp_path), 'none')
+        ids = {item['id'] for item in reader.get_all_alarms()}
+        assert ids == {f'a{index}' for index in range(20)} - {'a2'}
+        assert reader.get_alarm('a1')['paused_remaining'] == 5
+        close(reader)
+
+        if durability == 'batch':
+            metrics = storage.get_commit_metrics()
+            assert metrics['commits'] < metrics['writes']
+        copy = await storage.get_alarm('a1')
+        copy['chat_id'] = 'changed'
+        assert (await storage.get_alarm('a1'))['chat_id'] == 1
+        await storage.close()
+
+    asyncio.run(scenario())
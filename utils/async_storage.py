@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class AsyncStorage:
+    """Единое асинхронное хранилище бота поверх подключаемого бэкенда.
+
+    Бэкенд (JsonStorage или SqliteStorage) держит данные в памяти и пишет
+    их на диск атомарно. Все обращения к нему, включая сериализацию и
+    запись, выполняются в одном выделенном потоке: поток играет роль
+    блокировки, операции идут строго в порядке вызова, а медленный диск
+    не блокирует цикл событий.
+    """
+
+    def __init__(self, backend, commit_window: float = 0.005):
+        """
+        Args:
+            backend: JsonStorage или SqliteStorage.
+            commit_window: Окно групповой фиксации (секунды) для durability='batch'.
+        """
+        self.backend = backend
+        self.stats_buffer = backend.stats_buffer
+        self.commit_window = commit_window
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='storage-writer')
+        self._commit_future: Optional[asyncio.Future] = None
+
+        self.changes = 0
+
+        # Метрики групповой фиксации
+        self.commit_writes = 0
+        self.commits = 0
+
+    async def _call(self, method, *args) -> Any:
+        """Выполняет метод хранилища в потоке записи и ждет результата."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args))
+
+    async def _write(self, method, *args) -> Any:
+        """Выполняет изменение и ждет, пока оно будет надежно записано."""
+        self.changes += 1
+        result = await self._call(method, *args)
+        if self.batched:
+            await self._group_commit()
+        return result
+
+    @property
+    def batched(self) -> bool:
+        return getattr(self.backend, 'durability', 'none') == 'batch'
+
+    async def _group_commit(self):
+        """Присоединяется к текущей группе фиксации или открывает новую.
+
+        Все изменения, пришедшие в течение commit_window, записываются
+        одной операцией записи и одним fsync на файл.
+        """
+        self.commit_writes += 1
+        if self._commit_future is None:
+            loop = asyncio.get_running_loop()
+            self._commit_future = loop.create_future()
+            asyncio.create_task(self._run_commit(self._commit_future))
+        await asyncio.shield(self._commit_future)
+
+    async def _run_commit(self, future: asyncio.Future):
+        await asyncio.sleep(self.commit_window)
+        # Изменения после этой точки попадут в следующую группу
+        self._commit_future = None
+        try:
+            await self._call(self.backend.commit)
+            self.commits += 1
+            future.set_result(None)
+        except Exception as e:
+            logger.error(f"Ошибка групповой фиксации: {e}")
+            future.set_exception(e)
+
+    def get_commit_metrics(self) -> Dict[str, float]:
+        """Сколько изменений в среднем приходится на одну групповую фиксацию."""
+        return {
+            'writes': self.commit_writes,
+            'commits': self.commits,
+            'writes_per_commit': self.commit_writes / self.commits if self.commits else 0.0,
+        }
+
+    @staticmethod
+    def _copied(method, *args) -> Any:
+        """Вызывает метод чтения и возвращает копии записей.
+
+        Записи в кэше хранилища принадлежат потоку записи; обработчики
+        получают собственные копии и могут свободно их изменять.
+        """
+        result = method(*args)
+        if isinstance(result, list):
+            return [dict(item) for item in result]
+        return dict(result) if result is not None else None
+
+    async def flush(self) -> None:
+        """Записывает все накопленные изменения на диск."""
+        await self._call(self.backend.flush)
+
+    async def close(self) -> None:
+        """Записывает изменения и останавливает поток записи."""
+        try:
+            await self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    async def run_stats_flusher(self):
+        """Фоновая периодическая запись накопленной статистики."""
+        try:
+            while True:
+                await asyncio.sleep(self.stats_buffer.flush_interval)
+                try:
+                    if await self._call(self.stats_buffer.flush) and self.batched:
+                        await self._group_commit()
+                except Exception as e:
+                    logger.error(f"Ошибка записи статистики: {e}")
+        except asyncio.CancelledError:
+            pass
+
+    async def run_compactor(self):
+        """Фоновое сжатие журналов коллекций (только для JsonStorage с журналом)."""
+        try:
+            while True:
+                await asyncio.sleep(self.backend.journal_compact_interval)
+                try:
+                    await self._write(self.backend.compact_all)
+                except Exception as e:
+                    logger.error(f"Ошибка сжатия журнала: {e}")
+        except asyncio.CancelledError:
+            pass
+
+    async def export_pretty(self, dest_dir: str) -> List[str]:
+        """Выгружает все данные в читаемом JSON с отступами."""
+        return await self._call(self.backend.export_pretty, dest_dir)
+
+    async def snapshot_files(self) -> Dict[str, bytes]:
+        """Содержимое всех файлов данных для резервной копии."""
+        return await self._call(self.backend.snapshot_files)
+
+    async def restore_files(self, files: Dict[str, bytes]) -> None:
+        """Заменяет все данные содержимым резервной копии."""
+        await self._write(self.backend.restore_files, files)
+
+    @property
+    def change_count(self) -> int:
+        """Счетчик изменений задач и статистики (для пропуска неизмененных копий)."""
+        return self.changes + self.stats_buffer.increments
+
+    async def clear_all_data(self) -> None:
+        """Очищает все задачи (используется для полного сброса)."""
+        await self._write(self.backend.clear_all_data)
+        logger.info("Все данные очищены")
+
+    @property
+    def journaled(self) -> bool:
+        return bool(getattr(self.backend, 'journals', None))
+
+    async def get_many(self, key: str, item_ids: Iterable[str]) -> List[Dict]:
+        return await self._call(self._copied, self.backend.get_many, key, list(item_ids))
+
+    async def get_ids(self, key: str, chat_id: Optional[int] = None) -> List[str]:
+        """Id записей коллекции (всех или одного чата) без чтения самих записей в обработчик."""
+        return await self._call(self.backend.get_ids, key, chat_id)
+
+    async def get_by_short_id(self, key: str, short_id: str) -> Optional[Dict]:
+        """Запись коллекции по короткому id задачи (по индексу бэкенда, без перебора)."""
+        return await self._call(self._copied, self.backend.get_by_short_id, key, short_id)
+
+    async def get_due_items(self, key: str, until: float) -> List[Dict]:
+        """Задачи коллекции со временем срабатывания до until (Unix time), по возрастанию."""
+        return await self._call(self._copied, self.backend.get_due_items, key, until)
+
+    async def update_fields(self, key: str, item_id: str, fields: Dict) -> bool:
+        """Меняет отдельные поля записи (None удаляет поле), не перезаписывая ее целиком."""
+        return await self._write(self.backend.update_fields, key, item_id, dict(fields))
+
+    # Timer methods
+    async def get_all_timers(self) -> List[Dict]:
+        return await self._call(self._copied, self.backend.get_all_timers)
+
+    async def get_timer(self, timer_id: str) -> Optional[Dict]:
+        return await self._call(self._copied, self.backend.get_timer, timer_id)
+
+    async def get_timers(self, timer_ids: Iterable[str]) -> List[Dict]:
+        return await self._call(self._copied, self.backend.get_timers, list(timer_ids))
+
+    async def save_timer(self, timer_data: Dict) -> None:
+        await self._write(self.backend.save_timer, dict(timer_data))
+
+    async def remove_timer(self, timer_id: str) -> bool:
+        return await self._write(self.backend.remove_timer, timer_id)
+
+    async def clear_timers(self) -> None:
+        await self._write(self.backend.clear_timers)
+
+    # Alarm methods
+    async def get_all_alarms(self) -> List[Dict]:
+        return await self._call(self._copied, self.backend.get_all_alarms)
+
+    async def get_alarm(self, alarm_id: str) -> Optional[Dict]:
+        return await self._call(self._copied, self.backend.get_alarm, alarm_id)
+
+    async def get_alarms(self, alarm_ids: Iterable[str]) -> List[Dict]:
+        return await self._call(self._copied, self.backend.get_alarms, list(alarm_ids))
+
+    async def save_alarm(self, alarm_data: Dict) -> None:
+        await self._write(self.backend.save_alarm, dict(alarm_data))
+
+    async def remove_alarm(self, alarm_id: str) -> bool:
+        return await self._write(self.backend.remove_alarm, alarm_id)
+
+    async def clear_alarms(self) -> None:
+        await self._write(self.backend.clear_alarms)
+
+    # Reminder methods
+    async def get_all_reminders(self) -> List[Dict]:
+        return await self._call(self._copied, self.backend.get_all_reminders)
+
+    async def get_reminder(self, reminder_id: str) -> Optional[Dict]:
+        return await self._call(self._copied, self.backend.get_reminder, reminder_id)
+
+    async def get_reminders(self, reminder_ids: Iterable[str]) -> List[Dict]:
+        return await self._call(self._copied, self.backend.get_reminders, list(reminder_ids))
+
+    async def save_reminder(self, reminder_data: Dict) -> None:
+        await self._write(self.backend.save_reminder, dict(reminder_data))
+
+    async def remove_reminder(self, reminder_id: str) -> bool:
+        return await self._write(self.backend.remove_reminder, reminder_id)
+
+    async def clear_reminders(self) -> None:
+        await self._write(self.backend.clear_reminders)
+
+    # Mention methods
+    async def get_all_mentions(self) -> List[Dict]:
+        return await self._call(self._copied, self.backend.get_all_mentions)
+
+    async def get_mention(self, mention_id: str) -> Optional[Dict]:
+        return await self._call(self._copied, self.backend.get_mention, mention_id)
+
+    async def get_mentions(self, mention_ids: Iterable[str]) -> List[Dict]:
+        return await self._call(self._copied, self.backend.get_mentions, list(mention_ids))
+
+    async def save_mention(self, mention_data: Dict) -> None:
+        await self._write(self.backend.save_mention, dict(mention_data))
+
+    async def remove_mention(self, mention_id: str) -> bool:
+        return await self._write(self.backend.remove_mention, mention_id)
+
+    async def clear_mentions(self) -> None:
+        await self._write(self.backend.clear_mentions)
+
+    # Stats methods
+    async def get_stats(self) -> Dict:
+        # Копия, чтобы поток записи не менял словарь во время чтения
+        return await self._call(lambda: json_copy(self.backend.get_stats()))
+
+    async def _increment(self, method, *args) -> None:
+        """Изменяет счетчик; если порог буфера вызвал запись, фиксирует ее вместе с группой."""
+        if await self._call(method, *args) and self.batched:
+            await self._group_commit()
+
+    async def increment_command_usage(self, command: str) -> None:
+        await self._increment(self.backend.increment_command_usage, command)
+
+    async def increment_counter(self, counter_name: str) -> None:
+        await self._increment(self.backend.increment_counter, counter_name)
+
+    async def raise_counter(self, counter_name: str, value: int) -> None:
+        await self._increment(self.backend.raise_counter, counter_name, value)
+
+    async def increment_timers_created(self) -> None:
+        await self._increment(self.backend.increment_timers_created)
+
+    async def increment_alarms_created(self) -> None:
+        await self._increment(self.backend.increment_alarms_created)
+
+    async def increment_mentions_created(self) -> None:
+        await self._increment(self.backend.increment_mentions_created)
+
+    async def get_command_usage(self, command: str) -> int:
+        return await self._call(self.backend.get_command_usage, command)
+
+    async def get_total_commands(self) -> int:
+        return await self._call(self.backend.get_total_commands)
+
+    async def get_last_command_time(self) -> str:
+        return await self._call(self.backend.get_last_command_time)
+
+def json_copy(data: Dict) -> Dict:
+    """Глубокая копия словаря статистики (только dict и скаляры)."""
+    return {k: json_copy(v) if isinstance(v, dict) else v for k, v in data.items()}
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import lzma
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from utils.serializers import PrettyJsonSerializer
+
+logger = logging.getLogger(__name__)
+
+# Сжатие объектов: расширение файла, упаковка, распаковка
+COMPRESSORS = {
+    'gzip': ('.gz', gzip.compress, gzip.decompress),
+    'lzma': ('.xz', lzma.compress, lzma.decompress),
+    'none': ('', bytes, bytes),
+}
+
+class BackupManager:
+    """Инкрементальные резервные копии с адресацией по содержимому.
+
+    Каждый файл данных сохраняется как сжатый объект ``objects/<sha256>``,
+    а снимок - это небольшой манифест ``snapshots/<id>.json`` со списком
+    хэшей. Неизмененные файлы не записываются повторно, а если с прошлой
+    копии не было ни одного изменения, снимок не создается вовсе.
+    Сжатие и запись выполняются в отдельном потоке.
+    """
+
+    def __init__(self, storage, backup_dir: str = 'backups', compression: str = 'gzip',
+                 keep: int = 48, interval: float = 3600.0):
+        """
+        Args:
+            storage: AsyncStorage, из которого берутся данные.
+            backup_dir: Каталог резервных копий.
+            compression: gzip, lzma или none.
+            keep: Сколько последних снимков хранить.
+            interval: Период автоматических копий (секунды), 0 - отключено.
+        """
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Неизвестный способ сжатия: {compression}")
+        self.storage = storage
+        self.backup_dir = backup_dir
+        self.objects_dir = os.path.join(backup_dir, 'objects')
+        self.snapshots_dir = os.path.join(backup_dir, 'snapshots')
+        self.compression = compression
+        self.keep = max(1, keep)
+        self.interval = interval
+        self.serializer = PrettyJsonSerializer()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='backup')
+        self._last_change: Optional[int] = None
+
+        # Метрики
+        self.snapshots_created = 0
+        self.snapshots_skipped = 0
+        self.objects_written = 0
+        self.bytes_written = 0
+
+    async def _run(self, method, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, method, *args)
+
+    async def create(self, force: bool = False) -> Optional[Dict]:
+        """Создает снимок и возвращает его манифест.
+
+        Если данные не менялись с прошлой копии, возвращает последний снимок
+        без обращения к хранилищу (или None, если копий еще нет).
+        """
+        change = self.storage.change_count
+        if not force and change == self._last_change:
+            self.snapshots_skipped += 1
+            return await self._run(self.latest_snapshot)
+
+        files = await self.storage.snapshot_files()
+        manifest = await self._run(self._write_snapshot, files)
+        self._last_change = change
+        return manifest
+
+    async def restore(self, snapshot_id: Optional[str] = None,
+                      before_restore: Optional[Callable[[], Awaitable]] = None) -> Dict:
+        """Восстанавливает данные из снимка (по умолчанию последнего).
+
+        before_restore вызывается, когда снимок уже прочитан, но данные еще
+        не заменены (например, чтобы остановить задачи старых данных).
+        """
+        manifest, files = await self._run(self.load_snapshot, snapshot_id)
+        if before_restore is not None:
+            await before_restore()
+        await self.storage.restore_files(files)
+        self._last_change = None
+        logger.info(f"Данные восстановлены из резервной копии {manifest['id']}")
+        return manifest
+
+    async def list(self) -> List[Dict]:
+        return await self._run(self.list_snapshots)
+
+    async def run_scheduler(self):
+        """Фоновое создание резервных копий по расписанию."""
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    await self.create()
+                except Exception as e:
+                    logger.error(f"Ошибка автоматической резервной копии: {e}")
+        except asyncio.CancelledError:
+            pass
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            'created': self.snapshots_created,
+            'skipped': self.snapshots_skipped,
+            'objects_written': self.objects_written,
+            'bytes_written': self.bytes_written,
+        }
+
+    # Работа с файлами (выполняется в потоке резервного копирования)
+    def _write_snapshot(self, files: Dict[str, bytes]) -> Dict:
+        extension, compress, _ = COMPRESSORS[self.compression]
+        entries = {}
+        new_objects = 0
+        for name, raw in sorted(files.items()):
+            digest = hashlib.sha256(raw).hexdigest()
+            relative = self._find_object(digest)
+            if relative is None:
+                relative = os.path.join(digest[:2], digest + extension)
+                packed = compress(raw)
+                self._write_atomic(os.path.join(self.objects_dir, relative), packed)
+                new_objects += 1
+                self.objects_written += 1
+                self.bytes_written += len(packed)
+            entries[name] = {'sha256': digest, 'size': len(raw), 'object': relative}
+
+        previous = self.latest_snapshot()
+        if previous and previous['files'] == entries:
+            # Содержимое не изменилось: новый снимок не нужен
+            self.snapshots_skipped += 1
+            return dict(previous, new_objects=0)
+
+        now = datetime.now()
+        base_id = now.strftime("%Y%m%d_%H%M%S")
+        snapshot_id = base_id
+        suffix = 1
+        # Id должны возрастать, даже если несколько копий создано за одну секунду
+        while previous and snapshot_id <= previous['id']:
+            suffix += 1
+            snapshot_id = f"{base_id}_{suffix:03d}"
+
+        manifest = {
+            'id': snapshot_id,
+            'created': now.isoformat(),
+            'files': entries,
+        }
+        self._write_atomic(self._manifest_path(snapshot_id), self.serializer.dumps(manifest))
+        self.snapshots_created += 1
+        logger.info(f"Создана резервная копия {snapshot_id}: новых объектов {new_objects} из {len(entries)}")
+
+        self._prune()
+        return dict(manifest, new_objects=new_objects)
+
+    def _find_object(self, digest: str) -> Optional[str]:
+        """Ищет уже сохраненный объект с этим хэшем при любом способе сжатия."""
+        for extension, _, _ in COMPRESSORS.values():
+            relative = os.path.join(digest[:2], digest + extension)
+            if os.path.exists(os.path.join(self.objects_dir, relative)):
+                return relative
+        return None
+
+    @staticmethod
+    def _decompressor(relative: str):
+        for extension, _, decompress in COMPRESSORS.values():
+            if extension and relative.endswith(extension):
+                return decompress
+        return bytes
+
+    def _manifest_path(self, snapshot_id: str) -> str:
+        return os.path.join(self.snapshots_dir, f"{snapshot_id}.json")
+
+    @staticmethod
+    def _write_atomic(path: str, raw: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_file = f"{path}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(raw)
+        os.replace(temp_file, path)
+
+    def list_snapshots(self) -> List[Dict]:
+        """Манифесты всех снимков, от старых к новым."""
+        if not os.path.isdir(self.snapshots_dir):
+            return []
+        manifests = []
+        for filename in sorted(os.listdir(self.snapshots_dir)):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.snapshots_dir, filename), 'rb') as f:
+                    manifests.append(self.serializer.loads(f.read()))
+            except ValueError as e:
+                logger.error(f"Поврежден манифест резервной копии {filename}: {e}")
+        return manifests
+
+    def latest_snapshot(self) -> Optional[Dict]:
+        snapshots = self.list_snapshots()
+        return snapshots[-1] if snapshots else None
+
+    def load_snapshot(self, snapshot_id: Optional[str] = None):
+        """Читает и проверяет файлы снимка. Возвращает (манифест, {имя: содержимое})."""
+        if snapshot_id is None:
+            manifest = self.latest_snapshot()
+            if manifest is None:
+                raise FileNotFoundError("Резервных копий нет")
+        else:
+            path = self._manifest_path(snapshot_id)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Резервная копия {snapshot_id} не найдена")
+            with open(path, 'rb') as f:
+                manifest = self.serializer.loads(f.read())
+
+        files = {}
+        for name, entry in manifest['files'].items():
+            relative = entry['object']
+            with open(os.path.join(self.objects_dir, relative), 'rb') as f:
+                raw = self._decompressor(relative)(f.read())
+            if hashlib.sha256(raw).hexdigest() != entry['sha256']:
+                raise ValueError(f"Поврежден объект {relative} ({name})")
+            files[name] = raw
+        return manifest, files
+
+    def _prune(self) -> None:
+        """Удаляет старые снимки сверх лимита и объекты, на которые никто не ссылается."""
+        snapshots = self.list_snapshots()
+        for manifest in snapshots[:-self.keep]:
+            os.remove(self._manifest_path(manifest['id']))
+        kept = snapshots[-self.keep:]
+        if len(kept) == len(snapshots):
+            return
+
+        referenced = {entry['object'] for manifest in kept for entry in manifest['files'].values()}
+        removed = 0
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            for filename in os.listdir(prefix_dir):
+                if os.path.join(prefix, filename) not in referenced:
+                    os.remove(os.path.join(prefix_dir, filename))
+                    removed += 1
+        logger.info(f"Удалено старых снимков: {len(snapshots) - len(kept)}, объектов: {removed}")
+
+async def _main(argv: List[str]) -> None:
+    from config import config
+    from utils.storage import create_storage
+
+    command = argv[0] if argv else 'list'
+    storage = create_storage(config)
+    manager = BackupManager(storage, config.BACKUP_DIR, config.BACKUP_COMPRESSION, config.BACKUP_KEEP)
+    try:
+        if command == 'create':
+            manifest = await manager.create(force=True)
+            print(f"{manifest['id']}: новых объектов {manifest['new_objects']}")
+        elif command == 'restore':
+            manifest = await manager.restore(argv[1] if len(argv) > 1 else None)
+            print(f"Восстановлено из {manifest['id']}")
+        else:
+            for manifest in await manager.list():
+                size = sum(entry['size'] for entry in manifest['files'].values())
+                print(f"{manifest['id']}  {manifest['created']}  {size / 1024:.1f} KB")
+    finally:
+        manager.close()
+        await storage.close()
+
+if __name__ == '__main__':
+    # python -m utils.backup [list | create | restore [id]] (бот должен быть остановлен)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(sys.argv[1:]))
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from telethon.errors import FloodWaitError, MessageNotModifiedError
+
+from utils.token_bucket import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних примененных текстов помнить для отбрасывания повторов
+APPLIED_CACHE_SIZE = 4096
+# Как часто (в секундах) убирать бюджеты простаивающих чатов и истекшие FloodWait
+IDLE_SWEEP_INTERVAL = 60.0
+
+class _PendingEdit:
+    """Последний еще не отправленный текст одного сообщения."""
+
+    __slots__ = ('message', 'text', 'waiters')
+
+    def __init__(self, message, text: str):
+        self.message = message
+        self.text = text
+        self.waiters: List[asyncio.Future] = []
+
+class EditGovernor:
+    """Общий регулятор редактирования сообщений.
+
+    Для каждого сообщения хранится только последний ожидающий текст:
+    новые правки заменяют еще не отправленные, а правки, совпадающие с
+    уже примененным текстом, отбрасываются. Отправка ограничена бюджетами
+    на чат и на весь аккаунт (token bucket); чаты обслуживаются по кругу,
+    в каждом не больше одной правки одновременно. При FloodWaitError чат
+    замолкает на указанное время, а текст возвращается в очередь.
+    """
+
+    def __init__(self, chat_rate: float = 1.0, chat_burst: int = 3,
+                 global_rate: float = 20.0, global_burst: int = 20):
+        """
+        Args:
+            chat_rate: Правок в секунду в одном чате.
+            chat_burst: Сколько правок в чате можно отправить подряд.
+            global_rate: Правок в секунду по всем чатам.
+            global_burst: Сколько правок всего можно отправить подряд.
+        """
+        self.chat_rate = chat_rate
+        self.chat_burst = max(1, chat_burst)
+        self.global_rate = global_rate
+        self.global_burst = max(1, global_burst)
+
+        self._pending: Dict[Tuple[Any, int], _PendingEdit] = {}
+        # Чат -> очередь его сообщений с ожидающими правками (порядок обхода чатов - круговой)
+        self._chats: Dict[Any, Deque[Tuple[Any, int]]] = {}
+        self._buckets: Dict[Any, TokenBucket] = {}
+        self._global: Optional[TokenBucket] = None
+        self._blocked: Dict[Any, float] = {}
+        self._next_sweep = 0.0
+        self._busy = set()
+        self._applied: 'OrderedDict[Tuple[Any, int], str]' = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._edits = set()
+
+        # Метрики
+        self.submitted = 0
+        self.coalesced = 0
+        self.unchanged = 0
+        self.flushed = 0
+        self.failed = 0
+        self.flood_waits = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._global = TokenBucket(self.global_rate, self.global_burst, asyncio.get_running_loop().time())
+            self._task = asyncio.create_task(self._run())
+            if self._pending:
+                self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Останавливает отправку; ожидающие правки отбрасываются."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for task in list(self._edits):
+            task.cancel()
+        if self._edits:
+            await asyncio.gather(*self._edits, return_exceptions=True)
+        for pending in self._pending.values():
+            for waiter in pending.waiters:
+                waiter.cancel()
+        self._pending.clear()
+        self._chats.clear()
+
+    def submit(self, message, text: str) -> None:
+        """Ставит правку в очередь, не дожидаясь отправки (ошибки пишутся в лог)."""
+        self._enqueue(message, text, None)
+
+    async def edit(self, message, text: str) -> None:
+        """Ставит правку в очередь и ждет, пока она (или более новая) будет применена."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._enqueue(message, text, waiter)
+        await waiter
+
+    @staticmethod
+    def _key(message) -> Tuple[Any, int]:
+        return message.chat_id, message.id
+
+    def _enqueue(self, message, text: str, waiter: Optional[asyncio.Future]) -> None:
+        self.submitted += 1
+        key = self._key(message)
+        pending = self._pending.get(key)
+        if pending is not None:
+            # Еще не отправленный текст просто заменяется новым
+            pending.message = message
+            pending.text = text
+            self.coalesced += 1
+        elif self._applied.get(key) == text:
+            self.unchanged += 1
+            if waiter is not None:
+                waiter.set_result(None)
+            return
+        else:
+            pending = self._pending[key] = _PendingEdit(message, text)
+            self._chats.setdefault(key[0], deque()).append(key)
+            if self._wakeup is not None:
+                self._wakeup.set()
+        if waiter is not None:
+            pending.waiters.append(waiter)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            delay = self._flush_ready(loop.time())
+            self._wakeup.clear()
+            try:
+                if delay == float('inf'):
+                    await self._wakeup.wait()
+                else:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _flush_ready(self, now: float) -> float:
+        """Запускает правки, на которые хватает бюджета; возвращает паузу до следующей."""
+        delay = float('inf')
+        if now >= self._next_sweep:
+            self._evict_idle(now)
+        for chat in list(self._chats):
+            if chat in self._busy:
+                continue
+            blocked = self._blocked.get(chat, 0.0) - now
+            if blocked > 0:
+                delay = min(delay, blocked)
+                continue
+            bucket = self._buckets.get(chat)
+            if bucket is None:
+                bucket = self._buckets[chat] = TokenBucket(self.chat_rate, self.chat_burst, now)
+            chat_wait = bucket.wait_time(now)
+            if chat_wait > 0:
+                delay = min(delay, chat_wait)
+                continue
+            global_wait = self._global.wait_time(now)
+            if global_wait > 0:
+                return min(delay, global_wait)
+
+            bucket.tokens -= 1
+            self._global.tokens -= 1
+            queue = self._chats.pop(chat)
+            key = queue.popleft()
+            if queue:
+                # Остальные сообщения чата - в конец круга
+                self._chats[chat] = queue
+            self._blocked.pop(chat, None)
+            self._busy.add(chat)
+            task = asyncio.create_task(self._apply(chat, key, self._pending.pop(key)))
+            self._edits.add(task)
+            task.add_done_callback(self._edits.discard)
+        return delay
+
+    async def _apply(self, chat, key: Tuple[Any, int], pending: _PendingEdit) -> None:
+        error: Optional[BaseException] = None
+        try:
+            if self._applied.get(key) == pending.text:
+                self.unchanged += 1
+            else:
+                await pending.message.edit(pending.text)
+                self.flushed += 1
+            self._remember(key, pending.text)
+        except MessageNotModifiedError:
+            self.unchanged += 1
+            self._remember(key, pending.text)
+        except FloodWaitError as e:
+            self.flood_waits += 1
+            logger.warning(f"FloodWait {e.seconds} с при редактировании в чате {chat}")
+            self._blocked[chat] = asyncio.get_running_loop().time() + e.seconds
+            self._requeue(chat, key, pending)
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            error = e
+            if not pending.waiters:
+                logger.warning(f"Не удалось отредактировать сообщение {key}: {e}")
+        finally:
+            self._busy.discard(chat)
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+        for waiter in pending.waiters:
+            if waiter.done():
+                continue
+            if error is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(error)
+
+    def _evict_idle(self, now: float) -> None:
+        """Забывает восстановившиеся бюджеты чатов без правок и истекшие блокировки."""
+        self._next_sweep = now + IDLE_SWEEP_INTERVAL
+        for chat in [chat for chat in self._buckets if chat not in self._chats and chat not in self._busy]:
+            bucket = self._buckets[chat]
+            bucket.wait_time(now)
+            if bucket.tokens >= bucket.burst:
+                # Новый бюджет чата будет таким же полным
+                del self._buckets[chat]
+        for chat in [chat for chat, until in self._blocked.items() if until <= now]:
+            del self._blocked[chat]
+
+    def _requeue(self, chat, key: Tuple[Any, int], pending: _PendingEdit) -> None:
+        """Возвращает правку в начало очереди чата, если ее еще не заменили."""
+        newer = self._pending.get(key)
+        if newer is not None:
+            newer.waiters.extend(pending.waiters)
+            return
+        self._pending[key] = pending
+        queue = self._chats.get(chat)
+        if queue is None:
+            queue = self._chats[chat] = deque()
+        queue.appendleft(key)
+
+    def _remember(self, key: Tuple[Any, int], text: str) -> None:
+        self._applied[key] = text
+        self._applied.move_to_end(key)
+        if len(self._applied) > APPLIED_CACHE_SIZE:
+            self._applied.popitem(last=False)
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            'submitted': self.submitted,
+            'coalesced': self.coalesced,
+            'unchanged': self.unchanged,
+            'flushed': self.flushed,
+            'failed': self.failed,
+            'flood_waits': self.flood_waits,
+            'pending': len(self._pending),
+        }
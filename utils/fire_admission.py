@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from telethon.errors import FloodWaitError
+
+from utils.token_bucket import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+class _SendBatch:
+    """Сообщения одного сработавшего будильника или напоминания."""
+
+    __slots__ = ('client', 'recipient', 'text', 'left', 'sent', 'failed', 'admitted', 'done')
+
+    def __init__(self, client, recipient: Any, text: str, count: int, admitted: float, done: asyncio.Future):
+        self.client = client
+        self.recipient = recipient
+        self.text = text
+        self.left = count
+        self.sent = 0
+        self.failed = 0
+        self.admitted = admitted
+        self.done = done
+
+class FireAdmission:
+    """Очередь отправки сообщений сработавших задач.
+
+    Будильники, сработавшие в одну секунду, не отправляют свои сообщения
+    одновременно: каждый становится пачкой в общей очереди, а пачки
+    обслуживаются по кругу, по одному сообщению за проход. Поэтому первое
+    сообщение получает каждый пользователь, прежде чем кто-то получит
+    второе, а будильник на 1000 сообщений не задерживает остальные.
+    Общий темп ограничен token bucket; при FloodWaitError отправка
+    замолкает на указанное время, а сообщение повторяется.
+    """
+
+    def __init__(self, rate: float = 20.0, burst: int = 20):
+        """
+        Args:
+            rate: Сообщений в секунду по всем пачкам.
+            burst: Сколько сообщений можно отправить подряд.
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+
+        self._queue: Deque[_SendBatch] = deque()
+        self._bucket: Optional[TokenBucket] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Метрики
+        self.admitted = 0
+        self.sent = 0
+        self.failed = 0
+        self.flood_waits = 0
+        self.first_sends = 0
+        self.first_wait_total = 0.0
+        self.first_wait_max = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._bucket = TokenBucket(self.rate, self.burst, asyncio.get_running_loop().time())
+            self._task = asyncio.create_task(self._run())
+            if self._queue:
+                self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Останавливает отправку; неотправленные пачки отменяются."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for batch in self._queue:
+            batch.done.cancel()
+        self._queue.clear()
+
+    async def send(self, client, recipient: Any, text: str, count: int = 1) -> int:
+        """Ставит count одинаковых сообщений в очередь и ждет их отправки.
+
+        Отмена вызывающей задачи снимает неотправленный остаток с очереди.
+
+        Returns:
+            Сколько сообщений отправлено (ошибки отдельных сообщений пишутся в лог).
+        """
+        loop = asyncio.get_running_loop()
+        batch = _SendBatch(client, recipient, text, max(1, count), loop.time(), loop.create_future())
+        self.admitted += 1
+        self._queue.append(batch)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        try:
+            return await batch.done
+        finally:
+            if not batch.done.done():
+                # Отменено во время ожидания: очередь пропустит пачку
+                batch.done.cancel()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            wait = self._bucket.wait_time(loop.time())
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            batch = self._queue.popleft()
+            if batch.done.done():
+                continue
+            self._bucket.tokens -= 1
+            try:
+                await batch.client.send_message(batch.recipient, batch.text)
+                if batch.sent == 0:
+                    first_wait = loop.time() - batch.admitted
+                    self.first_sends += 1
+                    self.first_wait_total += first_wait
+                    self.first_wait_max = max(self.first_wait_max, first_wait)
+                batch.sent += 1
+                self.sent += 1
+            except FloodWaitError as e:
+                self.flood_waits += 1
+                logger.warning(f"FloodWait {e.seconds} с при отправке сообщений задач")
+                # Сообщение повторяется первым после паузы
+                self._queue.appendleft(batch)
+                await asyncio.sleep(e.seconds)
+                continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                batch.failed += 1
+                self.failed += 1
+                logger.error(f"Ошибка отправки сообщения {batch.sent + batch.failed} пользователю {batch.recipient}: {e}")
+
+            batch.left -= 1
+            if batch.done.done():
+                continue
+            if batch.left > 0:
+                # Остальные сообщения пачки - в конец круга
+                self._queue.append(batch)
+            else:
+                batch.done.set_result(batch.sent)
+
+    def get_metrics(self) -> Dict[str, float]:
+        return {
+            'admitted': self.admitted,
+            'sent': self.sent,
+            'failed': self.failed,
+            'flood_waits': self.flood_waits,
+            'queued': len(self._queue),
+            'pending': sum(batch.left for batch in self._queue),
+            'first_wait_avg': self.first_wait_total / self.first_sends if self.first_sends else 0.0,
+            'first_wait_max': self.first_wait_max,
+        }
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import itertools
+from bisect import bisect_left, insort
+from enum import IntEnum
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.scheduler import JobHandle
+
+BASE36 = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+# Короткие id, которые совпали бы с подкомандами /cancel и /list
+RESERVED_IDS = frozenset({'all', 'chat', 'timer', 'wake', 'mention', 'here', 'next', 'page'})
+
+def to_base36(number: int) -> str:
+    digits = ''
+    while True:
+        number, digit = divmod(number, 36)
+        digits = BASE36[digit] + digits
+        if not number:
+            return digits
+
+class JobKind(IntEnum):
+    TIMER = 0
+    COUNTDOWN = 1
+    ALARM = 2
+    REMINDER = 3
+    MENTION = 4
+    SPAM = 5
+    CYCLE = 6
+
+class Job:
+    """Запись активной задачи в памяти.
+
+    Все, что нужно /list и /cancel, лежит здесь: хранилище только
+    повторяет эти данные для восстановления после перезапуска и во время
+    работы не читается (кроме дальних будильников и напоминаний, которые
+    после перезапуска ждут своего окна только в хранилище). deadline - монотонное время (loop.time())
+    срабатывания или окончания задачи; handle - запись в планировщике
+    (None, пока дальняя задача ждет в хранилище). short_id - короткий
+    base36 id для команд, его выдает реестр. paused - остаток в секундах,
+    пока задача на паузе (deadline при этом не идет). У цикла (/cycle)
+    phases - длительности фаз одного круга в секундах, count - число
+    кругов, phase - номер текущей фазы от начала цикла. deadline и paused
+    зарегистрированной задачи меняются через JobRegistry.retime(), иначе
+    порядок срабатывания в реестре устареет.
+    """
+
+    __slots__ = ('id', 'short_id', 'kind', 'chat_id', 'message_id', 'user_id', 'deadline',
+                 'count', 'text', 'target', 'rule', 'phases', 'phase', 'paused', 'handle')
+
+    def __init__(self, job_id: str, kind: JobKind, chat_id: int, message_id: int, deadline: float,
+                 user_id: int = 0, count: int = 1, text: Optional[str] = None,
+                 target: Optional[str] = None, rule: Optional[str] = None,
+                 short_id: Optional[str] = None):
+        self.id = job_id
+        self.short_id = short_id
+        self.kind = kind
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.user_id = user_id
+        self.deadline = deadline
+        self.count = count
+        self.text = text
+        self.target = target
+        self.rule = rule
+        self.phases: Optional[Tuple[int, ...]] = None
+        self.phase = 0
+        self.paused: Optional[float] = None
+        self.handle: Optional[JobHandle] = None
+
+    def remaining(self, now: float) -> float:
+        """Секунды до срабатывания относительно монотонного now (на паузе - сохраненный остаток)."""
+        if self.paused is not None:
+            return self.paused
+        return self.deadline - now
+
+    def cancel(self) -> bool:
+        """Отменяет запись в планировщике, если она есть."""
+        return self.handle.cancel() if self.handle else False
+
+    def __repr__(self) -> str:
+        return f"Job({self.id!r}, {self.kind.name}, chat={self.chat_id})"
+
+class JobRegistry:
+    """Реестр активных задач всех обработчиков.
+
+    Задачи хранятся по id и дополнительно по виду, короткому id и чату,
+    поэтому выборка таймеров, поиск по короткому id и отмена всех задач
+    чата не перебирают остальные задачи. Внутри вида и чата порядок -
+    порядок добавления.
+
+    Кроме того, реестр держит задачи отсортированными по времени
+    срабатывания (общий список и список каждого чата, задачи на паузе - в
+    конце по остатку): upcoming() отдает ближайшие k задач или страницу за
+    O(k), не сортируя все задачи на каждый /list.
+
+    Короткие id выдаются по возрастающему счетчику в base36. Задача,
+    восстановленная из хранилища, сохраняет свой id, а счетчик сдвигается
+    за него; если id уже занят, задача получает новый (вызывающий код
+    сравнивает short_id с записью и при необходимости перезаписывает ее).
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._by_kind: Dict[JobKind, Dict[str, Job]] = {kind: {} for kind in JobKind}
+        self._by_short: Dict[str, Job] = {}
+        self._by_chat: Dict[int, Dict[str, Job]] = {}
+        self._next_short = 1
+        # Индекс по времени срабатывания: ключи (на паузе, время, номер, id)
+        self._order: List[Tuple] = []
+        self._chat_order: Dict[int, List[Tuple]] = {}
+        self._keys: Dict[str, Tuple] = {}
+        self._counter = itertools.count()
+
+    @property
+    def short_id_floor(self) -> int:
+        """Номер следующего короткого id (все выданные id меньше него)."""
+        return self._next_short
+
+    def reserve_short_ids(self, floor: int) -> None:
+        """Не выдает короткие id с номерами меньше floor (они есть у задач вне реестра)."""
+        self._next_short = max(self._next_short, floor)
+
+    def _issue_short_id(self) -> str:
+        while True:
+            short_id = to_base36(self._next_short)
+            self._next_short += 1
+            if short_id not in RESERVED_IDS and short_id not in self._by_short:
+                return short_id
+
+    def add(self, job: Job) -> Job:
+        """Добавляет задачу (задача с тем же id заменяется, ее короткий id сохраняется)."""
+        previous = self.pop(job.id)
+        if job.short_id is None and previous is not None:
+            job.short_id = previous.short_id
+        if job.short_id is None or job.short_id in self._by_short:
+            job.short_id = self._issue_short_id()
+        else:
+            try:
+                self._next_short = max(self._next_short, int(job.short_id, 36) + 1)
+            except ValueError:
+                pass
+        self._jobs[job.id] = job
+        self._by_kind[job.kind][job.id] = job
+        self._by_short[job.short_id] = job
+        self._by_chat.setdefault(job.chat_id, {})[job.id] = job
+        self._index(job)
+        return job
+
+    def _index(self, job: Job) -> None:
+        paused = job.paused is not None
+        key = (paused, job.paused if paused else job.deadline, next(self._counter), job.id)
+        self._keys[job.id] = key
+        insort(self._order, key)
+        insort(self._chat_order.setdefault(job.chat_id, []), key)
+
+    def _unindex(self, job: Job) -> None:
+        key = self._keys.pop(job.id)
+        for order in (self._order, self._chat_order[job.chat_id]):
+            del order[bisect_left(order, key)]
+        if not self._chat_order[job.chat_id]:
+            del self._chat_order[job.chat_id]
+
+    def retime(self, job: Job, deadline: float, paused: Optional[float] = None) -> None:
+        """Меняет время срабатывания (и остаток на паузе) задачи, сохраняя порядок индекса."""
+        registered = self._jobs.get(job.id) is job
+        if registered:
+            self._unindex(job)
+        job.deadline = deadline
+        job.paused = paused
+        if registered:
+            self._index(job)
+
+    def upcoming(self, chat_id: Optional[int] = None, offset: int = 0, limit: Optional[int] = None,
+                 kinds: Optional[Tuple[JobKind, ...]] = None) -> List[Job]:
+        """Задачи в порядке срабатывания (на паузе - в конце), все или одного чата.
+
+        Без kinds это срез индекса: O(offset + limit). С kinds задачи других
+        видов пропускаются по ходу обхода.
+        """
+        order = self._order if chat_id is None else self._chat_order.get(chat_id, [])
+        if kinds is None:
+            end = None if limit is None else offset + limit
+            return [self._jobs[key[3]] for key in order[offset:end]]
+        jobs = []
+        for key in order:
+            job = self._jobs[key[3]]
+            if job.kind not in kinds:
+                continue
+            if offset:
+                offset -= 1
+                continue
+            jobs.append(job)
+            if limit is not None and len(jobs) >= limit:
+                break
+        return jobs
+
+    def count_in_chat(self, chat_id: int) -> int:
+        return len(self._by_chat.get(chat_id, ()))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def resolve(self, key: str) -> Optional[Job]:
+        """Задача по короткому или полному id."""
+        return self._by_short.get(key.lower()) or self._jobs.get(key)
+
+    def pop(self, job_id: str) -> Optional[Job]:
+        """Удаляет задачу из реестра (без отмены) и возвращает ее."""
+        job = self._jobs.pop(job_id, None)
+        if job is not None:
+            self._unindex(job)
+            del self._by_kind[job.kind][job_id]
+            del self._by_short[job.short_id]
+            chat_jobs = self._by_chat[job.chat_id]
+            del chat_jobs[job_id]
+            if not chat_jobs:
+                del self._by_chat[job.chat_id]
+        return job
+
+    def in_chat(self, chat_id: int) -> List[Job]:
+        """Задачи чата (копия, ее можно менять во время обхода)."""
+        return list(self._by_chat.get(chat_id, {}).values())
+
+    def of_kind(self, *kinds: JobKind) -> List[Job]:
+        """Задачи указанных видов: сначала все первого вида, затем второго и т.д."""
+        jobs = []
+        for kind in kinds:
+            jobs.extend(self._by_kind[kind].values())
+        return jobs
+
+    def count(self, *kinds: JobKind) -> int:
+        return sum(len(self._by_kind[kind]) for kind in kinds)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._jobs
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __iter__(self) -> Iterator[Job]:
+        return iter(list(self._jobs.values()))
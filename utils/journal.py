@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+class CollectionJournal:
+    """Журнал изменений одной коллекции в формате JSON Lines.
+
+    Каждое изменение дописывается в конец файла одной строкой:
+    ``{"op": "put", "item": {...}}``, ``{"op": "patch", "id": "...", "fields": {...}}``
+    (None в fields удаляет поле), ``{"op": "del", "id": "..."}`` или
+    ``{"op": "clear"}``. Повторное применение журнала к снимку дает тот же
+    результат, поэтому сбой между записью снимка и очисткой журнала безопасен.
+    """
+
+    def __init__(self, path: str, serializer, buffered: bool = False, sync: bool = False):
+        """
+        Args:
+            path: Путь к файлу журнала.
+            serializer: Компактный сериализатор (одна запись - одна строка).
+            buffered: Копить записи в памяти до commit() (групповая фиксация).
+            sync: Вызывать fsync после каждой записи на диск.
+        """
+        self.path = path
+        self.serializer = serializer
+        self.buffered = buffered
+        self.sync = sync
+        self.records = 0
+        self.pending = []
+
+    def replay(self, by_id: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Применяет записи журнала к снимку (словарю по id) на месте."""
+        self.records = 0
+        if not os.path.exists(self.path):
+            return by_id
+
+        with open(self.path, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = self.serializer.loads(line)
+                except ValueError:
+                    # Недописанная строка после аварийного завершения
+                    logger.warning(f"Пропущена поврежденная запись журнала {self.path}")
+                    continue
+                self._apply(by_id, record)
+                self.records += 1
+        return by_id
+
+    @staticmethod
+    def _apply(by_id: Dict[str, Dict], record: Dict) -> None:
+        op = record.get('op')
+        if op == 'put':
+            item = record.get('item') or {}
+            by_id.pop(item.get('id'), None)
+            by_id[item.get('id')] = item
+        elif op == 'patch':
+            item = by_id.get(record.get('id'))
+            if item is not None:
+                for name, value in (record.get('fields') or {}).items():
+                    if value is None:
+                        item.pop(name, None)
+                    else:
+                        item[name] = value
+        elif op == 'del':
+            by_id.pop(record.get('id'), None)
+        elif op == 'clear':
+            by_id.clear()
+
+    def append(self, record: Dict) -> None:
+        """Дописывает одну запись в конец журнала."""
+        self.pending.append(self.serializer.dumps(record) + b'\n')
+        self.records += 1
+        if not self.buffered:
+            self.commit()
+
+    def commit(self) -> None:
+        """Записывает накопленные записи одной операцией записи (и одним fsync)."""
+        if not self.pending:
+            return
+        with open(self.path, 'ab') as f:
+            f.write(b''.join(self.pending))
+            if self.sync:
+                f.flush()
+                os.fsync(f.fileno())
+        self.pending.clear()
+
+    def put(self, item: Dict) -> None:
+        self.append({'op': 'put', 'item': item})
+
+    def patch(self, item_id: str, fields: Dict) -> None:
+        self.append({'op': 'patch', 'id': item_id, 'fields': fields})
+
+    def delete(self, item_id: str) -> None:
+        self.append({'op': 'del', 'id': item_id})
+
+    def clear(self) -> None:
+        self.append({'op': 'clear'})
+
+    def truncate(self) -> None:
+        """Очищает журнал после записи снимка."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        # Незаписанные строки уже вошли в снимок
+        self.pending.clear()
+        self.records = 0
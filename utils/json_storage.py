@@ -1,16 +1,47 @@
-import json
+import bisect
+import logging
 import os
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+from utils.journal import CollectionJournal
+from utils.serializers import PrettyJsonSerializer, get_serializer
+from utils.stats_buffer import StatsBuffer
+
+logger = logging.getLogger(__name__)
+
+def job_fire_time(item: Dict) -> Optional[float]:
+    """Returns the job's fire time as a Unix timestamp, if it has one."""
+    if item.get('fire_at') is not None:
+        return float(item['fire_at'])
+    try:
+        start_time = datetime.fromisoformat(item['start_time'])
+        return start_time.timestamp() + float(item['duration'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
 class JsonStorage:
     """A JSON-based storage system that manages multiple data files."""
 
-    def __init__(self, data_dir: str = 'data'):
+    # Files rewritten on almost every command; they use the fast serializer
+    HOT_KEYS = ('stats', 'timers', 'mentions')
+
+    def __init__(self, data_dir: str = 'data', stats_flush_interval: float = 5.0,
+                 stats_flush_threshold: int = 50, journal: bool = False,
+                 journal_compact_threshold: int = 200, journal_compact_interval: float = 30.0,
+                 serializer: str = 'pretty', durability: str = 'none'):
         """Initialize the storage manager.
 
         Args:
             data_dir: The directory where data files are stored.
+            stats_flush_interval: Seconds between background writes of buffered stats.
+            stats_flush_threshold: Number of buffered stat changes that forces a write.
+            journal: Append job changes to per-collection logs instead of rewriting files.
+            journal_compact_threshold: Log records after which a collection is compacted.
+            journal_compact_interval: Seconds between background compaction checks.
+            serializer: Serializer for the hot files: 'orjson', 'json' (compact) or 'pretty'.
+            durability: 'none' (no fsync), 'always' (fsync every write) or 'batch'
+                (writes are deferred until commit(), which fsyncs once per group).
         """
         self.data_dir = data_dir
         self.file_map = {
@@ -21,6 +52,33 @@ class JsonStorage:
             'stats': 'stats.json',
         }
         self.cache: Dict[str, Any] = {}
+        # Sorted (fire_time, id) per collection, built on first get_due_items()
+        self._fire_index: Dict[str, List[tuple]] = {}
+        # short_id -> id per collection, built on first get_by_short_id()
+        self._short_index: Dict[str, Dict[str, str]] = {}
+        self.durability = durability
+        self._dirty = set()
+        self.fast_serializer = get_serializer(serializer)
+        self.pretty_serializer = PrettyJsonSerializer()
+        self.stats_buffer = StatsBuffer(
+            self._flush_stats,
+            flush_interval=stats_flush_interval,
+            flush_threshold=stats_flush_threshold,
+        )
+        self.journal_compact_threshold = max(1, journal_compact_threshold)
+        self.journal_compact_interval = journal_compact_interval
+        self.journals: Dict[str, CollectionJournal] = {}
+        if journal:
+            for key, filename in self.file_map.items():
+                if key == 'stats':
+                    continue
+                journal_name = os.path.splitext(filename)[0] + '.journal'
+                self.journals[key] = CollectionJournal(
+                    os.path.join(self.data_dir, journal_name),
+                    get_serializer('orjson'),
+                    buffered=durability == 'batch',
+                    sync=durability != 'none',
+                )
         os.makedirs(self.data_dir, exist_ok=True)
 
     def _get_path(self, key: str) -> str:
@@ -31,58 +89,325 @@ class JsonStorage:
         return os.path.join(self.data_dir, filename)
 
     def _load(self, key: str) -> Any:
-        """Load data from a specific JSON file."""
+        """Load data from a specific JSON file.
+
+        Job collections are kept in memory as id-keyed ordered dicts; on disk
+        they stay plain lists, so the file format is unchanged.
+        """
         if key in self.cache:
             return self.cache[key]
 
         file_path = self._get_path(key)
-        if not os.path.exists(file_path):
-            return [] if key != 'stats' else {}
-
+        journal = self.journals.get(key)
+        data = [] if key != 'stats' else {}
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.cache[key] = data
-                return data
-        except (json.JSONDecodeError, FileNotFoundError):
-            return [] if key != 'stats' else {}
+            if os.path.exists(file_path):
+                with open(file_path, 'rb') as f:
+                    # Both serializers read either format, so switching modes is safe
+                    data = self._serializer_for(key).loads(f.read())
+        except (ValueError, FileNotFoundError):
+            pass
+
+        if key == 'stats':
+            self.cache[key] = data
+            return data
+
+        items = self._index(data)
+        if journal:
+            # Snapshot plus every change logged since the last compaction
+            journal.replay(items)
+        self.cache[key] = items
+        return items
+
+    @staticmethod
+    def _index(data: Any) -> Dict[str, Dict]:
+        """Builds an id-keyed ordered dict from a stored list."""
+        if isinstance(data, dict):
+            # Older dict-shaped files are keyed by id already
+            data = list(data.values())
+        return {item.get('id'): item for item in data if isinstance(item, dict)}
+
+    def _serialize(self, key: str, data: Any) -> Any:
+        """Converts cached data to its on-disk shape."""
+        if key == 'stats':
+            return data
+        return list(data.values())
+
+    def _serializer_for(self, key: str):
+        return self.fast_serializer if key in self.HOT_KEYS else self.pretty_serializer
 
     def _save(self, key: str, data: Any) -> None:
         """Save data to a specific JSON file."""
         self.cache[key] = data
-        file_path = self._get_path(key)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        if self.durability == 'batch':
+            # Written once by the next commit(), however many saves come first
+            self._dirty.add(key)
+            return
+        self._write_key(key)
+        if self.durability == 'always':
+            self._sync_dir(self.data_dir)
+
+    def _write_key(self, key: str) -> None:
+        raw = self._serializer_for(key).dumps(self._serialize(key, self._load(key)))
+        self._write_file(self._get_path(key), raw, sync=self.durability != 'none')
+
+    def commit(self) -> None:
+        """Writes every deferred file and journal record, then syncs the data directory once."""
+        journals = [journal for journal in self.journals.values() if journal.pending]
+        if not self._dirty and not journals:
+            return
+        dirty, self._dirty = self._dirty, set()
+        for key in dirty:
+            self._write_key(key)
+        for journal in journals:
+            journal.commit()
+        if self.durability != 'none':
+            self._sync_dir(self.data_dir)
+
+    @staticmethod
+    def _sync_dir(dir_path: str) -> None:
+        """Makes renames inside a directory durable (no-op where unsupported)."""
+        try:
+            fd = os.open(dir_path, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _write_file(file_path: str, raw: bytes, sync: bool = False) -> None:
+        """Atomically replaces a file: write a temp file, then rename it over the target."""
+        temp_file = f"{file_path}.tmp"
+        try:
+            with open(temp_file, 'wb') as f:
+                f.write(raw)
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_file, file_path)
+        except Exception as e:
+            logger.error(f"Ошибка сохранения {file_path}: {e}")
+            if os.path.exists(temp_file):
+                try:
+                    os.remove(temp_file)
+                except OSError:
+                    pass
+            raise
+
+    def export_pretty(self, dest_dir: str) -> List[str]:
+        """Writes an indented, human-readable copy of every data file to dest_dir."""
+        os.makedirs(dest_dir, exist_ok=True)
+        paths = []
+        for key, filename in self.file_map.items():
+            path = os.path.join(dest_dir, filename)
+            self._write_file(path, self.pretty_serializer.dumps(self._serialize(key, self._load(key))))
+            paths.append(path)
+        return paths
+
+    def snapshot_files(self) -> Dict[str, bytes]:
+        """Returns the current contents of every data file, keyed by file name."""
+        # Journals are merged first so each file is a plain snapshot
+        self.flush()
+        return {
+            filename: self.fast_serializer.dumps(self._serialize(key, self._load(key)))
+            for key, filename in self.file_map.items()
+        }
 
-    # Generic list-based methods
+    def restore_files(self, files: Dict[str, bytes]) -> None:
+        """Replaces the stored data with files produced by snapshot_files()."""
+        for key, filename in self.file_map.items():
+            raw = files.get(filename)
+            if raw is None:
+                continue
+            data = self.fast_serializer.loads(raw)
+            if key == 'stats':
+                self.cache['stats'] = data if isinstance(data, dict) else {}
+                self._save('stats', self.cache['stats'])
+                continue
+            self._replace_all(key, self._index(data))
+        self.flush()
+
+    def clear_all_data(self) -> None:
+        """Clears every job collection (stats are kept)."""
+        for key in self.file_map:
+            if key != 'stats':
+                self._clear_all(key)
+
+    # Generic collection methods
     def _get_all(self, key: str) -> List[Dict]:
-        return self._load(key)
+        return list(self._load(key).values())
 
     def _get_one(self, key: str, item_id: str) -> Optional[Dict]:
+        return self._load(key).get(item_id)
+
+    def get_many(self, key: str, item_ids) -> List[Dict]:
+        """Returns the stored items for the given ids, skipping unknown ones."""
         items = self._load(key)
-        for item in items:
-            if item.get('id') == item_id:
-                return item
-        return None
+        return [items[item_id] for item_id in item_ids if item_id in items]
+
+    def get_ids(self, key: str, chat_id: Optional[int] = None) -> List[str]:
+        """Returns the ids of a collection's items, optionally only those of one chat."""
+        return [item_id for item_id, item in self._load(key).items() if chat_id is None or item.get('chat_id') == chat_id]
+
+    def get_due_items(self, key: str, until: float) -> List[Dict]:
+        """Returns items that fire at or before the given Unix timestamp, earliest first.
+
+        Backed by a sorted fire-time index. Saves insert into it; removed or
+        rescheduled items leave stale entries that are skipped here and
+        dropped when they outnumber the live ones.
+        """
+        index = self._fire_index.get(key)
+        if index is None:
+            index = sorted(
+                (fire_time, item['id'])
+                for item in self._get_all(key)
+                if item.get('id') is not None and (fire_time := job_fire_time(item)) is not None
+            )
+            self._fire_index[key] = index
+
+        due, seen, stale = [], set(), 0
+        for fire_time, item_id in index[:bisect.bisect_right(index, until, key=lambda entry: entry[0])]:
+            item = self._get_one(key, item_id)
+            if item is None or item_id in seen or job_fire_time(item) != fire_time:
+                stale += 1
+                continue
+            seen.add(item_id)
+            due.append(item)
+
+        if stale > 64 and stale * 2 > len(index):
+            self._fire_index.pop(key, None)
+        return due
+
+    def _index_fire_time(self, key: str, item_data: Dict) -> None:
+        """Adds a saved item to the collection's fire-time index, if it is built."""
+        index = self._fire_index.get(key)
+        fire_time = job_fire_time(item_data)
+        if index is not None and fire_time is not None and item_data.get('id') is not None:
+            bisect.insort(index, (fire_time, item_data['id']))
+
+    def get_by_short_id(self, key: str, short_id: str) -> Optional[Dict]:
+        """Returns the item with the given short job id, if any.
+
+        Backed by a short-id index; removed items leave stale entries that
+        are checked against the item and dropped here.
+        """
+        index = self._short_index.get(key)
+        if index is None:
+            index = {item['short_id']: item_id for item_id, item in self._load(key).items() if item.get('short_id')}
+            self._short_index[key] = index
+        item_id = index.get(short_id)
+        if item_id is None:
+            return None
+        item = self._get_one(key, item_id)
+        if item is None or item.get('short_id') != short_id:
+            del index[short_id]
+            return None
+        return item
+
+    def _index_short_id(self, key: str, item_data: Dict) -> None:
+        """Adds a saved item to the collection's short-id index, if it is built."""
+        index = self._short_index.get(key)
+        if index is not None and item_data.get('short_id') and item_data.get('id') is not None:
+            index[item_data['short_id']] = item_data['id']
 
     def _save_one(self, key: str, item_data: Dict) -> None:
         items = self._load(key)
-        # Remove existing item if it's an update
-        items = [i for i in items if i.get('id') != item_data.get('id')]
-        items.append(item_data)
-        self._save(key, items)
+        item_id = item_data.get('id')
+        # An update moves the item to the end, as the list version did
+        items.pop(item_id, None)
+        items[item_id] = item_data
+        self._index_fire_time(key, item_data)
+        self._index_short_id(key, item_data)
+        journal = self.journals.get(key)
+        if journal:
+            journal.put(item_data)
+        else:
+            self._save(key, items)
+
+    def update_fields(self, key: str, item_id: str, fields: Dict) -> bool:
+        """Changes some fields of a stored item in place; a None value removes the field.
+
+        With a journal only the changed fields are logged; without one the
+        collection file is rewritten, as for any save.
+        """
+        item = self._get_one(key, item_id)
+        if item is None:
+            return False
+        for name, value in fields.items():
+            if value is None:
+                item.pop(name, None)
+            else:
+                item[name] = value
+        self._index_fire_time(key, item)
+        self._index_short_id(key, item)
+        self._save_fields(key, item_id, fields)
+        return True
+
+    def _save_fields(self, key: str, item_id: str, fields: Dict) -> None:
+        journal = self.journals.get(key)
+        if journal:
+            journal.patch(item_id, fields)
+        else:
+            self._save(key, self._load(key))
 
     def _remove_one(self, key: str, item_id: str) -> bool:
         items = self._load(key)
-        initial_count = len(items)
-        items = [i for i in items if i.get('id') != item_id]
-        if len(items) < initial_count:
+        if item_id not in items:
+            return False
+        del items[item_id]
+        journal = self.journals.get(key)
+        if journal:
+            journal.delete(item_id)
+        else:
             self._save(key, items)
-            return True
-        return False
+        return True
 
     def _clear_all(self, key: str) -> None:
-        self._save(key, [])
+        self._fire_index.pop(key, None)
+        self._short_index.pop(key, None)
+        journal = self.journals.get(key)
+        if journal:
+            self._load(key).clear()
+            journal.clear()
+        else:
+            self._save(key, {})
+
+    def _replace_all(self, key: str, items: Dict[str, Dict]) -> None:
+        """Replaces a whole collection, writing it once."""
+        self._fire_index.pop(key, None)
+        self._short_index.pop(key, None)
+        journal = self.journals.get(key)
+        if journal:
+            # Written as a fresh snapshot, the same way compaction does
+            self.cache[key] = items
+            raw = self._serializer_for(key).dumps(self._serialize(key, items))
+            self._write_file(self._get_path(key), raw, sync=self.durability != 'none')
+            journal.truncate()
+        else:
+            self._save(key, items)
+
+    # Journal compaction
+    def compact(self, key: str) -> None:
+        """Merges a collection's journal into its snapshot file."""
+        journal = self.journals.get(key)
+        if not journal or not journal.records:
+            return
+        items = self._load(key)
+        raw = self._serializer_for(key).dumps(self._serialize(key, items))
+        # The snapshot must be in place before the log is dropped
+        self._write_file(self._get_path(key), raw, sync=self.durability != 'none')
+        journal.truncate()
+        logger.info(f"Журнал {key} сжат: {len(items)} записей в снимке")
+
+    def compact_all(self, force: bool = False) -> None:
+        """Compacts every journal that reached the threshold (or any, if forced)."""
+        for key, journal in self.journals.items():
+            if force or journal.records >= self.journal_compact_threshold:
+                self.compact(key)
 
     # Timer methods
     def get_all_timers(self) -> List[Dict]:
@@ -91,6 +416,9 @@ class JsonStorage:
     def get_timer(self, timer_id: str) -> Optional[Dict]:
         return self._get_one('timers', timer_id)
 
+    def get_timers(self, timer_ids) -> List[Dict]:
+        return self.get_many('timers', timer_ids)
+
     def save_timer(self, timer_data: Dict) -> None:
         self._save_one('timers', timer_data)
 
@@ -107,6 +435,9 @@ class JsonStorage:
     def get_alarm(self, alarm_id: str) -> Optional[Dict]:
         return self._get_one('alarms', alarm_id)
 
+    def get_alarms(self, alarm_ids) -> List[Dict]:
+        return self.get_many('alarms', alarm_ids)
+
     def save_alarm(self, alarm_data: Dict) -> None:
         self._save_one('alarms', alarm_data)
 
@@ -123,6 +454,9 @@ class JsonStorage:
     def get_reminder(self, reminder_id: str) -> Optional[Dict]:
         return self._get_one('reminders', reminder_id)
 
+    def get_reminders(self, reminder_ids) -> List[Dict]:
+        return self.get_many('reminders', reminder_ids)
+
     def save_reminder(self, reminder_data: Dict) -> None:
         self._save_one('reminders', reminder_data)
 
@@ -139,6 +473,9 @@ class JsonStorage:
     def get_mention(self, mention_id: str) -> Optional[Dict]:
         return self._get_one('mentions', mention_id)
 
+    def get_mentions(self, mention_ids) -> List[Dict]:
+        return self.get_many('mentions', mention_ids)
+
     def save_mention(self, mention_data: Dict) -> None:
         self._save_one('mentions', mention_data)
 
@@ -150,37 +487,59 @@ class JsonStorage:
 
     # Stats methods
     def get_stats(self) -> Dict:
-        return self._load('stats')
+        return self._stats()
 
-    def increment_command_usage(self, command: str) -> None:
-        """Increments the usage count for a command."""
+    def _stats(self) -> Dict:
+        """Returns the cached stats dict that buffered increments mutate in place."""
         stats = self._load('stats')
         if not isinstance(stats, dict):
             stats = {}
-        commands_used = stats.get('commands_used', {})
+        self.cache['stats'] = stats
+        return stats
+
+    def _flush_stats(self) -> None:
+        self._save('stats', self._stats())
+
+    def flush(self) -> None:
+        """Writes all buffered changes to disk."""
+        self.stats_buffer.flush()
+        self.compact_all(force=True)
+        self.commit()
+
+    def increment_command_usage(self, command: str) -> bool:
+        """Increments the usage count for a command; True if the buffer was written out."""
+        stats = self._stats()
+        commands_used = stats.setdefault('commands_used', {})
         commands_used[command] = commands_used.get(command, 0) + 1
-        stats['commands_used'] = commands_used
         stats['total_commands'] = stats.get('total_commands', 0) + 1
         stats['last_command_time'] = datetime.now().isoformat()
-        self._save('stats', stats)
+        return self.stats_buffer.record()
+
+    def increment_counter(self, counter_name: str) -> bool:
+        """Увеличивает указанный счетчик статистики (True, если буфер записан)."""
+        stats = self._stats()
+        stats[counter_name] = stats.get(counter_name, 0) + 1
+        return self.stats_buffer.record()
+
+    def raise_counter(self, counter_name: str, value: int) -> bool:
+        """Поднимает счетчик статистики до value, если он меньше (True, если буфер записан)."""
+        stats = self._stats()
+        if stats.get(counter_name, 0) >= value:
+            return False
+        stats[counter_name] = value
+        return self.stats_buffer.record()
 
     def increment_timers_created(self):
         """Увеличивает счетчик созданных таймеров."""
-        stats = self.get_stats()
-        stats['timers_created'] = stats.get('timers_created', 0) + 1
-        self._save('stats', stats)
+        return self.increment_counter('timers_created')
 
     def increment_alarms_created(self):
         """Увеличивает счетчик созданных будильников и напоминаний."""
-        stats = self.get_stats()
-        stats['alarms_created'] = stats.get('alarms_created', 0) + 1
-        self._save('stats', stats)
+        return self.increment_counter('alarms_created')
 
     def increment_mentions_created(self):
         """Увеличивает счетчик созданных упоминаний и спама."""
-        stats = self.get_stats()
-        stats['mentions_created'] = stats.get('mentions_created', 0) + 1
-        self._save('stats', stats)
+        return self.increment_counter('mentions_created')
 
     def get_command_usage(self, command: str) -> int:
         """Gets the usage count for a command."""
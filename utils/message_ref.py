@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import Any
+
+class MessageRef:
+    """Ссылка на сообщение по (chat_id, message_id) вместо объекта Telethon.
+
+    Восстановленным задачам не нужно само сообщение: редактирование и
+    ответ выполняются по id в момент срабатывания, поэтому при запуске
+    бот ничего не запрашивает у Telegram. Поддерживает ту часть интерфейса
+    события, которой пользуются обработчики: ``edit``, ``reply``, ``respond``.
+    """
+
+    __slots__ = ('client', 'chat_id', 'id')
+
+    def __init__(self, client, chat_id: int, message_id: int):
+        self.client = client
+        self.chat_id = chat_id
+        self.id = message_id
+
+    async def edit(self, text: str, **kwargs) -> Any:
+        return await self.client.edit_message(self.chat_id, self.id, text, **kwargs)
+
+    async def reply(self, text: str, **kwargs) -> Any:
+        return await self.client.send_message(self.chat_id, text, reply_to=self.id, **kwargs)
+
+    async def respond(self, text: str, **kwargs) -> Any:
+        return await self.client.send_message(self.chat_id, text, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"MessageRef({self.chat_id}, {self.id})"
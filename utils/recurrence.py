@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+from datetime import datetime, timedelta
+from typing import Optional, Set, Tuple
+
+# Дни недели в нотации cron: 0 - воскресенье, 1 - понедельник ... 6 - суббота
+DAY_NAMES = {
+    'sun': 0, 'mon': 1, 'tue': 2, 'wed': 3, 'thu': 4, 'fri': 5, 'sat': 6,
+    'вс': 0, 'пн': 1, 'вт': 2, 'ср': 3, 'чт': 4, 'пт': 5, 'сб': 6,
+}
+
+# Группы дней для "every <дни> HH:MM"
+DAY_GROUPS = {
+    'day': '*', 'день': '*', 'daily': '*',
+    'weekday': '1-5', 'weekdays': '1-5', 'будни': '1-5',
+    'weekend': '0,6', 'weekends': '0,6', 'выходные': '0,6',
+}
+
+# Поля cron: (минимум, максимум)
+FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 6))
+
+EVERY_PATTERN = re.compile(r'^every\s+(\S+)\s+(\d{1,2}):(\d{2})\s+(.+)$', re.IGNORECASE | re.DOTALL)
+CRON_PATTERN = re.compile(r'^cron\s+((?:\S+\s+){4}\S+)\s+(.+)$', re.IGNORECASE | re.DOTALL)
+
+class Recurrence:
+    """Правило повторения в формате cron (минута, час, день, месяц, день недели).
+
+    Правило хранится строкой и раскрывается по одному срабатыванию:
+    next_after() возвращает ближайшее время после заданного, не перебирая
+    будущие повторы. Время - локальное время сервера бота.
+    """
+
+    __slots__ = ('expression', 'minutes', 'hours', 'days', 'months', 'weekdays', 'any_day', 'any_weekday')
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Ожидается 5 полей cron, получено {len(fields)}: {expression}")
+        self.expression = ' '.join(fields)
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, FIELDS)
+        )
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        """Разбирает поле cron: *, a-b, */n, a-b/n и списки через запятую."""
+        values = set()
+        for part in field.lower().split(','):
+            step = 1
+            if '/' in part:
+                part, step_str = part.split('/', 1)
+                step = int(step_str)
+                if step < 1:
+                    raise ValueError(f"Неверный шаг в поле cron: {field}")
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start_str, end_str = part.split('-', 1)
+                start, end = _field_value(start_str), _field_value(end_str)
+            else:
+                start = _field_value(part)
+                end = high if step > 1 else start
+            if high == 6 and start == 7:
+                # 7 - тоже воскресенье
+                start = 0
+                if end == 7:
+                    end = 0
+            if high == 6 and end == 7:
+                values.add(0)
+                end = 6
+            if not low <= start <= end <= high:
+                raise ValueError(f"Значение вне диапазона {low}-{high}: {field}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment: datetime) -> bool:
+        weekday = (moment.weekday() + 1) % 7
+        if self.any_day or self.any_weekday:
+            # Ограничено только одно поле (или ни одного): проверяем оба
+            return moment.day in self.days and weekday in self.weekdays
+        # Ограничены оба поля: как в cron, достаточно совпадения любого
+        return moment.day in self.days or weekday in self.weekdays
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Ближайшее время срабатывания строго после moment."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                # В начало следующего месяца
+                candidate = (candidate.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"Правило никогда не срабатывает: {self.expression}")
+
+    def __repr__(self) -> str:
+        return f"Recurrence({self.expression!r})"
+
+def _field_value(value: str) -> int:
+    value = value.lower()
+    if value in DAY_NAMES:
+        return DAY_NAMES[value]
+    return int(value)
+
+def _days_field(days: str) -> str:
+    """Переводит weekday, weekend, mon,fri и т.п. в поле дня недели cron."""
+    days = days.lower()
+    if days in DAY_GROUPS:
+        return DAY_GROUPS[days]
+    names = days.split(',')
+    if not all(name[:3] in DAY_NAMES or name in DAY_NAMES for name in names):
+        raise ValueError(f"Неизвестные дни: {days}")
+    return ','.join(str(DAY_NAMES.get(name, DAY_NAMES.get(name[:3]))) for name in names)
+
+def parse_recurring(text: str) -> Optional[Tuple[Recurrence, str]]:
+    """Разбирает 'every <дни> HH:MM текст' или 'cron <5 полей> текст'.
+
+    Returns:
+        (правило, текст напоминания) или None, если текст не похож на
+        повторяющееся напоминание. Неверное правило - ValueError.
+    """
+    match = EVERY_PATTERN.match(text.strip())
+    if match:
+        days, hour, minute, reminder_text = match.groups()
+        if int(hour) > 23 or int(minute) > 59:
+            raise ValueError(f"Неверное время: {hour}:{minute}")
+        return Recurrence(f"{int(minute)} {int(hour)} * * {_days_field(days)}"), reminder_text
+    match = CRON_PATTERN.match(text.strip())
+    if match:
+        expression, reminder_text = match.groups()
+        return Recurrence(expression), reminder_text
+    return None
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Состояния задачи
+PENDING = 0    # Ждет своего времени в очереди
+DUE = 1        # Время наступило, ждет свободный слот
+RUNNING = 2
+DONE = 3
+CANCELLED = 4
+PAUSED = 5     # Снята с очереди через pause(), ждет reschedule()
+
+class JobHandle:
+    """Отменяемая ссылка на задачу планировщика.
+
+    Пока задача ждет своего времени, она занимает только эту запись в
+    очереди; asyncio.Task создается в момент срабатывания.
+    """
+
+    __slots__ = ('job_id', 'deadline', 'callback', 'args', 'on_cancel', 'lane', 'state', 'task', 'seq', '_scheduler')
+
+    def __init__(self, scheduler: 'Scheduler', job_id: Any, deadline: float,
+                 callback: Callable[..., Awaitable], args: tuple,
+                 on_cancel: Optional[Callable[[], Awaitable]], lane: Any = None):
+        self._scheduler = scheduler
+        self.job_id = job_id
+        self.lane = lane
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.on_cancel = on_cancel
+        self.state = PENDING
+        self.task: Optional[asyncio.Task] = None
+        # Номер последней постановки в очередь: записи кучи с другим номером устарели
+        self.seq = 0
+
+    def cancel(self) -> bool:
+        """Отменяет задачу: ожидающую снимает с очереди, выполняющуюся прерывает."""
+        return self._scheduler._cancel(self)
+
+    @property
+    def pending(self) -> bool:
+        return self.state in (PENDING, DUE, PAUSED)
+
+    @property
+    def running(self) -> bool:
+        return self.state == RUNNING
+
+    def done(self) -> bool:
+        return self.state in (DONE, CANCELLED)
+
+    def remaining(self) -> float:
+        """Секунды до срабатывания (0, если задача уже запущена)."""
+        return max(0.0, self.deadline - self._scheduler.time())
+
+class Lane:
+    """Очередь наступивших задач одного чата и ее метрики.
+
+    Полоса существует, пока в ней есть ждущие или выполняющиеся задачи.
+    """
+
+    __slots__ = ('key', 'queue', 'running', 'scheduled', 'started', 'max_depth', 'total_wait', 'max_wait')
+
+    def __init__(self, key: Any):
+        self.key = key
+        self.queue: Deque[JobHandle] = deque()
+        self.running = 0
+        # Лежит ли полоса в круговой очереди готовых
+        self.scheduled = False
+        self.started = 0
+        self.max_depth = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def get_metrics(self) -> Dict[str, float]:
+        return {
+            'lane': self.key,
+            'depth': len(self.queue),
+            'running': self.running,
+            'started': self.started,
+            'max_depth': self.max_depth,
+            'avg_wait': self.total_wait / self.started if self.started else 0.0,
+            'max_wait': self.max_wait,
+        }
+
+class Scheduler:
+    """Общий планировщик задач бота на основе кучи.
+
+    Задачи упорядочены по монотонному времени срабатывания в min-куче.
+    Один диспетчер спит до ближайшего срабатывания и запускает наступившие
+    задачи, не более ``workers`` одновременно.
+
+    Наступившие задачи запускаются через полосы (lane, обычно id чата):
+    в одной полосе выполняется не больше ``lane_workers`` задач, а полосы
+    с ожидающими задачами обслуживаются по кругу. Чат, запустивший много
+    тяжелых задач, ждет сам за собой и не задерживает остальные чаты;
+    диспетчер при этом не блокируется на занятых слотах. Отмена ожидающей задачи
+    помечает запись в куче, а не ищет ее: такие записи выбрасываются при
+    извлечении или при перестройке кучи.
+
+    Очередь спрятана за методами ``_push``, ``_remove``, ``_collect_due`` и
+    ``_next_deadline``: другие движки (колесо таймеров) переопределяют только их.
+    Через них же работают pause() и reschedule(): задача снимается с очереди
+    и ставится обратно той же записью, без новой задачи и нового JobHandle.
+    """
+
+    handle_class = JobHandle
+
+    def __init__(self, workers: int = 1000, lane_workers: int = 10):
+        """
+        Args:
+            workers: Максимум одновременно выполняющихся задач.
+            lane_workers: Максимум одновременно выполняющихся задач одной полосы (чата).
+        """
+        self.workers = max(1, workers)
+        self.lane_workers = max(1, lane_workers)
+        self._heap: List[Tuple[float, int, JobHandle]] = []
+        self._handles: Dict[Any, JobHandle] = {}
+        self._counter = itertools.count()
+        self._tombstones = 0
+        self._lanes: Dict[Any, Lane] = {}
+        # Полосы, у которых есть наступившие задачи и свободный слот, в порядке обхода
+        self._ready_lanes: Deque[Lane] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._sleep_until = math.inf
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._hooks = set()
+
+        # Метрики
+        self.fired = 0
+        self.cancelled = 0
+        self.running = 0
+        self.max_lag = 0.0
+
+    @staticmethod
+    def time() -> float:
+        return asyncio.get_running_loop().time()
+
+    def start(self) -> None:
+        """Запускает диспетчер (вызывается внутри работающего цикла событий)."""
+        if self._dispatcher is None:
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self) -> None:
+        """Останавливает диспетчер и прерывает выполняющиеся задачи.
+
+        Ожидающие задачи просто забываются без вызова on_cancel: они
+        остаются в хранилище и восстанавливаются при следующем запуске.
+        """
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        tasks = [handle.task for handle in self._handles.values() if handle.task]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._clear()
+        self._handles.clear()
+        self._lanes.clear()
+        self._ready_lanes.clear()
+
+    def call_later(self, delay: float, callback: Callable[..., Awaitable], *args,
+                   job_id: Any = None, on_cancel: Optional[Callable[[], Awaitable]] = None,
+                   lane: Any = None) -> JobHandle:
+        """Планирует ``callback(*args)`` через delay секунд."""
+        return self.call_at(self.time() + max(0.0, delay), callback, *args,
+                            job_id=job_id, on_cancel=on_cancel, lane=lane)
+
+    def call_at(self, deadline: float, callback: Callable[..., Awaitable], *args,
+                job_id: Any = None, on_cancel: Optional[Callable[[], Awaitable]] = None,
+                lane: Any = None) -> JobHandle:
+        """Планирует ``callback(*args)`` на монотонное время deadline (loop.time()).
+
+        Args:
+            job_id: Ключ задачи; ожидающая задача с тем же ключом заменяется.
+            on_cancel: Корутина, вызываемая при отмене задачи до ее запуска.
+            lane: Полоса выполнения (id чата); None - общая полоса.
+        """
+        seq = next(self._counter)
+        if job_id is None:
+            job_id = seq
+        previous = self._handles.get(job_id)
+        if previous is not None and previous.pending:
+            self._discard(previous)
+
+        handle = self.handle_class(self, job_id, deadline, callback, args, on_cancel, lane)
+        handle.seq = seq
+        self._handles[job_id] = handle
+        self._push(handle, seq)
+        self._wake(deadline)
+        return handle
+
+    def _wake(self, deadline: float) -> None:
+        if self._wakeup is not None and deadline < self._sleep_until:
+            # Новая задача раньше той точки, до которой спит диспетчер
+            self._wakeup.set()
+
+    def pause(self, handle: JobHandle) -> bool:
+        """Снимает ожидающую задачу с очереди; запись остается, пока ее не вернет reschedule()."""
+        if handle.state != PENDING:
+            return False
+        handle.state = PAUSED
+        self._remove(handle)
+        return True
+
+    def reschedule(self, handle: JobHandle, deadline: float) -> bool:
+        """Переносит ожидающую или приостановленную задачу на новое монотонное время.
+
+        Returns:
+            False, если задача уже запущена, выполнена или отменена.
+        """
+        if handle.state == PENDING:
+            # Сначала новый номер: старая запись кучи сразу считается устаревшей
+            handle.seq = next(self._counter)
+            self._remove(handle)
+        elif handle.state == PAUSED:
+            handle.seq = next(self._counter)
+            handle.state = PENDING
+        else:
+            return False
+        handle.deadline = deadline
+        self._push(handle, handle.seq)
+        self._wake(deadline)
+        return True
+
+    def get(self, job_id: Any) -> Optional[JobHandle]:
+        return self._handles.get(job_id)
+
+    def cancel(self, job_id: Any) -> bool:
+        handle = self._handles.get(job_id)
+        return handle.cancel() if handle else False
+
+    # Очередь (куча)
+    def __len__(self) -> int:
+        """Количество ожидающих задач."""
+        return len(self._heap) - self._tombstones
+
+    def _push(self, handle: JobHandle, seq: int) -> None:
+        heapq.heappush(self._heap, (handle.deadline, seq, handle))
+
+    def _remove(self, handle: JobHandle) -> None:
+        self._tombstones += 1
+        if self._tombstones > 64 and self._tombstones * 2 > len(self._heap):
+            # Отмененных записей больше половины: перестраиваем кучу
+            self._heap = [entry for entry in self._heap if self._live(entry)]
+            heapq.heapify(self._heap)
+            self._tombstones = 0
+
+    @staticmethod
+    def _live(entry: Tuple[float, int, JobHandle]) -> bool:
+        """Запись кучи действительна: задача ждет, и это ее последняя постановка."""
+        return entry[2].state == PENDING and entry[2].seq == entry[1]
+
+    def _collect_due(self, now: float) -> List[JobHandle]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._live(entry):
+                entry[2].state = DUE
+                due.append(entry[2])
+            else:
+                self._tombstones -= 1
+        return due
+
+    def _next_deadline(self) -> float:
+        while self._heap and not self._live(self._heap[0]):
+            heapq.heappop(self._heap)
+            self._tombstones -= 1
+        return self._heap[0][0] if self._heap else math.inf
+
+    def _clear(self) -> None:
+        self._heap.clear()
+        self._tombstones = 0
+
+    # Отмена и выполнение
+    def _discard(self, handle: JobHandle) -> None:
+        """Снимает ожидающую задачу с очереди без вызова on_cancel."""
+        if handle.state == PENDING:
+            handle.state = CANCELLED
+            self._remove(handle)
+        handle.state = CANCELLED
+        if self._handles.get(handle.job_id) is handle:
+            del self._handles[handle.job_id]
+
+    def _cancel(self, handle: JobHandle) -> bool:
+        if handle.pending:
+            self._discard(handle)
+            self.cancelled += 1
+            if handle.on_cancel:
+                hook = asyncio.create_task(self._run_hook(handle))
+                self._hooks.add(hook)
+                hook.add_done_callback(self._hooks.discard)
+            return True
+        if handle.state == RUNNING and handle.task:
+            handle.task.cancel()
+            self.cancelled += 1
+            return True
+        return False
+
+    @staticmethod
+    async def _run_hook(handle: JobHandle) -> None:
+        try:
+            await handle.on_cancel()
+        except Exception as e:
+            logger.error(f"Ошибка обработчика отмены задачи {handle.job_id}: {e}")
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            due = self._collect_due(loop.time())
+            for handle in due:
+                self._enqueue(handle)
+            if due:
+                self._start_ready(loop.time())
+                continue
+
+            self._sleep_until = self._next_deadline()
+            self._wakeup.clear()
+            try:
+                if self._sleep_until == math.inf:
+                    await self._wakeup.wait()
+                else:
+                    await asyncio.wait_for(self._wakeup.wait(), max(0.0, self._sleep_until - loop.time()))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._sleep_until = math.inf
+
+    def _enqueue(self, handle: JobHandle) -> None:
+        """Ставит наступившую задачу в очередь ее полосы."""
+        lane = self._lanes.get(handle.lane)
+        if lane is None:
+            lane = self._lanes[handle.lane] = Lane(handle.lane)
+        lane.queue.append(handle)
+        lane.max_depth = max(lane.max_depth, len(lane.queue))
+        self._mark_ready(lane)
+
+    def _mark_ready(self, lane: Lane) -> None:
+        if not lane.scheduled and lane.queue and lane.running < self.lane_workers:
+            lane.scheduled = True
+            self._ready_lanes.append(lane)
+
+    def _release(self, lane: Lane) -> None:
+        """Убирает опустевшую полосу, чтобы не копить полосы всех чатов."""
+        if not lane.queue and lane.running == 0 and not lane.scheduled and self._lanes.get(lane.key) is lane:
+            del self._lanes[lane.key]
+
+    def _start_ready(self, now: float) -> None:
+        """Запускает задачи готовых полос по кругу, пока есть общие слоты."""
+        while self._ready_lanes and self.running < self.workers:
+            lane = self._ready_lanes.popleft()
+            lane.scheduled = False
+            while lane.queue and lane.queue[0].state != DUE:
+                # Отменили, пока задача ждала в полосе
+                lane.queue.popleft()
+            if not lane.queue:
+                self._release(lane)
+                continue
+            handle = lane.queue.popleft()
+            wait = now - handle.deadline
+            self.max_lag = max(self.max_lag, wait)
+            lane.started += 1
+            lane.total_wait += max(0.0, wait)
+            lane.max_wait = max(lane.max_wait, wait)
+            lane.running += 1
+            self.running += 1
+            handle.state = RUNNING
+            handle.task = asyncio.create_task(self._run(handle, lane))
+            # Следующая задача этой полосы - после остальных полос
+            self._mark_ready(lane)
+
+    async def _run(self, handle: JobHandle, lane: Lane) -> None:
+        try:
+            await handle.callback(*handle.args)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка в задаче {handle.job_id}: {e}")
+        finally:
+            self.running -= 1
+            self.fired += 1
+            handle.state = DONE
+            handle.task = None
+            if self._handles.get(handle.job_id) is handle:
+                del self._handles[handle.job_id]
+            lane.running -= 1
+            self._mark_ready(lane)
+            self._release(lane)
+            if self._dispatcher is not None:
+                self._start_ready(asyncio.get_running_loop().time())
+
+    def get_lane_metrics(self, limit: int = 5) -> List[Dict[str, float]]:
+        """Метрики самых загруженных полос: сначала по глубине очереди, затем по времени ожидания."""
+        lanes = sorted(self._lanes.values(), key=lambda lane: (len(lane.queue), lane.max_wait), reverse=True)
+        return [lane.get_metrics() for lane in lanes[:limit]]
+
+    def get_metrics(self) -> Dict[str, float]:
+        return {
+            'pending': len(self),
+            'running': self.running,
+            'fired': self.fired,
+            'cancelled': self.cancelled,
+            'max_lag': self.max_lag,
+            'lanes': len(self._lanes),
+            'queued': sum(len(lane.queue) for lane in self._lanes.values()),
+        }
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него используется компактный stdlib json
+    orjson = None
+
+class PrettyJsonSerializer:
+    """Человекочитаемый JSON с отступами (прежний формат data/*.json)."""
+
+    name = 'pretty'
+
+    def dumps(self, data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False, indent=4).encode('utf-8')
+
+    def loads(self, raw: bytes) -> Any:
+        return json.loads(raw)
+
+class CompactJsonSerializer:
+    """Компактный JSON без пробелов на стандартной библиотеке."""
+
+    name = 'json'
+
+    def dumps(self, data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, raw: bytes) -> Any:
+        return json.loads(raw)
+
+class OrjsonSerializer:
+    """Компактный JSON через orjson."""
+
+    name = 'orjson'
+
+    def dumps(self, data: Any) -> bytes:
+        return orjson.dumps(data)
+
+    def loads(self, raw: bytes) -> Any:
+        return orjson.loads(raw)
+
+def get_serializer(name: str):
+    """Возвращает сериализатор по имени: orjson, json или pretty.
+
+    Если orjson не установлен, вместо него используется компактный json.
+    """
+    if name == 'orjson':
+        return OrjsonSerializer() if orjson is not None else CompactJsonSerializer()
+    if name == 'json':
+        return CompactJsonSerializer()
+    if name == 'pretty':
+        return PrettyJsonSerializer()
+    raise ValueError(f"Неизвестный сериализатор: {name}")
+
+def _sample_jobs(count: int) -> List[Dict]:
+    """Генерирует записи, похожие на реальные таймеры и упоминания."""
+    now = datetime.now().isoformat()
+    jobs = []
+    for i in range(count):
+        chat_id = -1001234567890 - (i % 50)
+        if i % 2:
+            jobs.append({
+                'id': f"timer_{chat_id}_{100000 + i}_{1700000000.0 + i}",
+                'chat_id': chat_id,
+                'message_id': 100000 + i,
+                'start_time': now,
+                'duration': 300 + i,
+                'spam_count': 1,
+                'type': 'timer',
+            })
+        else:
+            jobs.append({
+                'id': f"mention_{chat_id}_{100000 + i}_{1700000000.0 + i}",
+                'chat_id': chat_id,
+                'message_id': 100000 + i,
+                'username': '@пользователь',
+                'count': 30,
+                'interval': 0.5,
+                'start_time': now,
+                'type': 'mention',
+            })
+    return jobs
+
+def benchmark(counts=(100, 1000, 10000), repeat: int = 5) -> List[Dict]:
+    """Сравнивает время dump/load и размер файла для разных сериализаторов."""
+    results = []
+    names = ['pretty', 'json'] + (['orjson'] if orjson is not None else [])
+    for count in counts:
+        data = _sample_jobs(count)
+        for name in names:
+            serializer = get_serializer(name)
+            start = time.perf_counter()
+            for _ in range(repeat):
+                raw = serializer.dumps(data)
+            dump_time = (time.perf_counter() - start) / repeat
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                serializer.loads(raw)
+            load_time = (time.perf_counter() - start) / repeat
+
+            results.append({
+                'jobs': count,
+                'serializer': name,
+                'dump_ms': dump_time * 1000,
+                'load_ms': load_time * 1000,
+                'size_kb': len(raw) / 1024,
+            })
+    return results
+
+if __name__ == '__main__':
+    # python -m utils.serializers
+    print(f"{'jobs':>7} {'serializer':>10} {'dump, ms':>10} {'load, ms':>10} {'size, KB':>10}")
+    for row in benchmark():
+        print(f"{row['jobs']:>7} {row['serializer']:>10} {row['dump_ms']:>10.2f} "
+              f"{row['load_ms']:>10.2f} {row['size_kb']:>10.1f}")
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+from utils.json_storage import JsonStorage, job_fire_time
+
+logger = logging.getLogger(__name__)
+
+# Ключи отложенной записи для файлов шардов и манифеста
+SHARD_PREFIX = 'shard:'
+MANIFEST_KEY = 'manifest'
+
+class ShardedJsonStorage(JsonStorage):
+    """JSON-хранилище, в котором задачи каждого чата лежат в отдельном файле.
+
+    Таймеры, будильники, напоминания и упоминания одного чата хранятся в
+    ``data/shards/chat_<chat_id>.json``. Изменение в одном чате переписывает
+    только его шард, поэтому активный чат со спамом не замедляет запись для
+    остальных. Манифест ``data/shards/manifest.json`` перечисляет, в каких
+    чатах есть задачи каждого типа: шарды читаются с диска лениво, при
+    первом обращении к нужной коллекции. Для каждой коллекции манифест
+    хранит и ближайшее время срабатывания в каждом чате, поэтому выборка
+    наступающих задач читает только шарды, где они могут быть. Для
+    будильников и напоминаний манифест хранит еще чат каждого короткого id:
+    поиск дальней задачи по короткому id читает один шард. Статистика
+    остается в stats.json.
+    """
+
+    JOB_KEYS = ('timers', 'alarms', 'reminders', 'mentions')
+    # Коллекции, задачи которых ищут по короткому id вне реестра (дальние после перезапуска)
+    SHORT_ID_KEYS = ('alarms', 'reminders')
+
+    def __init__(self, data_dir: str = 'data', **kwargs):
+        if kwargs.get('journal'):
+            raise ValueError("Шардированное хранилище не поддерживает журнал")
+        super().__init__(data_dir, **kwargs)
+        self.shard_dir = os.path.join(self.data_dir, 'shards')
+        self.manifest_path = os.path.join(self.shard_dir, 'manifest.json')
+        os.makedirs(self.shard_dir, exist_ok=True)
+
+        # chat_id -> {коллекция: {id: запись}} для уже прочитанных шардов
+        self.shards: Dict[str, Dict[str, Dict[str, Dict]]] = {}
+        # Коллекция -> {id: chat_id} для записей прочитанных шардов
+        self.owners: Dict[str, Dict[str, str]] = {key: {} for key in self.JOB_KEYS}
+        self.shard_loads = 0
+        # Коллекция -> {chat_id: ближайшее время срабатывания или None}; чат без
+        # записи еще не подсчитан, а время может быть раньше настоящего после удалений
+        self.fire_mins: Dict[str, Dict[str, Optional[float]]] = {key: {} for key in self.JOB_KEYS}
+        # Коллекция -> {короткий id: chat_id} для SHORT_ID_KEYS
+        self.short_owners: Dict[str, Dict[str, str]] = {key: {} for key in self.SHORT_ID_KEYS}
+        self.manifest: Dict[str, List[str]] = self._read_manifest()
+
+    # Манифест
+    def _read_manifest(self) -> Dict[str, List[str]]:
+        """Читает манифест; при первом запуске переносит данные из общих файлов."""
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'rb') as f:
+                    data = self.pretty_serializer.loads(f.read())
+                for key, mins in data.get('fire', {}).items():
+                    if key in self.fire_mins:
+                        self.fire_mins[key] = {str(chat): fire_time for chat, fire_time in mins.items()}
+                manifest = {str(chat): list(keys) for chat, keys in data.get('chats', {}).items()}
+                if 'short' not in data:
+                    # Манифест старой версии: один раз собираем короткие id по шардам
+                    self.manifest = manifest
+                    self._index_shard_files()
+                    self._save_manifest()
+                    return manifest
+                for key, owners in data['short'].items():
+                    if key in self.short_owners:
+                        self.short_owners[key] = {short_id: str(chat) for short_id, chat in owners.items()}
+                return manifest
+            except (ValueError, AttributeError) as e:
+                logger.error(f"Поврежден манифест шардов, восстанавливаю по файлам: {e}")
+                return self._rebuild_manifest()
+        return self._migrate_flat_files()
+
+    def _rebuild_manifest(self) -> Dict[str, List[str]]:
+        """Собирает манифест заново по файлам шардов в каталоге."""
+        self.manifest = {}
+        for filename in sorted(os.listdir(self.shard_dir)):
+            if filename.startswith('chat_') and filename.endswith('.json'):
+                chat = filename[len('chat_'):-len('.json')]
+                shard = self._load_shard(chat)
+                self.manifest[chat] = [key for key in self.JOB_KEYS if shard[key]]
+                self._index_short_ids(chat)
+        self._save_manifest()
+        return self.manifest
+
+    def _index_shard_files(self) -> None:
+        """Заполняет short_owners по файлам шардов, не оставляя их в памяти."""
+        for chat, keys in self.manifest.items():
+            if not any(key in keys for key in self.SHORT_ID_KEYS):
+                continue
+            try:
+                with open(self._shard_path(chat), 'rb') as f:
+                    data = self.fast_serializer.loads(f.read())
+            except (OSError, ValueError) as e:
+                logger.error(f"Ошибка чтения шарда чата {chat}: {e}")
+                continue
+            for key in self.SHORT_ID_KEYS:
+                for item in self._index(data.get(key, [])).values():
+                    if item.get('short_id'):
+                        self.short_owners[key][item['short_id']] = chat
+
+    def _index_short_ids(self, chat: str) -> None:
+        """Заносит в short_owners короткие id прочитанного шарда."""
+        for key in self.SHORT_ID_KEYS:
+            for item in self.shards[chat][key].values():
+                if item.get('short_id'):
+                    self.short_owners[key][item['short_id']] = chat
+
+    def _migrate_flat_files(self) -> Dict[str, List[str]]:
+        """Раскладывает timers.json, wake_alarms.json и т.д. по шардам чатов."""
+        self.manifest = {}
+        migrated = []
+        for key in self.JOB_KEYS:
+            path = self._get_path(key)
+            if not os.path.exists(path):
+                continue
+            for item in super()._load(key).values():
+                chat = self._chat_key(item)
+                shard = self.shards.setdefault(chat, self._empty_shard())
+                shard[key][item.get('id')] = item
+                self.owners[key][item.get('id')] = chat
+            self.cache.pop(key, None)
+            migrated.append(path)
+
+        for chat, shard in self.shards.items():
+            self.manifest[chat] = [key for key in self.JOB_KEYS if shard[key]]
+            self._index_short_ids(chat)
+            self._save_shard(chat)
+        self._save_manifest()
+        self.commit()
+
+        # Общие файлы убираем из обращения, чтобы не воскресить их при откате настройки
+        for path in migrated:
+            os.replace(path, f"{path}.migrated")
+        if migrated:
+            logger.info(f"Задачи перенесены в {len(self.shards)} шардов в {self.shard_dir}")
+        return self.manifest
+
+    def _save_manifest(self) -> None:
+        self._save_file(MANIFEST_KEY)
+
+    def _track(self, chat: str, key: str, present: bool) -> None:
+        """Обновляет манифест, только если у чата появилась или опустела коллекция."""
+        keys = self.manifest.get(chat, [])
+        if present == (key in keys):
+            return
+        keys = [k for k in self.JOB_KEYS if (k in keys or k == key) and (present or k != key)]
+        if keys:
+            self.manifest[chat] = keys
+        else:
+            self.manifest.pop(chat, None)
+        if not present:
+            self.fire_mins[key].pop(chat, None)
+        self._save_manifest()
+
+    def _shard_fire_min(self, chat: str, key: str) -> Optional[float]:
+        """Точное ближайшее время срабатывания в коллекции прочитанного шарда."""
+        fire_times = [t for item in self.shards[chat][key].values() if (t := job_fire_time(item)) is not None]
+        return min(fire_times) if fire_times else None
+
+    def _index_fire_time(self, key: str, item_data: Dict) -> None:
+        # Вызывается при сохранении записи, когда ее шард уже прочитан
+        fire_time = job_fire_time(item_data)
+        if fire_time is None or key not in self.fire_mins:
+            return
+        chat = self._chat_key(item_data)
+        mins = self.fire_mins[key]
+        if chat not in mins:
+            mins[chat] = self._shard_fire_min(chat, key)
+        elif mins[chat] is None or fire_time < mins[chat]:
+            mins[chat] = fire_time
+        else:
+            return
+        self._save_manifest()
+
+    def get_by_short_id(self, key: str, short_id: str) -> Optional[Dict]:
+        """Задача по короткому id: чат берется из манифеста, читается только его шард."""
+        if key not in self.short_owners:
+            return super().get_by_short_id(key, short_id)
+        chat = self.short_owners[key].get(short_id)
+        if chat is None:
+            return None
+        if key in self.manifest.get(chat, []):
+            for item in self._load_shard(chat)[key].values():
+                if item.get('short_id') == short_id:
+                    return item
+        # Запись удалена или получила другой короткий id
+        del self.short_owners[key][short_id]
+        self._save_manifest()
+        return None
+
+    def _index_short_id(self, key: str, item_data: Dict) -> None:
+        short_id = item_data.get('short_id')
+        if key not in self.short_owners or not short_id:
+            return
+        chat = self._chat_key(item_data)
+        if self.short_owners[key].get(short_id) != chat:
+            self.short_owners[key][short_id] = chat
+            self._save_manifest()
+
+    # Шарды
+    @staticmethod
+    def _chat_key(item: Dict) -> str:
+        return str(item.get('chat_id'))
+
+    def _empty_shard(self) -> Dict[str, Dict[str, Dict]]:
+        return {key: {} for key in self.JOB_KEYS}
+
+    def _shard_path(self, chat: str) -> str:
+        return os.path.join(self.shard_dir, f"chat_{chat}.json")
+
+    def _load_shard(self, chat: str) -> Dict[str, Dict[str, Dict]]:
+        """Возвращает шард чата, при необходимости читая его с диска."""
+        shard = self.shards.get(chat)
+        if shard is not None:
+            return shard
+
+        shard = self._empty_shard()
+        path = self._shard_path(chat)
+        try:
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    data = self.fast_serializer.loads(f.read())
+                for key in self.JOB_KEYS:
+                    shard[key] = self._index(data.get(key, []))
+        except (ValueError, AttributeError) as e:
+            logger.error(f"Ошибка чтения шарда {path}: {e}")
+
+        for key in self.JOB_KEYS:
+            for item_id in shard[key]:
+                self.owners[key][item_id] = chat
+        self.shards[chat] = shard
+        self.shard_loads += 1
+        return shard
+
+    def _chats_with(self, key: str) -> List[str]:
+        return [chat for chat, keys in self.manifest.items() if key in keys]
+
+    def _find_owner(self, key: str, item_id: str) -> Optional[str]:
+        """Находит чат записи, дочитывая только шарды, где есть эта коллекция."""
+        chat = self.owners[key].get(item_id)
+        if chat is not None:
+            return chat
+        chats = self._chats_with(key)
+        # Id вида timer_<chat_id>_<message_id>_<время> сразу указывает на шард
+        parts = str(item_id).split('_')
+        if len(parts) > 2 and parts[1] in chats:
+            chats.remove(parts[1])
+            chats.insert(0, parts[1])
+        for chat in chats:
+            if chat not in self.shards:
+                self._load_shard(chat)
+                if item_id in self.owners[key]:
+                    return chat
+        return None
+
+    def _save_shard(self, chat: str) -> None:
+        self._save_file(SHARD_PREFIX + chat)
+
+    def _save_file(self, file_key: str) -> None:
+        """Записывает шард или манифест с учетом режима надежности."""
+        if self.durability == 'batch':
+            self._dirty.add(file_key)
+            return
+        self._write_key(file_key)
+        if self.durability == 'always':
+            self._sync_dir(self.shard_dir)
+
+    def _write_key(self, key: str) -> None:
+        sync = self.durability != 'none'
+        if key == MANIFEST_KEY:
+            raw = self.pretty_serializer.dumps({
+                'version': 1, 'chats': self.manifest, 'fire': self.fire_mins, 'short': self.short_owners,
+            })
+            self._write_file(self.manifest_path, raw, sync=sync)
+        elif key.startswith(SHARD_PREFIX):
+            chat = key[len(SHARD_PREFIX):]
+            shard = self.shards.get(chat)
+            path = self._shard_path(chat)
+            if shard is None or not any(shard.values()):
+                # Пустой шард не храним
+                self.shards.pop(chat, None)
+                if os.path.exists(path):
+                    os.remove(path)
+                return
+            data = {name: list(items.values()) for name, items in shard.items() if items}
+            self._write_file(path, self.fast_serializer.dumps(data), sync=sync)
+        else:
+            super()._write_key(key)
+
+    def commit(self) -> None:
+        shards_dirty = any(key == MANIFEST_KEY or key.startswith(SHARD_PREFIX) for key in self._dirty)
+        super().commit()
+        if shards_dirty and self.durability != 'none':
+            self._sync_dir(self.shard_dir)
+
+    # Коллекции
+    def _load(self, key: str) -> Any:
+        if key not in self.JOB_KEYS:
+            return super()._load(key)
+        # Сводный вид всех шардов (для экспорта и резервных копий)
+        items = {}
+        for chat in self._chats_with(key):
+            items.update(self._load_shard(chat)[key])
+        return items
+
+    def _get_all(self, key: str) -> List[Dict]:
+        return list(self._load(key).values())
+
+    def _get_one(self, key: str, item_id: str) -> Optional[Dict]:
+        chat = self._find_owner(key, item_id)
+        if chat is None:
+            return None
+        return self._load_shard(chat)[key].get(item_id)
+
+    def get_due_items(self, key: str, until: float) -> List[Dict]:
+        """Выбирает наступающие задачи, читая только шарды с подходящим временем из манифеста."""
+        if key not in self.JOB_KEYS:
+            return super().get_due_items(key, until)
+        mins = self.fire_mins[key]
+        due = []
+        for chat in self._chats_with(key):
+            if chat in mins and (mins[chat] is None or mins[chat] > until):
+                continue
+            items = self._load_shard(chat)[key]
+            exact = self._shard_fire_min(chat, key)
+            if chat not in mins or mins[chat] != exact:
+                # Время еще не подсчитано или устарело после удалений
+                mins[chat] = exact
+                self._save_manifest()
+            due.extend(item for item in items.values() if (t := job_fire_time(item)) is not None and t <= until)
+        due.sort(key=job_fire_time)
+        return due
+
+    def get_many(self, key: str, item_ids) -> List[Dict]:
+        result = []
+        for item_id in item_ids:
+            item = self._get_one(key, item_id)
+            if item is not None:
+                result.append(item)
+        return result
+
+    def get_ids(self, key: str, chat_id: Optional[int] = None) -> List[str]:
+        if key not in self.JOB_KEYS or chat_id is None:
+            return super().get_ids(key, chat_id)
+        # Задачи одного чата - из его шарда
+        chat = str(chat_id)
+        if key not in self.manifest.get(chat, []):
+            return []
+        return list(self._load_shard(chat)[key])
+
+    def get_chat_items(self, key: str, chat_id: int) -> List[Dict]:
+        """Возвращает задачи одного чата, читая только его шард."""
+        chat = str(chat_id)
+        if key not in self.manifest.get(chat, []):
+            return []
+        return list(self._load_shard(chat)[key].values())
+
+    def _save_one(self, key: str, item_data: Dict) -> None:
+        item_id = item_data.get('id')
+        chat = self._chat_key(item_data)
+        previous = self._find_owner(key, item_id)
+        if previous is not None and previous != chat:
+            self._remove_one(key, item_id)
+
+        items = self._load_shard(chat)[key]
+        items.pop(item_id, None)
+        items[item_id] = item_data
+        self.owners[key][item_id] = chat
+        self._index_fire_time(key, item_data)
+        self._index_short_id(key, item_data)
+        self._save_shard(chat)
+        self._track(chat, key, True)
+
+    def _save_fields(self, key: str, item_id: str, fields: Dict) -> None:
+        # Переписывается только шард чата, которому принадлежит задача
+        self._save_shard(self._find_owner(key, item_id))
+
+    def _remove_one(self, key: str, item_id: str) -> bool:
+        chat = self._find_owner(key, item_id)
+        if chat is None:
+            return False
+        items = self._load_shard(chat)[key]
+        item = items.pop(item_id, None)
+        if item is None:
+            return False
+        self.owners[key].pop(item_id, None)
+        owners = self.short_owners.get(key)
+        if owners is not None and item.get('short_id') and owners.get(item['short_id']) == chat:
+            del owners[item['short_id']]
+            self._save_manifest()
+        self._save_shard(chat)
+        if not items:
+            self._track(chat, key, False)
+        return True
+
+    def _clear_all(self, key: str) -> None:
+        for chat in self._chats_with(key):
+            self._load_shard(chat)[key].clear()
+            self._save_shard(chat)
+            self._track(chat, key, False)
+        self.owners[key].clear()
+        self.fire_mins[key].clear()
+        if key in self.short_owners:
+            self.short_owners[key].clear()
+            self._save_manifest()
+
+    def _replace_all(self, key: str, items: Dict[str, Dict]) -> None:
+        # Каждый затронутый шард и манифест переписываются один раз
+        self.fire_mins[key].clear()
+        chats = set(self._chats_with(key))
+        for chat in chats:
+            self._load_shard(chat)[key].clear()
+        self.owners[key].clear()
+        short_owners = self.short_owners.get(key, {})
+        short_owners.clear()
+        for item_id, item in items.items():
+            chat = self._chat_key(item)
+            self._load_shard(chat)[key][item_id] = item
+            self.owners[key][item_id] = chat
+            if key in self.short_owners and item.get('short_id'):
+                short_owners[item['short_id']] = chat
+            chats.add(chat)
+
+        for chat in chats:
+            shard = self.shards[chat]
+            self._save_shard(chat)
+            keys = [k for k in self.JOB_KEYS if shard[k] or (k != key and k in self.manifest.get(chat, []))]
+            if keys:
+                self.manifest[chat] = keys
+                if shard[key]:
+                    self.fire_mins[key][chat] = self._shard_fire_min(chat, key)
+            else:
+                self.manifest.pop(chat, None)
+        self._save_manifest()
+
+    def get_shard_metrics(self) -> Dict[str, int]:
+        """Количество шардов всего и уже прочитанных с диска."""
+        return {
+            'shards': len(self.manifest),
+            'loaded': len(self.shards),
+            'shard_loads': self.shard_loads,
+        }
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.json_storage import JsonStorage, job_fire_time
+from utils.sharded_storage import ShardedJsonStorage
+from utils.serializers import PrettyJsonSerializer
+from utils.stats_buffer import StatsBuffer
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = ('timers', 'alarms', 'reminders', 'mentions')
+
+# Имена файлов для выгрузки в формате data/*.json
+EXPORT_FILES = {
+    'timers': 'timers.json',
+    'alarms': 'wake_alarms.json',
+    'reminders': 'reminders.json',
+    'mentions': 'mentions.json',
+    'stats': 'stats.json',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    chat_id INTEGER,
+    fire_at REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (collection, id)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_chat ON jobs (collection, chat_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_fire_at ON jobs (collection, fire_at);
+-- Индекс по выражению: json_patch в update_fields обновляет его вместе с data
+CREATE INDEX IF NOT EXISTS idx_jobs_short_id ON jobs (collection, json_extract(data, '$.short_id'));
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Запросы с параметрами: sqlite3 компилирует их один раз и берет из кэша
+SQL_SELECT_ALL = "SELECT data FROM jobs WHERE collection = ? ORDER BY rowid"
+SQL_SELECT_ONE = "SELECT data FROM jobs WHERE collection = ? AND id = ?"
+SQL_SELECT_MANY = (
+    "SELECT jobs.data FROM json_each(?) AS ids "
+    "JOIN jobs ON jobs.collection = ? AND jobs.id = ids.value ORDER BY ids.key"
+)
+SQL_SELECT_CHAT = "SELECT data FROM jobs WHERE collection = ? AND chat_id = ? ORDER BY rowid"
+SQL_SELECT_IDS = "SELECT id FROM jobs WHERE collection = ? ORDER BY rowid"
+SQL_SELECT_CHAT_IDS = "SELECT id FROM jobs WHERE collection = ? AND chat_id = ? ORDER BY rowid"
+SQL_SELECT_DUE = "SELECT data FROM jobs WHERE collection = ? AND fire_at <= ? ORDER BY fire_at"
+SQL_SELECT_SHORT = "SELECT data FROM jobs WHERE collection = ? AND json_extract(data, '$.short_id') = ?"
+SQL_UPSERT = "INSERT OR REPLACE INTO jobs (collection, id, chat_id, fire_at, data) VALUES (?, ?, ?, ?, ?)"
+# Меняет только переданные поля JSON (null удаляет поле) и, если передано, fire_at
+SQL_PATCH = (
+    "UPDATE jobs SET data = json_patch(data, ?), fire_at = COALESCE(?, fire_at) "
+    "WHERE collection = ? AND id = ?"
+)
+SQL_DELETE_ONE = "DELETE FROM jobs WHERE collection = ? AND id = ?"
+SQL_DELETE_ALL = "DELETE FROM jobs WHERE collection = ?"
+SQL_KV_GET = "SELECT value FROM kv WHERE key = ?"
+SQL_KV_SET = "INSERT OR REPLACE INTO kv (key, value) VALUES (?, ?)"
+
+class SqliteStorage:
+    """SQLite-хранилище с тем же интерфейсом, что и JsonStorage.
+
+    Все задачи лежат в одной таблице с индексами по id, chat_id, времени
+    срабатывания и короткому id. База работает в режиме WAL, каждое изменение - отдельная
+    короткая транзакция вместо перезаписи целого файла.
+    """
+
+    # Режим долговечности -> PRAGMA synchronous
+    SYNCHRONOUS = {'none': 'OFF', 'batch': 'FULL', 'always': 'FULL'}
+
+    def __init__(self, db_path: str, stats_flush_interval: float = 5.0, stats_flush_threshold: int = 50,
+                 durability: str = 'none'):
+        """
+        Args:
+            db_path: Путь к файлу базы данных.
+            stats_flush_interval: Период фоновой записи статистики (секунды).
+            stats_flush_threshold: Количество изменений статистики до немедленной записи.
+            durability: 'none', 'always' (транзакция с fsync на каждое изменение) или
+                'batch' (изменения копятся в открытой транзакции до commit()).
+        """
+        self.db_path = db_path
+        self.durability = durability
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # Соединение используется из потока записи AsyncStorage
+        self.conn = sqlite3.connect(db_path, cached_statements=64, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA synchronous={self.SYNCHRONOUS.get(durability, 'NORMAL')}")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+        self._stats_cache: Optional[Dict] = None
+        self.stats_buffer = StatsBuffer(
+            self._flush_stats,
+            flush_interval=stats_flush_interval,
+            flush_threshold=stats_flush_threshold,
+        )
+
+    def close(self) -> None:
+        self.flush()
+        self.conn.close()
+
+    @contextmanager
+    def _tx(self):
+        """Транзакция одного изменения; в режиме batch фиксируется в commit()."""
+        if self.durability == 'batch':
+            yield
+            return
+        with self.conn:
+            yield
+
+    def commit(self) -> None:
+        """Фиксирует накопленную транзакцию (один fsync на группу изменений)."""
+        if self.conn.in_transaction:
+            self.conn.commit()
+
+    # Generic collection methods
+    @staticmethod
+    def _check_key(key: str) -> None:
+        if key not in COLLECTIONS:
+            raise ValueError(f"Unknown data key: {key}")
+
+    def _get_all(self, key: str) -> List[Dict]:
+        self._check_key(key)
+        return [json.loads(row[0]) for row in self.conn.execute(SQL_SELECT_ALL, (key,))]
+
+    def _get_one(self, key: str, item_id: str) -> Optional[Dict]:
+        self._check_key(key)
+        row = self.conn.execute(SQL_SELECT_ONE, (key, item_id)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, key: str, item_ids: Iterable[str]) -> List[Dict]:
+        """Returns the stored items for the given ids, skipping unknown ones."""
+        self._check_key(key)
+        ids = json.dumps(list(item_ids))
+        return [json.loads(row[0]) for row in self.conn.execute(SQL_SELECT_MANY, (ids, key))]
+
+    def get_chat_items(self, key: str, chat_id: int) -> List[Dict]:
+        """Returns all items of a collection that belong to one chat."""
+        self._check_key(key)
+        return [json.loads(row[0]) for row in self.conn.execute(SQL_SELECT_CHAT, (key, chat_id))]
+
+    def get_ids(self, key: str, chat_id: Optional[int] = None) -> List[str]:
+        """Returns the ids of a collection's items, optionally only those of one chat."""
+        self._check_key(key)
+        if chat_id is None:
+            return [row[0] for row in self.conn.execute(SQL_SELECT_IDS, (key,))]
+        return [row[0] for row in self.conn.execute(SQL_SELECT_CHAT_IDS, (key, chat_id))]
+
+    def get_due_items(self, key: str, until: float) -> List[Dict]:
+        """Returns items that fire at or before the given Unix timestamp, earliest first."""
+        self._check_key(key)
+        return [json.loads(row[0]) for row in self.conn.execute(SQL_SELECT_DUE, (key, until))]
+
+    def get_by_short_id(self, key: str, short_id: str) -> Optional[Dict]:
+        """Returns the item with the given short job id, if any."""
+        self._check_key(key)
+        row = self.conn.execute(SQL_SELECT_SHORT, (key, short_id)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _save_one(self, key: str, item_data: Dict) -> None:
+        self._check_key(key)
+        with self._tx():
+            self.conn.execute(SQL_UPSERT, self._row(key, item_data))
+
+    def _save_many(self, key: str, items: Iterable[Dict]) -> None:
+        self._check_key(key)
+        with self.conn:
+            self.conn.executemany(SQL_UPSERT, (self._row(key, item) for item in items))
+
+    @staticmethod
+    def _row(key: str, item_data: Dict) -> tuple:
+        return (
+            key,
+            item_data.get('id'),
+            item_data.get('chat_id'),
+            job_fire_time(item_data),
+            json.dumps(item_data, ensure_ascii=False),
+        )
+
+    def update_fields(self, key: str, item_id: str, fields: Dict) -> bool:
+        """Changes some fields of a stored item in place; a None value removes the field."""
+        self._check_key(key)
+        with self._tx():
+            cursor = self.conn.execute(
+                SQL_PATCH, (json.dumps(fields, ensure_ascii=False), fields.get('fire_at'), key, item_id)
+            )
+        return cursor.rowcount > 0
+
+    def _remove_one(self, key: str, item_id: str) -> bool:
+        self._check_key(key)
+        with self._tx():
+            cursor = self.conn.execute(SQL_DELETE_ONE, (key, item_id))
+        return cursor.rowcount > 0
+
+    def _clear_all(self, key: str) -> None:
+        self._check_key(key)
+        with self._tx():
+            self.conn.execute(SQL_DELETE_ALL, (key,))
+
+    def export_pretty(self, dest_dir: str) -> List[str]:
+        """Writes an indented, human-readable copy of every collection to dest_dir."""
+        os.makedirs(dest_dir, exist_ok=True)
+        serializer = PrettyJsonSerializer()
+        paths = []
+        for key, filename in EXPORT_FILES.items():
+            data = self._stats() if key == 'stats' else self._get_all(key)
+            path = os.path.join(dest_dir, filename)
+            with open(path, 'wb') as f:
+                f.write(serializer.dumps(data))
+            paths.append(path)
+        return paths
+
+    def snapshot_files(self) -> Dict[str, bytes]:
+        """Returns every collection in the data/*.json format, keyed by file name."""
+        self.flush()
+        files = {}
+        for key, filename in EXPORT_FILES.items():
+            data = self._stats() if key == 'stats' else self._get_all(key)
+            files[filename] = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return files
+
+    def restore_files(self, files: Dict[str, bytes]) -> None:
+        """Replaces the stored data with files produced by snapshot_files()."""
+        for key, filename in EXPORT_FILES.items():
+            raw = files.get(filename)
+            if raw is None:
+                continue
+            data = json.loads(raw)
+            if key == 'stats':
+                self._save_stats(data if isinstance(data, dict) else {})
+                continue
+            if isinstance(data, dict):
+                data = list(data.values())
+            with self.conn:
+                self.conn.execute(SQL_DELETE_ALL, (key,))
+                self.conn.executemany(SQL_UPSERT, (self._row(key, item) for item in data if isinstance(item, dict)))
+        self.flush()
+
+    def clear_all_data(self) -> None:
+        """Clears every job collection (stats are kept)."""
+        with self._tx():
+            for key in COLLECTIONS:
+                self.conn.execute(SQL_DELETE_ALL, (key,))
+
+    # Timer methods
+    def get_all_timers(self) -> List[Dict]:
+        return self._get_all('timers')
+
+    def get_timer(self, timer_id: str) -> Optional[Dict]:
+        return self._get_one('timers', timer_id)
+
+    def get_timers(self, timer_ids) -> List[Dict]:
+        return self.get_many('timers', timer_ids)
+
+    def save_timer(self, timer_data: Dict) -> None:
+        self._save_one('timers', timer_data)
+
+    def remove_timer(self, timer_id: str) -> bool:
+        return self._remove_one('timers', timer_id)
+
+    def clear_timers(self) -> None:
+        self._clear_all('timers')
+
+    # Alarm methods
+    def get_all_alarms(self) -> List[Dict]:
+        return self._get_all('alarms')
+
+    def get_alarm(self, alarm_id: str) -> Optional[Dict]:
+        return self._get_one('alarms', alarm_id)
+
+    def get_alarms(self, alarm_ids) -> List[Dict]:
+        return self.get_many('alarms', alarm_ids)
+
+    def save_alarm(self, alarm_data: Dict) -> None:
+        self._save_one('alarms', alarm_data)
+
+    def remove_alarm(self, alarm_id: str) -> bool:
+        return self._remove_one('alarms', alarm_id)
+
+    def clear_alarms(self) -> None:
+        self._clear_all('alarms')
+
+    # Reminder methods
+    def get_all_reminders(self) -> List[Dict]:
+        return self._get_all('reminders')
+
+    def get_reminder(self, reminder_id: str) -> Optional[Dict]:
+        return self._get_one('reminders', reminder_id)
+
+    def get_reminders(self, reminder_ids) -> List[Dict]:
+        return self.get_many('reminders', reminder_ids)
+
+    def save_reminder(self, reminder_data: Dict) -> None:
+        self._save_one('reminders', reminder_data)
+
+    def remove_reminder(self, reminder_id: str) -> bool:
+        return self._remove_one('reminders', reminder_id)
+
+    def clear_reminders(self) -> None:
+        self._clear_all('reminders')
+
+    # Mention methods
+    def get_all_mentions(self) -> List[Dict]:
+        return self._get_all('mentions')
+
+    def get_mention(self, mention_id: str) -> Optional[Dict]:
+        return self._get_one('mentions', mention_id)
+
+    def get_mentions(self, mention_ids) -> List[Dict]:
+        return self.get_many('mentions', mention_ids)
+
+    def save_mention(self, mention_data: Dict) -> None:
+        self._save_one('mentions', mention_data)
+
+    def remove_mention(self, mention_id: str) -> bool:
+        return self._remove_one('mentions', mention_id)
+
+    def clear_mentions(self) -> None:
+        self._clear_all('mentions')
+
+    # Stats methods
+    def get_stats(self) -> Dict:
+        return self._stats()
+
+    def _stats(self) -> Dict:
+        """Returns the cached stats dict that buffered increments mutate in place."""
+        if self._stats_cache is None:
+            row = self.conn.execute(SQL_KV_GET, ('stats',)).fetchone()
+            stats = json.loads(row[0]) if row else {}
+            self._stats_cache = stats if isinstance(stats, dict) else {}
+        return self._stats_cache
+
+    def _save_stats(self, stats: Dict) -> None:
+        self._stats_cache = stats
+        with self._tx():
+            self.conn.execute(SQL_KV_SET, ('stats', json.dumps(stats, ensure_ascii=False)))
+
+    def _flush_stats(self) -> None:
+        self._save_stats(self._stats())
+
+    def flush(self) -> None:
+        """Writes all buffered changes to disk."""
+        self.stats_buffer.flush()
+        self.commit()
+
+    def increment_command_usage(self, command: str) -> bool:
+        """Increments the usage count for a command; True if the buffer was written out."""
+        stats = self._stats()
+        commands_used = stats.setdefault('commands_used', {})
+        commands_used[command] = commands_used.get(command, 0) + 1
+        stats['total_commands'] = stats.get('total_commands', 0) + 1
+        stats['last_command_time'] = datetime.now().isoformat()
+        return self.stats_buffer.record()
+
+    def increment_counter(self, counter_name: str) -> bool:
+        """Увеличивает указанный счетчик статистики (True, если буфер записан)."""
+        stats = self._stats()
+        stats[counter_name] = stats.get(counter_name, 0) + 1
+        return self.stats_buffer.record()
+
+    def raise_counter(self, counter_name: str, value: int) -> bool:
+        """Поднимает счетчик статистики до value, если он меньше (True, если буфер записан)."""
+        stats = self._stats()
+        if stats.get(counter_name, 0) >= value:
+            return False
+        stats[counter_name] = value
+        return self.stats_buffer.record()
+
+    def increment_timers_created(self):
+        """Увеличивает счетчик созданных таймеров."""
+        return self.increment_counter('timers_created')
+
+    def increment_alarms_created(self):
+        """Увеличивает счетчик созданных будильников и напоминаний."""
+        return self.increment_counter('alarms_created')
+
+    def increment_mentions_created(self):
+        """Увеличивает счетчик созданных упоминаний и спама."""
+        return self.increment_counter('mentions_created')
+
+    def get_command_usage(self, command: str) -> int:
+        """Gets the usage count for a command."""
+        return self._stats().get('commands_used', {}).get(command, 0)
+
+    def get_total_commands(self) -> int:
+        """Gets the total number of commands used."""
+        return self._stats().get('total_commands', 0)
+
+    def get_last_command_time(self) -> str:
+        """Gets the time of the last command."""
+        return self._stats().get('last_command_time', '')
+
+def migrate_json_to_sqlite(data_dir: str, db_path: str) -> Dict[str, Any]:
+    """Импортирует data/*.json (включая незасжатые журналы или шарды чатов) в базу SQLite.
+
+    Returns:
+        Количество импортированных записей по коллекциям.
+    """
+    if os.path.exists(os.path.join(data_dir, 'shards', 'manifest.json')):
+        source = ShardedJsonStorage(data_dir)
+    else:
+        source = JsonStorage(data_dir, journal=True)
+    target = SqliteStorage(db_path)
+    counts: Dict[str, Any] = {}
+    try:
+        for key in COLLECTIONS:
+            items = source._get_all(key)
+            target._save_many(key, items)
+            counts[key] = len(items)
+
+        stats = source.get_stats()
+        if stats:
+            target._save_stats(stats)
+        counts['stats'] = bool(stats)
+    finally:
+        target.close()
+
+    logger.info(f"Импорт JSON -> SQLite завершен: {counts}")
+    return counts
+
+if __name__ == '__main__':
+    # python -m utils.sqlite_storage [data_dir] [db_path]
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else 'data'
+    db_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(data_dir, 'storage.db')
+    logging.basicConfig(level=logging.INFO)
+    print(migrate_json_to_sqlite(data_dir, db_path))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import time
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class StatsBuffer:
+    """Буфер отложенной записи для счетчиков статистики.
+
+    Счетчики изменяются в памяти, а на диск попадают пачкой: по таймеру,
+    при накоплении порога изменений или при остановке бота.
+    """
+
+    def __init__(self, flush: Callable[[], None], flush_interval: float = 5.0, flush_threshold: int = 50):
+        """
+        Args:
+            flush: Функция, которая записывает текущую статистику на диск.
+            flush_interval: Период фоновой записи (секунды).
+            flush_threshold: Количество изменений, после которого запись выполняется сразу.
+        """
+        self._flush = flush
+        self.flush_interval = flush_interval
+        self.flush_threshold = max(1, flush_threshold)
+        self.dirty = 0
+
+        # Метрики: сколько изменений пришло и сколько реальных записей выполнено
+        self.increments = 0
+        self.flushes = 0
+        self.started_at = time.monotonic()
+
+    def record(self) -> bool:
+        """Отмечает одно изменение статистики. Возвращает True если порог вызвал запись."""
+        self.increments += 1
+        self.dirty += 1
+        if self.dirty >= self.flush_threshold:
+            return self.flush()
+        return False
+
+    def flush(self) -> bool:
+        """Записывает накопленные изменения. Возвращает True если запись была."""
+        if not self.dirty:
+            return False
+        self._flush()
+        self.dirty = 0
+        self.flushes += 1
+        return True
+
+    def get_metrics(self) -> Dict[str, float]:
+        """Возвращает метрики экономии записей на диск."""
+        uptime = max(time.monotonic() - self.started_at, 1e-9)
+        # Без буфера каждое изменение было бы отдельной перезаписью stats.json
+        writes_saved = self.increments - self.flushes - (1 if self.dirty else 0)
+        writes_saved = max(0, writes_saved)
+        return {
+            'increments': self.increments,
+            'flushes': self.flushes,
+            'pending': self.dirty,
+            'writes_saved': writes_saved,
+            'writes_saved_per_sec': writes_saved / uptime,
+            'uptime': uptime,
+        }
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+
+from utils.async_storage import AsyncStorage
+from utils.json_storage import JsonStorage
+from utils.sharded_storage import ShardedJsonStorage
+from utils.sqlite_storage import SqliteStorage, migrate_json_to_sqlite
+
+logger = logging.getLogger(__name__)
+
+def create_storage(cfg):
+    """Создает хранилище, выбранное в config.STORAGE_BACKEND, за асинхронным фасадом."""
+    if cfg.STORAGE_BACKEND == 'sqlite':
+        if not os.path.exists(cfg.SQLITE_FILE):
+            json_files = [cfg.TIMERS_FILE, cfg.WAKE_ALARMS_FILE, cfg.REMINDERS_FILE, cfg.MENTIONS_FILE, cfg.STATS_FILE,
+                          os.path.join(cfg.DATA_DIR, 'shards', 'manifest.json')]
+            if any(os.path.exists(path) for path in json_files):
+                # Первый запуск на SQLite: переносим существующие данные
+                logger.info(f"Импортирую данные из {cfg.DATA_DIR} в {cfg.SQLITE_FILE}")
+                migrate_json_to_sqlite(cfg.DATA_DIR, cfg.SQLITE_FILE)
+        return AsyncStorage(SqliteStorage(
+            cfg.SQLITE_FILE,
+            stats_flush_interval=cfg.STATS_FLUSH_INTERVAL,
+            stats_flush_threshold=cfg.STATS_FLUSH_THRESHOLD,
+            durability=cfg.STORAGE_DURABILITY,
+        ), commit_window=cfg.GROUP_COMMIT_WINDOW_MS / 1000)
+
+    storage_class = ShardedJsonStorage if cfg.STORAGE_SHARDED else JsonStorage
+    return AsyncStorage(storage_class(
+        cfg.DATA_DIR,
+        stats_flush_interval=cfg.STATS_FLUSH_INTERVAL,
+        stats_flush_threshold=cfg.STATS_FLUSH_THRESHOLD,
+        journal=cfg.STORAGE_JOURNAL,
+        journal_compact_threshold=cfg.JOURNAL_COMPACT_THRESHOLD,
+        journal_compact_interval=cfg.JOURNAL_COMPACT_INTERVAL,
+        serializer=cfg.STORAGE_SERIALIZER,
+        durability=cfg.STORAGE_DURABILITY,
+    ), commit_window=cfg.GROUP_COMMIT_WINDOW_MS / 1000)
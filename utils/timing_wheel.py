@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+import math
+import random
+import time
+from typing import Dict, List, Optional, Set
+
+from utils.scheduler import DUE, PENDING, JobHandle, Scheduler
+
+# Уровни колеса: (секунд в ячейке, количество ячеек)
+LEVELS = (
+    (1, 60),        # секунды
+    (60, 60),       # минуты
+    (3600, 24),     # часы
+    (86400, 64),    # дни
+)
+
+class WheelHandle(JobHandle):
+    """JobHandle, который знает свою ячейку колеса (для отмены за O(1))."""
+
+    # bucket - текущая ячейка, level - ее уровень (-1: готова к запуску или
+    # за горизонтом колеса); заполняются при постановке в колесо
+    __slots__ = ('bucket', 'level')
+
+class TimingWheelScheduler(Scheduler):
+    """Планировщик на иерархическом колесе таймеров (секунды/минуты/часы/дни).
+
+    Вставка и отмена - O(1): задача кладется в ячейку уровня, на котором
+    помещается ее срок, и удаляется из этой ячейки. Каскадирование ленивое:
+    ячейка минут разбирается по секундам, только когда до нее дошло время,
+    ячейка часов - по минутам и т.д. Диспетчер просыпается только на
+    непустых ячейках секунд и на границах уровней, где есть задачи, поэтому
+    тысячи далеких напоминаний ничего не стоят, пока до них далеко.
+    Задачи дальше 64 дней лежат в отдельном списке и перекладываются в
+    колесо на границе суток. Точность - одна секунда.
+    """
+
+    handle_class = WheelHandle
+
+    def __init__(self, workers: int = 1000, lane_workers: int = 10):
+        super().__init__(workers, lane_workers)
+        self._wheels: List[List[Set[WheelHandle]]] = [[set() for _ in range(slots)] for _, slots in LEVELS]
+        self._level_counts = [0] * len(LEVELS)
+        # Битовая маска непустых ячеек каждого уровня
+        self._masks = [0] * len(LEVELS)
+        self._overflow: Set[WheelHandle] = set()
+        self._ready: Set[WheelHandle] = set()
+        self._count = 0
+        self._tick: Optional[int] = None
+
+    # Очередь (колесо)
+    def __len__(self) -> int:
+        return self._count
+
+    def _current_tick(self) -> int:
+        if self._tick is None:
+            self._tick = math.floor(self.time())
+        return self._tick
+
+    def _push(self, handle: WheelHandle, seq: int) -> None:
+        self._count += 1
+        if handle.deadline <= self.time():
+            # Уже наступившая задача не ждет границы секунды
+            handle.level = -1
+            handle.bucket = self._ready
+            self._ready.add(handle)
+            return
+        self._place(handle, self._current_tick())
+
+    def _place(self, handle: WheelHandle, now_tick: int) -> None:
+        target = math.ceil(handle.deadline)
+        handle.level = -1
+        if target <= now_tick:
+            bucket = self._ready
+        else:
+            bucket = self._overflow
+            for level, (unit, slots) in enumerate(LEVELS):
+                if target // unit - now_tick // unit < slots:
+                    index = (target // unit) % slots
+                    bucket = self._wheels[level][index]
+                    self._level_counts[level] += 1
+                    self._masks[level] |= 1 << index
+                    handle.level = level
+                    break
+        bucket.add(handle)
+        handle.bucket = bucket
+
+    def _remove(self, handle: WheelHandle) -> None:
+        if handle.bucket is None:
+            return
+        bucket = handle.bucket
+        bucket.discard(handle)
+        if handle.level >= 0:
+            self._level_counts[handle.level] -= 1
+            if not bucket:
+                self._clear_bit(handle.level, handle)
+        handle.bucket = None
+        handle.level = -1
+        self._count -= 1
+
+    def _clear_bit(self, level: int, handle: WheelHandle) -> None:
+        unit, slots = LEVELS[level]
+        self._masks[level] &= ~(1 << ((math.ceil(handle.deadline) // unit) % slots))
+
+    def _advance(self, now: float) -> None:
+        """Прокручивает колесо до текущей секунды, каскадируя ячейки по пути."""
+        now_tick = math.floor(now)
+        tick = self._current_tick()
+        while tick < now_tick:
+            step = self._next_event_tick(tick)
+            tick = min(step, now_tick)
+            self._tick = tick
+            # Сначала старшие уровни: их задачи спускаются на младшие
+            for level in range(len(LEVELS) - 1, 0, -1):
+                unit, slots = LEVELS[level]
+                if tick % unit == 0:
+                    if level == len(LEVELS) - 1 and self._overflow:
+                        handles = list(self._overflow)
+                        self._overflow.clear()
+                        for handle in handles:
+                            self._place(handle, tick)
+                    self._cascade(level, (tick // unit) % slots, tick)
+            index = tick % LEVELS[0][1]
+            bucket = self._wheels[0][index]
+            if bucket:
+                self._level_counts[0] -= len(bucket)
+                self._masks[0] &= ~(1 << index)
+                for handle in bucket:
+                    handle.bucket = self._ready
+                    handle.level = -1
+                self._ready.update(bucket)
+                bucket.clear()
+
+    def _cascade(self, level: int, index: int, tick: int) -> None:
+        """Спускает задачи ячейки на младшие уровни."""
+        bucket = self._wheels[level][index]
+        if not bucket:
+            return
+        handles = list(bucket)
+        bucket.clear()
+        self._level_counts[level] -= len(handles)
+        self._masks[level] &= ~(1 << index)
+        for handle in handles:
+            self._place(handle, tick)
+
+    def _next_event_tick(self, tick: int) -> int:
+        """Ближайшая секунда после tick, на которой колесу есть что делать.
+
+        Это начало ближайшей непустой ячейки на любом уровне: там задачи
+        ячейки срабатывают (секунды) или спускаются на уровень ниже.
+        """
+        best = math.inf
+        for level, (unit, slots) in enumerate(LEVELS):
+            mask = self._masks[level]
+            if not mask:
+                continue
+            base = tick // unit
+            position = base % slots
+            # Ближайший установленный бит после position, с переходом через ноль
+            after = mask >> (position + 1)
+            if after:
+                offset = (after & -after).bit_length()
+            else:
+                offset = slots - position + (mask & -mask).bit_length() - 1
+            best = min(best, (base + offset) * unit)
+        if self._overflow:
+            # Задачи за горизонтом проверяются на каждой границе суток
+            day = LEVELS[-1][0]
+            best = min(best, (tick // day + 1) * day)
+        return best
+
+    def _collect_due(self, now: float) -> List[JobHandle]:
+        self._advance(now)
+        due = []
+        for handle in self._ready:
+            if handle.state == PENDING:
+                handle.state = DUE
+                handle.bucket = None
+                due.append(handle)
+        self._count -= len(due)
+        self._ready.clear()
+        due.sort(key=lambda handle: handle.deadline)
+        return due
+
+    def _next_deadline(self) -> float:
+        if self._ready:
+            return self._current_tick()
+        return self._next_event_tick(self._current_tick())
+
+    def _clear(self) -> None:
+        for wheel in self._wheels:
+            for bucket in wheel:
+                bucket.clear()
+        self._level_counts = [0] * len(LEVELS)
+        self._masks = [0] * len(LEVELS)
+        self._overflow.clear()
+        self._ready.clear()
+        self._count = 0
+
+def _benchmark_engine(engine_class, count: int, horizon: float) -> Dict[str, float]:
+    """Вставка, отмена половины и выработка всех задач без реального ожидания."""
+    async def noop():
+        pass
+
+    async def run():
+        engine = engine_class()
+        now = engine.time()
+        rng = random.Random(count)
+        deadlines = [now + rng.uniform(1, horizon) for _ in range(count)]
+
+        start = time.perf_counter()
+        handles = [engine.call_at(deadline, noop) for deadline in deadlines]
+        insert_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for handle in handles[::2]:
+            handle.cancel()
+        cancel_time = time.perf_counter() - start
+
+        # Прокручиваем время от срабатывания к срабатыванию, как диспетчер
+        start = time.perf_counter()
+        wakeups = fired = 0
+        while len(engine):
+            wakeups += 1
+            fired += len(engine._collect_due(engine._next_deadline()))
+        drain_time = time.perf_counter() - start
+
+        return {
+            'insert_us': insert_time / count * 1e6,
+            'cancel_us': cancel_time / (count // 2) * 1e6,
+            'drain_ms': drain_time * 1000,
+            'wakeups': wakeups,
+            'fired': fired,
+        }
+
+    return asyncio.run(run())
+
+def benchmark(counts=(1000, 10000, 100000), horizon: float = 30 * 86400) -> List[Dict]:
+    """Сравнивает кучу и колесо таймеров на напоминаниях со сроком до horizon секунд."""
+    results = []
+    for count in counts:
+        for name, engine_class in (('heap', Scheduler), ('wheel', TimingWheelScheduler)):
+            row = _benchmark_engine(engine_class, count, horizon)
+            row.update(jobs=count, engine=name)
+            results.append(row)
+    return results
+
+if __name__ == '__main__':
+    # python -m utils.timing_wheel
+    print(f"{'jobs':>7} {'engine':>6} {'insert, us':>11} {'cancel, us':>11} {'drain, ms':>10} {'wakeups':>8}")
+    for row in benchmark():
+        print(f"{row['jobs']:>7} {row['engine']:>6} {row['insert_us']:>11.2f} {row['cancel_us']:>11.2f} "
+              f"{row['drain_ms']:>10.1f} {row['wakeups']:>8}")
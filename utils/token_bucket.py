@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+class TokenBucket:
+    """Token bucket: rate операций в секунду, не больше burst подряд.
+
+    Общий для регулятора правок (бюджеты чатов и аккаунта) и очереди
+    отправки сработавших задач. Токен тратит вызывающий код
+    (tokens -= 1), когда wait_time() вернул 0.
+    """
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Секунды до появления токена (0, если он уже есть)."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate